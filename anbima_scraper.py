@@ -5,6 +5,8 @@ Handles web scraping of fund data from ANBIMA website
 
 import time
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
@@ -16,40 +18,81 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import (
     TimeoutException,
-    NoSuchElementException,
     WebDriverException,
     StaleElementReferenceException
 )
 from webdriver_manager.chrome import ChromeDriverManager
 
 import config
+from chrome_profile import LEAN_DROPPED_ARGS, launch_profile_args, merge_feature_flags
+from retry_policy import OTHER, RetryPolicy, classify
+from scrape_watchdog import ScrapeCancelled, ScrapeWatchdog, kill_driver_processes
+from stealth_scraper import fund_from_results
+from date_window import DateWindow
+from fund_catalog import FundCatalog
+from row_harvest import RowHarvest
+from page_scripts import (
+    FUND_METADATA_JS,
+    RATE_LIMIT_PROBE_JS,
+    fund_class_from,
+    rate_limit_reason,
+)
 
 
 class ANBIMAScraper:
     """Selenium-based scraper for ANBIMA fund data"""
     
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, launch_profile: Optional[str] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
         """
         Initialize the scraper
 
         Args:
             headless: Whether to run browser in headless mode
+            launch_profile: "default" or "lean" Chrome flags (None follows
+                config.CHROME_LAUNCH_PROFILE)
+            retry_policy: Shared RetryPolicy (per-CNPJ budgets, failure
+                categories); a private one is created if omitted
         """
         self.driver = None
         self.wait = None
         self.headless = headless
+        self.launch_profile = launch_profile or getattr(config, "CHROME_LAUNCH_PROFILE", "default")
         self.logger = logging.getLogger(__name__)
         self.rate_limit_count = 0
+        self.retry_policy = retry_policy or RetryPolicy()
+        # CNPJ -> fund code, filled by discover_funds.py (None when disabled)
+        self.catalog = FundCatalog.from_config()
+        # Hard wall-clock deadline per CNPJ (see scrape_watchdog.py). A
+        # cancel stops the call at its next checkpoint (between steps and
+        # scrolls); a call stuck inside one WebDriver command is unblocked by
+        # killing its browser session after WATCHDOG_GRACE.
+        self._cancel_event = threading.Event()
+        self.cancel_reason: Optional[str] = None
+        self._cancel_cnpj: Optional[str] = None  # CNPJ a pending cancel() is aimed at
+        self.watchdog = (
+            ScrapeWatchdog(self.cancel, self.abort_session,
+                           grace=getattr(config, "WATCHDOG_GRACE", 10))
+            if getattr(config, "WATCHDOG_ENABLED", True)
+            else None
+        )
         
     def setup_driver(self):
         """Initialize Selenium WebDriver with Chrome"""
         try:
             chrome_options = Options()
             
-            # Add options from config
+            # Add options from config (plus the "lean" extras, if selected)
+            lean_args = launch_profile_args(self.launch_profile)
+            options = []
             for option in config.CHROME_OPTIONS:
                 if not self.headless and option in ["--headless", "--headless=new"]:
                     continue  # Skip headless if disabled
+                if lean_args and option in LEAN_DROPPED_ARGS:
+                    continue
+                options.append(option)
+            # One --disable-features for both lists (Chrome keeps only the last)
+            for option in merge_feature_flags(options + lean_args):
                 chrome_options.add_argument(option)
             
             # Anti-detection: Exclude automation switches
@@ -117,9 +160,18 @@ class ANBIMAScraper:
             self.logger.error(f"Failed to initialize WebDriver: {str(e)}")
             return False
     
-    def search_fund(self, cnpj: str) -> Tuple[bool, str]:
+    @contextmanager
+    def _no_implicit_wait(self):
+        """Run optional-element probes with a zero implicit wait"""
+        self.driver.implicitly_wait(0)
+        try:
+            yield
+        finally:
+            self.driver.implicitly_wait(config.IMPLICIT_WAIT)
+    
+    def _open_search_results(self, cnpj: str) -> Tuple[bool, str]:
         """
-        Search for a fund by CNPJ
+        Type the CNPJ into the search box and land on the search results page
         
         Args:
             cnpj: The CNPJ to search for
@@ -127,74 +179,91 @@ class ANBIMAScraper:
         Returns:
             Tuple of (success: bool, message: str)
         """
+        # Navigate to ANBIMA page
+        self.logger.info(f"Navigating to {config.ANBIMA_BASE_URL}")
+        self.driver.get(config.ANBIMA_BASE_URL)
+        
+        # Wait for page to load
+        time.sleep(3)
+        
+        # Close cookies banner if present
         try:
-            # Navigate to ANBIMA page
-            self.logger.info(f"Navigating to {config.ANBIMA_BASE_URL}")
-            self.driver.get(config.ANBIMA_BASE_URL)
-            
-            # Wait for page to load
-            time.sleep(3)
-            
-            # Close cookies banner if present
-            try:
+            with self._no_implicit_wait():
                 cookie_button = self.driver.find_element(By.LINK_TEXT, "Prosseguir")
-                cookie_button.click()
-                time.sleep(1)
-            except:
-                pass
-            
-            # Find and fill search input
-            self.logger.info(f"Searching for CNPJ: {cnpj}")
-            search_input = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Busque fundos']"))
+            cookie_button.click()
+            time.sleep(1)
+        except:
+            pass
+        
+        # Find and fill search input
+        self.logger.info(f"Searching for CNPJ: {cnpj}")
+        search_input = self.wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Busque fundos']"))
+        )
+        
+        # Clear and enter CNPJ
+        search_input.clear()
+        search_input.send_keys(cnpj)
+        
+        # Wait for autocomplete dropdown to appear
+        time.sleep(3)
+        
+        # Try to click on the dropdown result link
+        self.logger.info("Looking for fund in dropdown results...")
+        
+        try:
+            # Look for the link in the dropdown that says "em fundos de investimento"
+            dropdown_link = self.wait.until(
+                EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, '/busca/fundos?q=')]"))
             )
+        except TimeoutException:
+            return False, f"No results found for CNPJ: {cnpj}"
+        
+        dropdown_link.click()
+        time.sleep(2)
+        
+        # Now we should be on the search results page
+        # Wait for the results table
+        self.logger.info("Waiting for search results...")
+        time.sleep(2)
+        
+        # Try to close dropdown if it's still open
+        try:
+            with self._no_implicit_wait():
+                close_button = self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='close-dropdown']")
+            close_button.click()
+            time.sleep(1)
+        except:
+            pass
+        
+        return True, "Search results loaded"
+    
+    def search_fund(self, cnpj: str) -> Tuple[bool, str]:
+        """
+        Search for a fund by CNPJ and open its detail page
+        
+        Args:
+            cnpj: The CNPJ to search for
             
-            # Clear and enter CNPJ
-            search_input.clear()
-            search_input.send_keys(cnpj)
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        try:
+            success, message = self._open_search_results(cnpj)
+            if not success:
+                return False, message
             
-            # Wait for autocomplete dropdown to appear
-            time.sleep(3)
+            # Now find and click the fund link in the results
+            fund_links = self.driver.find_elements(By.CSS_SELECTOR, "article a[href*='/fundos/C']")
             
-            # Try to click on the dropdown result link
-            self.logger.info("Looking for fund in dropdown results...")
+            if not fund_links:
+                return False, "No fund found for this CNPJ"
             
-            try:
-                # Look for the link in the dropdown that says "em fundos de investimento"
-                dropdown_link = self.wait.until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, '/busca/fundos?q=')]"))
-                )
-                
-                dropdown_link.click()
-                time.sleep(2)
-                
-                # Now we should be on the search results page
-                # Wait for the results table
-                self.logger.info("Waiting for search results...")
-                time.sleep(2)
-                
-                # Try to close dropdown if it's still open
-                try:
-                    close_button = self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='close-dropdown']")
-                    close_button.click()
-                    time.sleep(1)
-                except:
-                    pass
-                
-                # Now find and click the fund link in the results
-                fund_links = self.driver.find_elements(By.CSS_SELECTOR, "article a[href*='/fundos/C']")
-                
-                if not fund_links:
-                    return False, "No fund found for this CNPJ"
-                
-                self.logger.info(f"Found {len(fund_links)} result(s). Clicking on the first one...")
-                fund_links[0].click()
-                time.sleep(3)
-                
-                return True, "Fund found and clicked"
-                
-            except TimeoutException:
-                return False, f"No results found for CNPJ: {cnpj}"
+            self.logger.info(f"Found {len(fund_links)} result(s). Clicking on the first one...")
+            fund_links[0].click()
+            time.sleep(3)
+            
+            return True, "Fund found and clicked"
                 
         except TimeoutException as e:
             self.logger.error(f"Timeout while searching for CNPJ {cnpj}: {str(e)}")
@@ -203,64 +272,88 @@ class ANBIMAScraper:
             self.logger.error(f"Error searching for CNPJ {cnpj}: {str(e)}")
             return False, f"Error: {str(e)}"
     
-    def get_fund_name(self) -> Optional[str]:
+    def resolve_fund(self, cnpj: str) -> Tuple[bool, Optional[Dict], str]:
         """
-        Extract the fund name from the detail page
+        Find the fund for a CNPJ on the search results page, without opening
+        its detail page
         
+        Args:
+            cnpj: The CNPJ to search for
+            
         Returns:
-            Fund name or None if not found
+            Tuple of (success: bool, fund: Dict | None, message: str)
+            where fund is {"code": str, "href": str, "name": str}
         """
         try:
-            # Try multiple selectors for fund name
-            selectors = [
-                "h1",
-                "h2",
-                ".fund-name",
-                ".fund-title",
-                "[class*='title']",
-                "[class*='name']"
-            ]
-            
-            for selector in selectors:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    name = element.text.strip()
-                    if name and len(name) > 5:  # Basic validation
-                        self.logger.info(f"Found fund name: {name}")
-                        return name
-                except NoSuchElementException:
-                    continue
-            
-            # If no name found, try to get from page source
-            page_source = self.driver.page_source
-            if "CLASSE" in page_source:
-                # Extract from visible text
-                lines = page_source.split('\n')
-                for line in lines:
-                    if 'CLASSE' in line.upper() and len(line) > 10:
-                        # Clean HTML tags
-                        import re
-                        clean_line = re.sub('<[^<]+?>', '', line).strip()
-                        if clean_line and len(clean_line) > 10:
-                            return clean_line[:200]  # Limit length
+            success, message = self._open_search_results(cnpj)
+            if not success:
+                return False, None, message
             
-            self.logger.warning("Could not find fund name")
-            return "N/A"
+            fund, message = fund_from_results(self.driver)
+            if not fund:
+                return False, None, message
+            self.logger.info(message)
+            return True, fund, "Fund resolved from search results"
             
+        except TimeoutException as e:
+            self.logger.error(f"Timeout while searching for CNPJ {cnpj}: {str(e)}")
+            return False, None, "Timeout: Page took too long to load"
         except Exception as e:
-            self.logger.error(f"Error getting fund name: {str(e)}")
-            return "N/A"
+            self.logger.error(f"Error searching for CNPJ {cnpj}: {str(e)}")
+            return False, None, f"Error: {str(e)}"
+    
+    def extract_fund_metadata(self) -> Dict:
+        """
+        Read the fund header facts of the current page in one round trip
+        
+        Returns:
+            Dict with "name", "anbima_code", "cnpj", "fund_class" and
+            "header_lines" (values None / "N/A" when not found)
+        """
+        try:
+            metadata = self.driver.execute_script(FUND_METADATA_JS) or {}
+        except Exception as e:
+            self.logger.error(f"Error extracting fund metadata: {str(e)}")
+            metadata = {}
+        metadata["fund_class"] = fund_class_from(metadata)
+        return metadata
+    
+    def get_fund_name(self) -> Optional[str]:
+        """
+        Extract the fund name from the current page
+        
+        Returns:
+            Fund name or "N/A" if not found
+        """
+        name = self.extract_fund_metadata().get("name")
+        if name:
+            self.logger.info(f"Found fund name: {name}")
+            return name
+        self.logger.warning("Could not find fund name")
+        return "N/A"
     
-    def navigate_to_periodic_data(self) -> Tuple[bool, str]:
+    def navigate_to_periodic_data(self, fund_code: Optional[str] = None) -> Tuple[bool, str]:
         """
         Navigate to the 'DADOS PERIÓDICOS' page
         
+        Args:
+            fund_code: Fund code from resolve_fund(). When omitted, the code
+                is taken from the current (detail page) URL.
+        
         Returns:
             Tuple of (success: bool, message: str)
         """
         try:
             self.logger.info("Navigating to Dados Periódicos page...")
             
+            if fund_code:
+                site_root = config.ANBIMA_BASE_URL.split('/busca/')[0]
+                periodic_url = f"{site_root}/fundos/{fund_code}/dados-periodicos"
+                self.logger.info(f"Navigating to {periodic_url}")
+                self.driver.get(periodic_url)
+                time.sleep(3)
+                return True, "Successfully navigated to Dados Periódicos page"
+            
             # Get the current URL and modify it to go to dados-periodicos
             current_url = self.driver.current_url
             
@@ -286,11 +379,14 @@ class ANBIMAScraper:
             self.logger.error(f"Error navigating to periodic data page: {str(e)}")
             return False, f"Error: {str(e)}"
     
-    def extract_periodic_data(self) -> Tuple[bool, List[Dict], str]:
+    def extract_periodic_data(self, window: Optional[DateWindow] = None) -> Tuple[bool, List[Dict], str]:
         """
         Extract ALL periodic data from the table
         Extracts only: Data competência and Valor cota
-        Scrolls to load all historical data
+        Scrolls to load all historical data (or back to window.since)
+        
+        Args:
+            window: Optional since / until bounds on the rows
         
         Returns:
             Tuple of (success: bool, data: List[Dict], message: str)
@@ -335,14 +431,23 @@ class ANBIMAScraper:
                 
                 self.logger.info(f"Found columns - Date index: {date_idx}, Cota index: {cota_idx}")
                 
-                # Scroll down to load all data (in case of lazy loading)
+                # Scroll down to load all data (in case of lazy loading),
+                # harvesting the rows as they appear
                 self.logger.info("Scrolling to load all historical data...")
+                harvest = RowHarvest(["Data da cotização", "Valor cota"], required=2, window=window)
+                harvest.bind([date_idx, cota_idx])
                 last_height = 0
                 same_height_count = 0
                 max_scrolls = 50  # Limit to prevent infinite loops
                 scroll_count = 0
                 
                 while scroll_count < max_scrolls:
+                    self._check_cancelled()
+                    added = harvest.step(self.driver.execute_script)
+                    if harvest.passed:
+                        self.logger.info(f"Passed {window.since:%d/%m/%Y} after {scroll_count} scrolls")
+                        break
+                    
                     # Scroll to bottom of page
                     self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
                     time.sleep(1)
@@ -350,9 +455,9 @@ class ANBIMAScraper:
                     # Get new height
                     new_height = self.driver.execute_script("return document.body.scrollHeight")
                     
-                    if new_height == last_height:
+                    if new_height == last_height and not added:
                         same_height_count += 1
-                        # If height hasn't changed for 3 consecutive scrolls, we're done
+                        # If nothing new for 3 consecutive scrolls, we're done
                         if same_height_count >= 3:
                             self.logger.info(f"Reached end of data after {scroll_count} scrolls")
                             break
@@ -362,47 +467,16 @@ class ANBIMAScraper:
                     last_height = new_height
                     scroll_count += 1
                 
-                # Wait a bit for final data to load
-                time.sleep(2)
-                
-                # Get table body again (it may have been updated)
-                tbody = table.find_element(By.TAG_NAME, "tbody")
-                rows = tbody.find_elements(By.TAG_NAME, "tr")
-                
-                if not rows:
-                    return False, [], "No data rows found in table"
-                
-                self.logger.info(f"Found {len(rows)} total data rows after scrolling")
-                
-                # Extract data (only date and cota)
-                data = []
-                seen_dates = set()  # To avoid duplicates
-                
-                for row in rows:
-                    try:
-                        cells = row.find_elements(By.CSS_SELECTOR, "td")
-                        if not cells or len(cells) <= max(date_idx, cota_idx):
-                            continue
-                        
-                        date_value = cells[date_idx].text.strip()
-                        cota_value = cells[cota_idx].text.strip()
-                        
-                        if date_value and cota_value and date_value not in seen_dates:
-                            data.append({
-                                "Data da cotização": date_value,
-                                "Valor cota": cota_value
-                            })
-                            seen_dates.add(date_value)
-                    
-                    except Exception as e:
-                        self.logger.warning(f"Error processing row: {str(e)}")
-                        continue
+                # Wait a bit for final data to load, then read the last rows
+                if not harvest.passed:
+                    time.sleep(2)
+                    harvest.step(self.driver.execute_script)
                 
-                if data:
-                    self.logger.info(f"Successfully extracted {len(data)} unique rows")
-                    # Data is usually newest first, so reverse to get oldest first
-                    data.reverse()
-                    return True, data, f"Extracted {len(data)} periodic data records"
+                if len(harvest):
+                    self.logger.info(f"Successfully extracted {len(harvest)} unique rows")
+                    return True, harvest.records(), f"Extracted {len(harvest)} periodic data records"
+                elif harvest.skipped:
+                    return True, [], f"No records in the date window {window}"
                 else:
                     return False, [], "No data extracted from table"
             
@@ -418,59 +492,78 @@ class ANBIMAScraper:
         """
         Detect if page shows rate limiting or blocking
 
+        One small execute_script (main-document HTTP status, title, HTML size)
+        instead of pulling current_url, title and the full page_source, so it
+        is cheap enough to run after every navigation.
+
         Returns:
             True if rate limited, False otherwise
         """
         try:
-            # Don't check if we're on data:, or about:blank (initial page load)
-            current_url = self.driver.current_url.lower()
-            if 'data:' in current_url or 'about:blank' in current_url or not current_url:
-                return False
-
-            page_source = self.driver.page_source.lower()
-            page_title = self.driver.title.lower()
-
-            rate_limit_indicators = [
-                'too many requests',
-                '429',
-                '423',
-                'rate limit',
-                'bloqueado',
-                'blocked',
-                'access denied',
-                'temporarily unavailable',
-                'try again later',
-                'tente novamente',
-                'acesso negado'
-            ]
-
-            # Only trigger if the indicator appears prominently (not just in page metadata)
-            is_limited = any(indicator in page_title or
-                           (indicator in page_source and len(page_source) < 5000)
-                           for indicator in rate_limit_indicators)
-
-            if is_limited:
+            probe = self.driver.execute_script(RATE_LIMIT_PROBE_JS) or {}
+            reason = rate_limit_reason(probe)
+
+            if reason:
                 self.rate_limit_count += 1
-                self.logger.warning(f"Rate limit detected! (count: {self.rate_limit_count})")
-                self.logger.debug(f"Page title: {page_title[:100]}")
-                self.logger.debug(f"URL: {current_url}")
+                self.logger.warning(
+                    f"Rate limit detected ({reason})! (count: {self.rate_limit_count})"
+                )
+                self.logger.debug(f"Page title: {probe.get('title', '')[:100]}")
+                self.logger.debug(f"URL: {probe.get('url')}")
 
-            return is_limited
+            return bool(reason)
 
         except Exception as e:
             self.logger.debug(f"Error checking rate limit: {str(e)}")
             return False
 
-    def scrape_fund_data(self, cnpj: str) -> Dict:
+    def scrape_fund_data(self, cnpj: str, since=None, until=None) -> Dict:
         """
         Complete scraping workflow for a single CNPJ
 
+        One attempt per call, drawn from the CNPJ's RetryBudget; the caller's
+        retry loop asks self.retry_policy.decide() whether to call again.
+
         Args:
             cnpj: The CNPJ to scrape
+            since: Oldest date to fetch (see DateWindow; None = full history)
+            until: Newest date to keep (None = up to the latest row)
 
         Returns:
-            Dict with fund data and status
+            Dict with fund data and status, plus "error_category",
+            "attempts_left", "time_left" and "retry_trail"
         """
+        window = DateWindow.of(since, until)
+        budget = self.retry_policy.budget(cnpj)
+        if not budget.begin_attempt("scraper"):
+            result = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": [],
+                      "Status": "Retry budget exhausted"}
+            category = OTHER
+        else:
+            self._begin_call(cnpj)
+            if self.watchdog:
+                self.watchdog.arm(cnpj, getattr(config, "CNPJ_WALL_TIMEOUT", 150))
+            try:
+                result = self._scrape_once(cnpj, window)
+            finally:
+                if self.watchdog:
+                    self.watchdog.disarm()
+            if self.cancelled and result["Status"] != "Success":
+                result["Status"] = self.cancel_reason
+                # A cooperative cancel (a hedge lost its race, the watchdog's
+                # first stage) leaves the browser healthy; only a torn-down
+                # session needs a new one
+                if self.watchdog and self.watchdog.torn_down:
+                    self._relaunch_driver()
+            category = classify(result["Status"])
+            budget.end_attempt("scraper", category, result["Status"])
+        self.retry_policy.annotate(result, budget, category)
+        if category not in self.retry_policy.RETRYABLE or budget.exhausted:
+            self.retry_policy.release(cnpj)
+        return result
+
+    def _scrape_once(self, cnpj: str, window: Optional[DateWindow] = None) -> Dict:
+        """One pass of the workflow (search → periodic page → extract)"""
         result = {
             "CNPJ": cnpj,
             "Nome do Fundo": "N/A",
@@ -484,23 +577,32 @@ class ANBIMAScraper:
                 result["Status"] = "Rate limited"
                 return result
 
-            # Step 1: Search for fund
-            success, message = self.search_fund(cnpj)
-            if not success:
-                result["Status"] = message
-                return result
+            self._check_cancelled()
 
-            # Check for rate limiting after search
-            if self.is_rate_limited():
-                result["Status"] = "Rate limited"
-                return result
+            # Step 1: Read fund code + name from the fund catalog, or from
+            # the search results (the detail page is never loaded)
+            fund = self.catalog.fund(cnpj) if self.catalog is not None else None
+            cataloged = fund is not None
+            if cataloged:
+                self.logger.info(f"{cnpj}: {fund['code']} from the fund catalog, skipping the search")
+            else:
+                success, fund, message = self.resolve_fund(cnpj)
+                if not success:
+                    result["Status"] = message
+                    return result
+
+                # Check for rate limiting after search
+                if self.is_rate_limited():
+                    result["Status"] = "Rate limited"
+                    return result
 
-            # Step 2: Get fund name
-            fund_name = self.get_fund_name()
-            result["Nome do Fundo"] = fund_name if fund_name else "N/A"
+            result["Nome do Fundo"] = fund["name"]
 
-            # Step 3: Navigate to periodic data page
-            success, message = self.navigate_to_periodic_data()
+            # Step 2: Navigate straight to periodic data page
+            self._check_cancelled()
+            success, message = self.navigate_to_periodic_data(fund["code"])
+            if not success and cataloged:
+                return self._forget_cataloged(cnpj, window, message)
             if not success:
                 result["Status"] = message
                 return result
@@ -510,8 +612,16 @@ class ANBIMAScraper:
                 result["Status"] = "Rate limited"
                 return result
 
-            # Step 4: Extract periodic data
-            success, data, message = self.extract_periodic_data()
+            # Result card had no usable name — the periodic page header has it
+            if result["Nome do Fundo"] == "N/A":
+                fund_name = self.get_fund_name()
+                result["Nome do Fundo"] = fund_name if fund_name else "N/A"
+
+            # Step 3: Extract periodic data
+            self._check_cancelled()
+            success, data, message = self.extract_periodic_data(window)
+            if not success and cataloged and message == "No table found on page":
+                return self._forget_cataloged(cnpj, window, message)
             if not success:
                 result["Status"] = message
                 return result
@@ -526,8 +636,65 @@ class ANBIMAScraper:
             result["Status"] = f"Error: {str(e)}"
             return result
     
-    def close(self):
-        """Close the browser and clean up"""
+    def _forget_cataloged(self, cnpj: str, window: Optional[DateWindow], message: str) -> Dict:
+        """A cataloged fund's page has no data: drop the (possibly stale)
+        entry and run the pass again with a real search."""
+        self.logger.warning(f"{cnpj}: cataloged fund failed ({message}); searching")
+        self.catalog.forget(cnpj)
+        return self._scrape_once(cnpj, window)
+
+    def cancel(self, reason: str = "Cancelled", cnpj: Optional[str] = None):
+        """Ask the running scrape call to stop at its next checkpoint (thread-safe).
+
+        With `cnpj`, a cancel that arrives before that CNPJ's call has
+        started still stops it.
+        """
+        self.cancel_reason = reason
+        self._cancel_cnpj = cnpj
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _check_cancelled(self):
+        """Cooperative checkpoint: raise ScrapeCancelled once cancel() was called."""
+        if self._cancel_event.is_set():
+            raise ScrapeCancelled(self.cancel_reason)
+
+    def _begin_call(self, cnpj: str):
+        """Reset the cancel state for a new call, keeping a cancel aimed at `cnpj`."""
+        if self._cancel_cnpj != cnpj:
+            self._cancel_event.clear()
+            self.cancel_reason = None
+        self._cancel_cnpj = None
+
+    def abort_session(self, reason: str = ""):
+        """Kill this scraper's browser processes to unblock a hung WebDriver call."""
+        driver = self.driver
+        if driver is not None:
+            self.logger.warning(f"Aborting browser session: {reason}")
+            kill_driver_processes(driver, self.logger)
+
+    def _relaunch_driver(self):
+        """Replace a driver the watchdog may have killed with a fresh one."""
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        if not self.setup_driver():
+            self.logger.error("Could not relaunch WebDriver after a watchdog timeout")
+
+    def close(self, kill_orphans: bool = False):
+        """Close the browser and clean up
+
+        Args:
+            kill_orphans: Accepted for parity with StealthANBIMAScraper.close();
+                this scraper only ever quits its own driver.
+        """
+        if self.watchdog:
+            self.watchdog.close()
         if self.driver:
             try:
                 self.driver.quit()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Browser launch-profile benchmark.
+
+Launches N stealth scrapers per launch profile ("default", "lean"), measures
+the memory of each worker's Chrome process tree and, optionally, scrapes a
+sample of CNPJs with them. Use it to decide whether the lean profile buys
+more workers per container without hurting the scrape success rate.
+
+With --engines playwright the same N workers also run as browser contexts of
+one Playwright Chromium (playwright_engine.py); "CNPJ/h/GB" compares the
+engines' throughput per GB of browser memory.
+
+    python benchmark_browsers.py --workers 3
+    python benchmark_browsers.py --workers 3 --input input_cnpjs.xlsx --sample 6
+    python benchmark_browsers.py --workers 6 --engines selenium playwright --input input_cnpjs.xlsx
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from chrome_profile import LAUNCH_PROFILES
+from data_processor import DataProcessor
+from scrape_watchdog import driver_processes, process_tree
+from stealth_scraper import StealthANBIMAScraper
+
+
+def _process_mb(pid: int) -> float:
+    """PSS of one process in MB (shared pages split fairly), RSS as fallback."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def worker_memory_mb(scraper) -> Optional[float]:
+    """Memory of the chromedriver + Chrome process tree behind `scraper`."""
+    # Both roots: UC's Chrome is a child of this process, not of chromedriver,
+    # and the chromedriver itself is part of each worker's cost too.
+    pids = driver_processes(scraper.driver)
+    if not pids:
+        return None
+    return sum(_process_mb(pid) for pid in pids)
+
+
+def child_processes_mb() -> float:
+    """Memory of everything this process has spawned (Playwright driver + Chromium)."""
+    return sum(_process_mb(pid) for pid in process_tree(os.getpid())[1:])
+
+
+def scrape_sample(scrapers: List, cnpjs: List[str]) -> Dict:
+    """Scrape `cnpjs` spread over `scrapers` in parallel; success count and speed."""
+    share = [cnpjs[i::len(scrapers)] for i in range(len(scrapers))]
+
+    def run(args):
+        scraper, batch = args
+        ok = 0
+        for cnpj in batch:
+            if scraper.scrape_fund_data(cnpj).get("Status") == "Success":
+                ok += 1
+        return ok
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as pool:
+        successes = sum(pool.map(run, zip(scrapers, share)))
+    elapsed = time.time() - t0
+    return {"scraped": f"{successes}/{len(cnpjs)}", "s_per_cnpj": elapsed / len(cnpjs)}
+
+
+def benchmark_profile(launch_profile: str, workers: int, headless: bool,
+                      cnpjs: List[str]) -> Dict:
+    """Launch `workers` scrapers with one launch profile and measure them."""
+    logger = logging.getLogger(__name__)
+    scrapers = [
+        StealthANBIMAScraper(headless=headless, standby=False, launch_profile=launch_profile)
+        for _ in range(workers)
+    ]
+
+    def launch(scraper):
+        t0 = time.time()
+        try:
+            scraper.setup_driver()
+            return scraper.driver is not None, time.time() - t0
+        except Exception as e:
+            logger.warning(f"[{launch_profile}] launch failed: {e}")
+            return False, time.time() - t0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        launches = list(pool.map(launch, scrapers))
+    healthy = [s for s, (ok, _) in zip(scrapers, launches) if ok]
+
+    report = {
+        "profile": launch_profile,
+        "launched": f"{len(healthy)}/{workers}",
+        "launch_s": sum(t for _, t in launches) / max(len(launches), 1),
+    }
+    try:
+        # Let first-page renderers settle before sampling memory
+        for scraper in healthy:
+            scraper.driver.get("about:blank")
+        time.sleep(2)
+        sizes = [m for m in (worker_memory_mb(s) for s in healthy) if m]
+        report["mb_per_worker"] = sum(sizes) / len(sizes) if sizes else None
+
+        if cnpjs and healthy:
+            report.update(scrape_sample(healthy, cnpjs))
+            # Peak after real pages have been rendered
+            sizes = [m for m in (worker_memory_mb(s) for s in healthy) if m]
+            report["mb_per_worker_after"] = sum(sizes) / len(sizes) if sizes else None
+            report["total_mb"] = sum(sizes) if sizes else None
+    finally:
+        for scraper in scrapers:
+            try:
+                scraper.close(kill_orphans=False)
+            except Exception:
+                pass
+    return report
+
+
+def benchmark_playwright(workers: int, headless: bool, cnpjs: List[str]) -> Dict:
+    """Run `workers` browser contexts in one Playwright Chromium and measure them."""
+    from playwright_engine import PlaywrightANBIMAScraper, PlaywrightEngine
+
+    logger = logging.getLogger(__name__)
+    report = {"profile": "playwright", "launched": f"0/{workers}", "launch_s": None}
+    engine = PlaywrightEngine(headless=headless)
+    t0 = time.time()
+    if not engine.start():
+        logger.warning(f"[playwright] engine failed to start: {engine.last_init_error}")
+        return report
+    scrapers = [PlaywrightANBIMAScraper(engine=engine) for _ in range(workers)]
+    try:
+        healthy = [s for s in scrapers if s.setup_driver()]
+        report["launched"] = f"{len(healthy)}/{workers}"
+        report["launch_s"] = (time.time() - t0) / max(len(healthy), 1)
+        time.sleep(2)
+        report["mb_per_worker"] = child_processes_mb() / max(len(healthy), 1)
+        if cnpjs and healthy:
+            report.update(scrape_sample(healthy, cnpjs))
+            report["total_mb"] = child_processes_mb()
+            report["mb_per_worker_after"] = report["total_mb"] / len(healthy)
+    finally:
+        for scraper in scrapers:
+            scraper.close()
+        engine.close()
+    return report
+
+
+def _per_gb(report: Dict) -> Optional[float]:
+    """CNPJs per hour per GB of browser memory (None without a scraped sample)."""
+    if not report.get("s_per_cnpj") or not report.get("total_mb"):
+        return None
+    return (3600 / report["s_per_cnpj"]) / (report["total_mb"] / 1024)
+
+
+def _fmt(value, spec: str) -> str:
+    return "—" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chrome launch profiles")
+    parser.add_argument("--workers", type=int, default=2, help="Browsers per profile (default: 2)")
+    parser.add_argument("--profiles", nargs="+", choices=LAUNCH_PROFILES,
+                        default=list(LAUNCH_PROFILES), help="Launch profiles to compare")
+    parser.add_argument("--engines", nargs="+", choices=("selenium", "playwright"),
+                        default=["selenium"], help="Engines to compare (default: selenium)")
+    parser.add_argument("--input", default=None, help="Optional Excel file with CNPJs to scrape")
+    parser.add_argument("--sample", type=int, default=4, help="CNPJs to scrape per profile (default: 4)")
+    parser.add_argument("--no-headless", action="store_true", help="Run browsers visibly")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    cnpjs = []
+    if args.input:
+        cnpjs = DataProcessor().read_cnpj_list(args.input)[: args.sample]
+
+    reports = []
+    if "selenium" in args.engines:
+        for launch_profile in args.profiles:
+            print(f"Benchmarking '{launch_profile}' with {args.workers} worker(s)...")
+            reports.append(benchmark_profile(launch_profile, args.workers, not args.no_headless, cnpjs))
+            StealthANBIMAScraper.kill_orphan_processes()
+    if "playwright" in args.engines:
+        print(f"Benchmarking Playwright with {args.workers} context(s)...")
+        reports.append(benchmark_playwright(args.workers, not args.no_headless, cnpjs))
+
+    print()
+    print(f"{'profile':<12}{'launched':>10}{'launch s':>10}{'MB/worker':>11}"
+          f"{'MB after':>10}{'scraped':>9}{'s/CNPJ':>8}{'CNPJ/h/GB':>11}")
+    for r in reports:
+        print(f"{r['profile']:<12}{r['launched']:>10}{_fmt(r['launch_s'], '.1f'):>10}"
+              f"{_fmt(r.get('mb_per_worker'), '.0f'):>11}{_fmt(r.get('mb_per_worker_after'), '.0f'):>10}"
+              f"{r.get('scraped', '—'):>9}{_fmt(r.get('s_per_cnpj'), '.1f'):>8}"
+              f"{_fmt(_per_gb(r), '.0f'):>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Ephemeral Chrome profiles cloned from a pre-seeded template.
+
+Without --user-data-dir every launch builds a brand-new profile on disk and
+pays Chrome's first-run initialisation. ChromeProfileManager keeps one
+template profile (first-run sentinel, quiet preferences and, once a session
+has dismissed it, the cookie-consent state) and clones it into a tmpfs-backed
+directory (/dev/shm when the host has room) for every launch. Clones are
+deleted when the scraper closes.
+
+It also holds launch_profile_args(), the extra flags of the selectable
+browser launch profiles (config.CHROME_LAUNCH_PROFILE), and
+merge_feature_flags() to combine them with the default flags.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+import config
+
+CLONE_PREFIX = "cota-profile-"
+
+# Written into <template>/Default/Preferences. Keeps Chrome from spending the
+# first seconds of every session on welcome pages, translate and password UI.
+TEMPLATE_PREFERENCES = {
+    "browser": {"has_seen_welcome_page": True, "check_default_browser": False},
+    "credentials_enable_service": False,
+    "intl": {"accept_languages": "pt-BR,pt,en-US,en"},
+    "profile": {
+        "exit_type": "Normal",
+        "exited_cleanly": True,
+        "password_manager_enabled": False,
+        "default_content_setting_values": {"notifications": 2},
+    },
+    "translate": {"enabled": False},
+}
+
+# Profile entries copied back into the template after a session has dismissed
+# the cookie banner, so later clones start with the consent already given.
+SEED_ENTRIES = [
+    os.path.join("Default", "Cookies"),
+    os.path.join("Default", "Network", "Cookies"),
+    os.path.join("Default", "Local Storage"),
+]
+
+
+LAUNCH_PROFILES = ("default", "lean")
+
+# Flags from the default set that work against a small footprint.
+LEAN_DROPPED_ARGS = ("--memory-pressure-off",)
+
+
+def launch_profile_args(launch_profile: Optional[str] = None) -> List[str]:
+    """Extra Chrome flags for a launch profile ([] for "default").
+
+    "lean" caps renderer processes and the V8 heap and turns off background
+    networking / component updates — nothing a page can observe, so stealth
+    is unaffected.
+    """
+    launch_profile = launch_profile or getattr(config, "CHROME_LAUNCH_PROFILE", "default")
+    if launch_profile not in LAUNCH_PROFILES:
+        raise ValueError(
+            f"Unknown launch profile {launch_profile!r} (expected one of {LAUNCH_PROFILES})"
+        )
+    if launch_profile != "lean":
+        return []
+    return list(getattr(config, "LEAN_CHROME_OPTIONS", [])) + [
+        f"--renderer-process-limit={getattr(config, 'LEAN_RENDERER_PROCESS_LIMIT', 2)}",
+        f"--js-flags=--max-old-space-size={getattr(config, 'LEAN_V8_HEAP_MB', 384)}",
+    ]
+
+
+def merge_feature_flags(args: List[str]) -> List[str]:
+    """`args` with every --disable-features=... folded into one flag.
+
+    Chrome honours only the last occurrence, so the lean profile's feature
+    list would otherwise re-enable the features the default flags disable.
+    """
+    prefix = "--disable-features="
+    features = []
+    for arg in args:
+        if arg.startswith(prefix):
+            features.extend(f for f in arg[len(prefix):].split(",") if f and f not in features)
+    merged = [arg for arg in args if not arg.startswith(prefix)]
+    if features:
+        merged.append(prefix + ",".join(features))
+    return merged
+
+
+def _free_mb(path: str) -> Optional[float]:
+    """Free space on the filesystem holding `path`, in MB (None if unknown)."""
+    try:
+        st = os.statvfs(path)
+        return st.f_bavail * st.f_frsize / (1024 * 1024)
+    except (AttributeError, OSError):
+        return None  # statvfs is POSIX-only
+
+
+class ChromeProfileManager:
+    """Clones a pre-seeded template profile into tmpfs for each browser launch."""
+
+    def __init__(self, template_dir: Optional[str] = None):
+        """
+        Args:
+            template_dir: Where the template profile lives
+                (default: config.PROFILE_TEMPLATE_DIR)
+        """
+        self.template_dir = template_dir or getattr(
+            config,
+            "PROFILE_TEMPLATE_DIR",
+            os.path.join(".cota_state", "chrome_template"),
+        )
+        self.logger = logging.getLogger(__name__)
+        self.root = self._pick_root()
+        self._sweep_stale_clones()
+
+    # -- placement -----------------------------------------------------------
+    def _pick_root(self) -> str:
+        """/dev/shm when it exists, is writable and has room; else the temp dir."""
+        shm = "/dev/shm"
+        min_free = getattr(config, "PROFILE_TMPFS_MIN_FREE_MB", 128)
+        if os.path.isdir(shm) and os.access(shm, os.W_OK):
+            free = _free_mb(shm)
+            if free is not None and free >= min_free:
+                return shm
+            self.logger.info(
+                f"/dev/shm has {free or 0:.0f} MB free (< {min_free} MB) — "
+                f"cloning profiles into {tempfile.gettempdir()} instead"
+            )
+        return tempfile.gettempdir()
+
+    @staticmethod
+    def shm_allows_chrome() -> bool:
+        """True if /dev/shm is big enough for Chrome's shared memory.
+
+        Chrome's default IPC lives in /dev/shm; `--disable-dev-shm-usage` moves
+        it to /tmp files, which is only worth it when /dev/shm is tiny (the
+        64 MB Docker default).
+        """
+        free = _free_mb("/dev/shm") if os.path.isdir("/dev/shm") else None
+        return free is not None and free >= getattr(config, "CHROME_SHM_MIN_FREE_MB", 512)
+
+    def _sweep_stale_clones(self):
+        """Delete clones left behind by crashed runs."""
+        max_age = getattr(config, "PROFILE_STALE_AFTER", 6 * 3600)
+        try:
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.startswith(CLONE_PREFIX) and os.path.isdir(path):
+                    if time.time() - os.path.getmtime(path) > max_age:
+                        shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+    # -- template ------------------------------------------------------------
+    def ensure_template(self):
+        """Create the template profile on first use."""
+        default_dir = os.path.join(self.template_dir, "Default")
+        prefs_path = os.path.join(default_dir, "Preferences")
+        if os.path.exists(prefs_path):
+            return
+        os.makedirs(default_dir, exist_ok=True)
+        with open(prefs_path, "w", encoding="utf-8") as f:
+            json.dump(TEMPLATE_PREFERENCES, f)
+        # Presence of this file tells Chrome the first-run experience is done.
+        open(os.path.join(self.template_dir, "First Run"), "w").close()
+        self.logger.info(f"Created Chrome template profile at {self.template_dir}")
+
+    @property
+    def template_seeded(self) -> bool:
+        """True once a session's cookie-consent state has been copied in."""
+        return any(
+            os.path.exists(os.path.join(self.template_dir, entry))
+            for entry in SEED_ENTRIES
+        )
+
+    def seed_template_from(self, profile_dir: str):
+        """Copy cookies/localStorage from a closed clone into the template.
+
+        Must run after the browser using `profile_dir` has quit, so Chrome has
+        flushed its SQLite/LevelDB files.
+        """
+        copied = 0
+        for entry in SEED_ENTRIES:
+            src = os.path.join(profile_dir, entry)
+            dst = os.path.join(self.template_dir, entry)
+            try:
+                if os.path.isdir(src):
+                    shutil.copytree(src, dst, dirs_exist_ok=True)
+                    copied += 1
+                elif os.path.isfile(src):
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    copied += 1
+            except Exception as e:
+                self.logger.warning(f"Could not seed template with {entry}: {e}")
+        if copied:
+            self.logger.info("Seeded Chrome template profile with cookie-consent state")
+
+    # -- clones --------------------------------------------------------------
+    def clone(self) -> str:
+        """Copy the template into a fresh directory under the tmpfs root."""
+        self.ensure_template()
+        profile_dir = tempfile.mkdtemp(prefix=CLONE_PREFIX, dir=self.root)
+        shutil.copytree(self.template_dir, profile_dir, dirs_exist_ok=True)
+        return profile_dir
+
+    def remove(self, profile_dir: Optional[str]):
+        """Delete a clone (no-op for None / already gone)."""
+        if profile_dir and os.path.basename(profile_dir).startswith(CLONE_PREFIX):
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    def chrome_args(self, profile_dir: str) -> List[str]:
+        """Chrome flags pointing the browser (and its disk cache) at a clone."""
+        cache_mb = getattr(config, "PROFILE_DISK_CACHE_MB", 32)
+        return [
+            f"--user-data-dir={profile_dir}",
+            f"--disk-cache-dir={os.path.join(profile_dir, 'cache')}",
+            f"--disk-cache-size={cache_mb * 1024 * 1024}",
+        ]
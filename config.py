@@ -15,6 +15,7 @@ SLEEP_BETWEEN_REQUESTS = 5  # Increased to reduce rate limit triggers
 # Parallel processing configuration
 DEFAULT_WORKERS = 1  # Reduced to 1 to avoid rate limiting
 MAX_WORKERS = 4  # Maximum allowed
+MAX_CONCURRENT_LAUNCHES = 2  # Browsers started at the same time at startup (RAM/CPU spike cap)
 
 # Selenium selectors
 SELECTORS = {
@@ -66,6 +67,28 @@ CHROME_OPTIONS = [
 MAX_RETRIES = 2  # was 3 — cap wasted time on a doomed CNPJ
 RETRY_DELAY = 4  # seconds
 MAX_CNPJ_TIMEOUT = 90  # was 180 — a healthy CNPJ finishes in ~45–90s
+# One attempt + time budget per CNPJ shared by every retry layer (the
+# scrapers' own loops and the callers' loops), see retry_policy.py.
+# Stealth retries resume from the failed step, not from the search page.
+CNPJ_ATTEMPT_BUDGET = 4
+CNPJ_TIME_BUDGET = 300  # seconds of active scraping per CNPJ, across all attempts
+# Backoff after a rate limit: RATE_LIMIT_BACKOFF * 2^n, capped (retry_policy.py)
+RATE_LIMIT_BACKOFF = 60  # seconds
+RATE_LIMIT_BACKOFF_MAX = 240  # seconds
+# Hard wall-clock cap per scrape call, enforced by a watchdog thread
+# (scrape_watchdog.py): cancel at the deadline, kill the hung browser
+# session WATCHDOG_GRACE seconds later.
+WATCHDOG_ENABLED = True
+CNPJ_WALL_TIMEOUT = 150  # seconds per scrape_fund_data() call
+FIDC_WALL_TIMEOUT = 420  # seconds per scrape_fidc_data() call (all subclasses)
+WATCHDOG_GRACE = 10  # seconds
+
+# Hedged requests (main_parallel.py --hedge): an idle worker duplicates a CNPJ
+# running longer than HEDGE_PERCENTILE of the latencies seen so far.
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 5  # successful CNPJs needed before hedging starts
+HEDGE_MAX_FRACTION = 0.1  # at most this share of the run's CNPJs is hedged
+HEDGE_MAX_IN_FLIGHT = 1  # hedged attempts running at the same time
 
 # Stealth mode settings
 STEALTH_MODE = True  # Enabled by default for anti-spam compliance
@@ -78,6 +101,35 @@ STEALTH_MAX_DELAY = (
 STEALTH_MOUSE_MOVEMENTS = True  # Simulate mouse movements
 RECOMMEND_NON_HEADLESS = True  # Headless mode more likely to be detected
 
+# How the stealth scraper reaches the search results page:
+#   "direct" — load ANBIMA_BASE_URL?q=<cnpj> (skips typing + dropdown, ~3–6 s/fund)
+#   "typed"  — type the CNPJ key by key and click the dropdown (most human-like)
+#   "auto"   — direct, but typed for DIRECT_SEARCH_COOLDOWN seconds after a rate limit
+SEARCH_MODE = "auto"
+DIRECT_SEARCH_COOLDOWN = 600  # seconds
+
+# Readiness waits (stealth scraper) — replace the fixed post-navigation sleeps.
+# A page is ready when it has finished loading, the expected selector is in
+# the DOM and no resource finished in the last NETWORK_QUIET_MS.
+READY_TIMEOUT = 30  # seconds
+NETWORK_QUIET_MS = 500
+NETWORK_QUIET_MAX_WAIT = 3.0  # max seconds to wait for quiet once the selector is there
+# Deliberate pause after each ready page (min, max) seconds; (0, 0) disables.
+STEALTH_JITTER = (0.5, 1.5)
+
+# Periodic tables are read on every scroll step (row_harvest.py): only rows
+# not read before, de-duplicated by date. With HARVEST_PRUNE_ROWS the rows
+# already read are removed from the DOM, all but the last HARVEST_KEEP_ROWS
+# (the lazy loader keeps its scroll anchor). Off by default: the site's
+# framework may re-render a table whose rows were removed under it.
+HARVEST_PRUNE_ROWS = False
+HARVEST_KEEP_ROWS = 20
+
+# FIDC subclasses are loaded in up to FIDC_PARALLEL_TABS tabs of the same
+# browser at once (their pages load together) and then extracted one by one.
+# 1 visits them one after another in a single tab.
+FIDC_PARALLEL_TABS = 3
+
 # Parse.bot Configuration
 # SECURITY: API keys removed from code - set via environment variables
 import os
@@ -89,3 +141,106 @@ PARSE_BOT_SCRAPER_ID = os.getenv(
     "PARSE_BOT_SCRAPER_ID", ""
 )  # Set in Streamlit Cloud secrets
 USE_PARSE_BOT = False  # Disabled by default (not used in Streamlit app)
+
+# Local per-host state (driver launch stats, ...). Not committed; safe to delete.
+STATE_DIR = os.getenv("COTA_STATE_DIR", ".cota_state")
+
+# Driver launch strategy memory (see launch_stats.py)
+LAUNCH_STATS_FILE = os.path.join(STATE_DIR, "launch_stats.json")
+LAUNCH_DEMOTE_AFTER_FAILURES = 2  # consecutive failures before a strategy is tried last
+LAUNCH_REPROBE_INTERVAL = 6 * 3600  # seconds between background re-probes (0 = never)
+
+# Cookies + localStorage of a warmed-up session, imported into new drivers
+# (see session_state.py). Dropped after the TTL or as soon as the site rejects it.
+SESSION_STATE_ENABLED = True
+SESSION_STATE_FILE = os.path.join(STATE_DIR, "session_state.json")
+SESSION_STATE_TTL = 6 * 3600  # seconds
+
+# Local CNPJ -> fund code catalog (see fund_catalog.py), filled in bulk by
+# discover_funds.py. Scrapers use it instead of the search when it knows a CNPJ.
+FUND_CATALOG_ENABLED = True
+FUND_CATALOG_FILE = os.path.join(STATE_DIR, "fund_catalog.sqlite3")
+FUND_CATALOG_TTL = 30 * 86400  # seconds before an entry is ignored
+DISCOVERY_REQUESTS_PER_MINUTE = 20  # listing pages fetched per minute
+DISCOVERY_MAX_BLOCKS = 3  # consecutive blocked pages before the crawl stops
+
+# Ephemeral Chrome profiles (see chrome_profile.py)
+EPHEMERAL_PROFILES = True  # clone a pre-seeded template into tmpfs per launch
+PROFILE_TEMPLATE_DIR = os.path.join(STATE_DIR, "chrome_template")
+PROFILE_TMPFS_MIN_FREE_MB = 128  # /dev/shm free space needed to hold profile clones
+CHROME_SHM_MIN_FREE_MB = 512  # /dev/shm free space needed to drop --disable-dev-shm-usage
+PROFILE_DISK_CACHE_MB = 32  # per-clone HTTP cache cap (lives in tmpfs too)
+PROFILE_STALE_AFTER = 6 * 3600  # seconds before a leftover clone is swept
+
+# Hot-standby driver (see driver_standby.py): keep one spare browser warming so
+# recover_driver() can swap instantly. Doubles the browser count — off by
+# default on RAM-tight hosts.
+HOT_STANDBY = False
+
+# Playwright engine (playwright_engine.py, --engine playwright): one Chromium
+# per process, one browser context per worker. Optional dependency:
+#   pip install playwright && playwright install chromium
+PLAYWRIGHT_BLOCKED_RESOURCES = ("image", "media", "font")  # aborted via page routes
+PLAYWRIGHT_CHROME_ARGS = []
+PLAYWRIGHT_USER_AGENT = None  # None: Chromium's own UA
+
+# HTTP engine (http_engine.py, --engine http): the JSON endpoints behind the
+# SPA, called over one pooled keep-alive session. Paths are relative to
+# HTTP_API_BASE_URL; check them (and the field names) in the browser's network
+# tab when the site changes — a mismatch falls back to the stealth scraper.
+HTTP_API_BASE_URL = "https://data.anbima.com.br/web-bff/v1"
+HTTP_ENDPOINTS = {
+    "search": "/fundos?q={query}&page=0&size=20",
+    "fund": "/fundos/{code}",
+    "periodic": "/fundos/{code}/dados-periodicos?page={page}&size={size}",
+    "listing": "/fundos?page={page}&size={size}",  # whole fund listing (discover_funds.py)
+}
+HTTP_FIELDS = {
+    "results": "content",
+    "code": "codigo_fundo",
+    "name": "razao_social",
+    "rows": "content",
+    "last_page": "last",
+    "cnpj": "cnpj_fundo",  # listing items only
+    "class": "tipo_fundo",
+    "subclasses": "subclasses",  # list of {code, name} under a FIDC class
+}
+HTTP_FUND_FIELDS = {
+    "Data da cotização": "data_competencia",
+    "Valor cota": "valor_cota",
+}
+HTTP_FIDC_FIELDS = {
+    "Data competência": "data_competencia",
+    "Valor patrimônio líquido": "patrimonio_liquido",
+    "Valor cota": "valor_cota",
+    "Valor volume total de aplicação": "volume_total_aplicacao",
+    "Valor volume total de resgates": "volume_total_resgate",
+    "Número total de cotistas": "numero_cotistas",
+}
+HTTP_PAGE_SIZE = 100
+HTTP_MAX_PAGES = 50
+HTTP_POOL_SIZE = 8  # keep-alive connections (raised to the worker count)
+HTTP_TIMEOUT = 20  # seconds per request
+HTTP_FIDC_CONCURRENCY = 4  # subclass series fetched at the same time
+
+# Browser launch profile: "default" (flags tuned for stealth) or "lean" (flags
+# tuned for footprint on small containers). Measure with benchmark_browsers.py.
+CHROME_LAUNCH_PROFILE = os.getenv("COTA_LAUNCH_PROFILE", "default")
+# V8 old-space cap for "lean". 256 MB proved too tight for the ANBIMA SPA
+# (see CHANGELOG 2.0.0), so the cap sits above that.
+LEAN_V8_HEAP_MB = 384
+LEAN_RENDERER_PROCESS_LIMIT = 2
+LEAN_CHROME_OPTIONS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-breakpad",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--disable-features=MediaRouter,OptimizationHints,Translate",
+]
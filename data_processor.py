@@ -5,7 +5,8 @@ Handles Excel I/O and data transformation
 
 import pandas as pd
 import logging
-from typing import List, Dict
+import re
+from typing import List, Dict, Tuple
 from datetime import datetime
 import os
 
@@ -83,6 +84,61 @@ class DataProcessor:
             self.logger.error(f"Error reading CNPJ list: {str(e)}")
             raise
 
+    # Headers (lowercased) accepted for the optional per-CNPJ desired-subclass
+    # column of a FIDC input file.
+    DESIRED_SUBCLASS_COLUMNS = (
+        "subclasse desejada",
+        "subclasse",
+        "subclass",
+        "desired subclass",
+        "subclasse_desejada",
+    )
+
+    @staticmethod
+    def cnpj_key(cnpj) -> str:
+        """A CNPJ as a lookup key (whitespace removed)"""
+        return re.sub(r"\s+", "", str(cnpj))
+
+    def desired_subclasses(self, df: pd.DataFrame) -> Dict[str, str]:
+        """
+        Read the optional desired-subclass column of a FIDC input frame
+
+        Args:
+            df: Input frame with a CNPJ column
+
+        Returns:
+            Dict of cnpj_key(CNPJ) -> desired subclass label (code or class
+            name); empty when there is no such column
+        """
+        desired_col = next(
+            (c for c in df.columns if str(c).strip().lower() in self.DESIRED_SUBCLASS_COLUMNS),
+            None,
+        )
+        desired = {}
+        if desired_col is None or config.INPUT_COLUMN_CNPJ not in df.columns:
+            return desired
+        for _, row in df.iterrows():
+            val = str(row[desired_col]).strip()
+            if val and val.lower() != "nan":
+                desired[self.cnpj_key(row[config.INPUT_COLUMN_CNPJ])] = val
+        return desired
+
+    def read_fidc_input(self, input_file: str) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Read a FIDC input Excel file: the CNPJs and their desired subclasses
+
+        Args:
+            input_file: Path to input Excel file
+
+        Returns:
+            Tuple of (list of CNPJ strings, dict from desired_subclasses())
+        """
+        cnpjs = self.read_cnpj_list(input_file)
+        desired = self.desired_subclasses(pd.read_excel(input_file))
+        if desired:
+            self.logger.info(f"{len(desired)} CNPJ(s) with a desired-subclass filter")
+        return cnpjs, desired
+
     def process_scraped_data(self, results: List[Dict]) -> pd.DataFrame:
         """
         Process scraped data into pivot table format (dates as rows, CNPJs as columns)
@@ -243,6 +299,11 @@ class DataProcessor:
             self.logger.error(f"Error processing FIDC data: {str(e)}")
             raise
 
+    @staticmethod
+    def all_columns_file(output_file: str) -> str:
+        """Where an all-columns run puts its long output, next to the pivot one"""
+        return os.path.splitext(output_file)[0] + "_all_columns.xlsx"
+
     def save_results(self, df: pd.DataFrame, output_file: str):
         """
         Save results to Excel file
@@ -0,0 +1,133 @@
+"""
+Date window (since / until) for the periodic series.
+
+Most jobs only need the last few months, but the extractors used to scroll
+the whole history and read every row. A DateWindow is handed down to the
+extractors so they can stop scrolling once the loaded rows are older than
+`since` and skip out-of-window rows before reading their other cells.
+
+Bounds are inclusive and accept a date, "dd/mm/yyyy", "yyyy-mm-dd" or a
+relative "<n>d" / "<n>m" / "<n>y" (days, months, years before today):
+
+    DateWindow(since="6m")
+    DateWindow(since="01/01/2025", until="2025-06-30")
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+DateLike = Union[date, str, None]
+
+_RELATIVE = re.compile(r"^\s*(\d+)\s*([dmy])\s*$", re.IGNORECASE)
+# The site shows dates as dd/mm/yyyy; some periodic tables show mm/yyyy.
+_BR_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_BR_MONTH = re.compile(r"^\s*(\d{1,2})/(\d{4})\s*$")
+
+
+def parse_date(value: DateLike, today: Optional[date] = None) -> Optional[date]:
+    """A window bound as a date (None for None / blank; ValueError if unreadable)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    today = today or date.today()
+    match = _RELATIVE.match(text)
+    if match:
+        n, unit = int(match.group(1)), match.group(2).lower()
+        if unit == "d":
+            return today - timedelta(days=n)
+        months = n * (12 if unit == "y" else 1)
+        year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+        day = min(today.day, 28)  # every month has a 28th
+        return date(year, month + 1, day)
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unreadable date {value!r} (use dd/mm/yyyy, yyyy-mm-dd or e.g. 6m)")
+
+
+def row_date(text: str) -> Optional[date]:
+    """The date in a table cell ("31/01/2025", "01/2025"), None if there is none."""
+    match = _BR_DATE.search(text or "")
+    try:
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        match = _BR_MONTH.match(text or "")
+        if match:
+            return date(int(match.group(2)), int(match.group(1)), 1)
+    except ValueError:
+        pass
+    return None
+
+
+class DateWindow:
+    """Inclusive since / until bounds on row dates (either may be open)."""
+
+    def __init__(self, since: DateLike = None, until: DateLike = None):
+        """
+        Args:
+            since: Oldest date to keep (None = from the first row)
+            until: Newest date to keep (None = up to the latest row)
+        """
+        self.since = parse_date(since)
+        self.until = parse_date(until)
+        if self.since and self.until and self.since > self.until:
+            raise ValueError(f"since ({self.since}) is after until ({self.until})")
+
+    @classmethod
+    def of(cls, since: DateLike = None, until: DateLike = None) -> "DateWindow":
+        """A window from scrape_*_data() arguments (an existing DateWindow passes through)."""
+        if isinstance(since, DateWindow):
+            return since
+        return cls(since, until)
+
+    @property
+    def bounded(self) -> bool:
+        return self.since is not None or self.until is not None
+
+    def contains(self, text: str) -> bool:
+        """True if a row with this date cell belongs in the window.
+
+        Rows whose date can't be read are kept — the window never drops
+        data it can't place.
+        """
+        d = row_date(text)
+        if d is None:
+            return True
+        if self.since and d < self.since:
+            return False
+        return not (self.until and d > self.until)
+
+    def is_before(self, text: str) -> bool:
+        """True if the row is older than `since` (the scroll can stop there)."""
+        d = row_date(text)
+        return bool(self.since and d and d < self.since)
+
+    def passed(self, text: str, newer: Optional[date]) -> bool:
+        """True once a newest-first table has gone past `since`.
+
+        Args:
+            text: This row's date cell
+            newer: Date of the row read just before it (None for the first)
+        """
+        d = row_date(text)
+        return bool(self.since and d and d < self.since and newer and newer >= d)
+
+    def filter(self, records: List[Dict], date_label: str) -> List[Dict]:
+        """The records whose `date_label` falls in the window."""
+        if not self.bounded:
+            return records
+        return [r for r in records if self.contains(r.get(date_label, ""))]
+
+    def __str__(self) -> str:
+        since = self.since.strftime("%d/%m/%Y") if self.since else "…"
+        until = self.until.strftime("%d/%m/%Y") if self.until else "…"
+        return f"{since} – {until}"
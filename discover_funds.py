@@ -0,0 +1,169 @@
+"""
+Fund discovery crawl for ANBIMA - prebuilds the local CNPJ -> fund code catalog
+
+Pages through the site's whole fund listing over the HTTP engine's JSON
+endpoint, at DISCOVERY_REQUESTS_PER_MINUTE. It stores (CNPJ, fund code,
+name, class, subclasses) in the fund catalog (fund_catalog.py). The scrapers
+consult that catalog before searching, so the first run over thousands of
+CNPJs opens their periodic pages directly.
+
+    python discover_funds.py                  # crawl the whole listing
+    python discover_funds.py --resume         # continue an interrupted crawl
+    python discover_funds.py --stats          # catalog size, then exit
+"""
+
+import sys
+import time
+
+import requests
+
+import config
+from fund_catalog import FundCatalog
+from http_engine import AnbimaHttpClient, ContractError, EndpointBlocked
+from main_parallel import setup_logging
+
+
+def discover_funds(max_pages: int = None, page_size: int = None, rate: float = None,
+                   resume: bool = False, headless: bool = True, catalog_file: str = None) -> bool:
+    """
+    Crawl the fund listing into the fund catalog
+
+    Args:
+        max_pages: Stop after this many pages (default: the whole listing)
+        page_size: Items per listing page (default: config.HTTP_PAGE_SIZE)
+        rate: Listing pages per minute (default: config.DISCOVERY_REQUESTS_PER_MINUTE)
+        resume: Start at the page after the last one stored by an
+            interrupted crawl, instead of page 0
+        headless: Headless mode for the cookie bootstrap browser
+        catalog_file: Catalog database (default: config.FUND_CATALOG_FILE)
+
+    Returns:
+        True if the crawl reached the end of the listing (or max_pages)
+    """
+    logger, log_file = setup_logging("discover_funds", "ANBIMA Fund Discovery")
+    catalog = FundCatalog(catalog_file)
+    client = AnbimaHttpClient(pool_size=1)
+    rate = rate or getattr(config, "DISCOVERY_REQUESTS_PER_MINUTE", 20)
+    interval = 60.0 / max(rate, 0.1)
+    max_blocks = getattr(config, "DISCOVERY_MAX_BLOCKS", 3)
+
+    page = int(catalog.get_meta("crawl_next_page", 0)) if resume else 0
+    logger.info(f"Catalog: {catalog.path}")
+    logger.info(f"Starting at page {page}, {rate:g} page(s)/min")
+
+    # The listing sits behind the same session cookies as the search
+    if not client.bootstrap(headless=headless):
+        logger.warning("Cookie bootstrap failed — trying the listing without a browser session")
+
+    pages = entries = blocks = 0
+    finished = False
+    next_request = 0.0
+    try:
+        while max_pages is None or pages < max_pages:
+            time.sleep(max(0.0, next_request - time.time()))
+            next_request = time.time() + interval
+            try:
+                batch, last = client.listing(page, page_size)
+            except ContractError as e:
+                logger.error(f"Listing endpoint changed ({e}); check config.HTTP_ENDPOINTS / HTTP_FIELDS")
+                break
+            except (EndpointBlocked, requests.RequestException) as e:
+                blocks += 1
+                if blocks > max_blocks:
+                    logger.error(f"Page {page}: {e} — giving up after {blocks} tries")
+                    break
+                backoff = min(600, 30 * 2 ** (blocks - 1))
+                logger.warning(f"Page {page}: {e} — waiting {backoff}s")
+                next_request = time.time() + backoff
+                continue
+
+            blocks = 0
+            entries += catalog.upsert(batch)
+            pages += 1
+            page += 1
+            catalog.set_meta("crawl_next_page", 0 if last else page)
+            logger.info(f"Page {page - 1}: {len(batch)} entries ({entries} this run)")
+            if last:
+                catalog.set_meta("crawl_completed_at", time.time())
+                finished = True
+                break
+        else:
+            finished = True  # max_pages reached
+    except KeyboardInterrupt:
+        logger.warning("Interrupted by user")
+    finally:
+        client.close()
+
+    stats = catalog.stats()
+    print("\n" + "="*80)
+    print("FUND DISCOVERY SUMMARY")
+    print("="*80)
+    print(f"Pages crawled: {pages} ({entries} entries)")
+    print(f"Catalog: {stats['fresh_cnpjs']} CNPJs, {stats['fresh_entries']} codes ({catalog.path})")
+    if not finished:
+        print(f"⚠️  Crawl stopped at page {page} — rerun with --resume to continue")
+    print(f"✓ Log file saved to: {log_file}")
+    print("="*80 + "\n")
+    return finished
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ANBIMA fund discovery crawl (fills the fund catalog)")
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Stop after this many listing pages (default: the whole listing)"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=None,
+        help="Items per listing page (default: config.HTTP_PAGE_SIZE)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Listing pages per minute (default: config.DISCOVERY_REQUESTS_PER_MINUTE)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the page after the last one an interrupted crawl stored"
+    )
+    parser.add_argument(
+        "--no-headless",
+        action="store_true",
+        help="Show the browser used for the cookie bootstrap"
+    )
+    parser.add_argument(
+        "--catalog",
+        default=None,
+        help="Catalog database (default: config.FUND_CATALOG_FILE)"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the catalog size and exit"
+    )
+
+    args = parser.parse_args()
+    if args.stats:
+        catalog = FundCatalog(args.catalog)
+        stats = catalog.stats()
+        print(f"{catalog.path}: {stats['fresh_cnpjs']} CNPJs / {stats['fresh_entries']} codes fresh, "
+              f"{stats['cnpjs']} / {stats['entries']} in total")
+        sys.exit(0)
+
+    success = discover_funds(
+        max_pages=args.max_pages,
+        page_size=args.page_size,
+        rate=args.rate,
+        resume=args.resume,
+        headless=not args.no_headless,
+        catalog_file=args.catalog
+    )
+    sys.exit(0 if success else 1)
@@ -0,0 +1,106 @@
+"""
+Hot-standby WebDriver for near-instant recovery.
+
+recover_driver() used to quit the dead driver, sleep 5 s and run the whole
+launch chain again — 10–30 s per recovery. A DriverStandby keeps one spare
+driver warming in a background thread; on recovery the scraper swaps to it
+immediately and the standby starts warming a replacement.
+
+One standby can serve a single scraper or be shared by a pool of scrapers
+(e.g. the parallel workers in main_parallel.py): take() is thread-safe and
+whichever scraper recovers first gets the spare.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+
+class DriverStandby:
+    """Keeps one spare WebDriver launched and ready in a background thread."""
+
+    def __init__(
+        self,
+        launcher: Callable[[], Optional[Dict]],
+        discard: Callable[[Dict], None],
+        name: str = "standby",
+    ):
+        """
+        Args:
+            launcher: Launches a driver and returns its launch record
+                ({"driver", "mode", "key", "profile_dir"}) or None on failure.
+                Typically StealthANBIMAScraper.launch_for_standby.
+            discard: Tears down a launch record nobody adopted (quit driver,
+                delete its profile). Typically StealthANBIMAScraper.discard_launch.
+            name: Thread/log label
+        """
+        self.launcher = launcher
+        self.discard = discard
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._ready: Optional[Dict] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @classmethod
+    def for_scraper(cls, scraper, name: str = "standby") -> "DriverStandby":
+        """Standby that launches drivers the same way `scraper` does.
+
+        Pass the result as `standby=` to several scrapers to share one spare
+        across a pool.
+        """
+        return cls(scraper.launch_for_standby, scraper.discard_launch, name=name)
+
+    @property
+    def ready(self) -> bool:
+        """True if a spare driver is waiting to be taken."""
+        with self._lock:
+            return self._ready is not None
+
+    def warm(self):
+        """Start launching a spare in the background (no-op if one is ready or warming)."""
+        with self._lock:
+            if self._closed or self._ready is not None:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"driver-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        try:
+            launched = self.launcher()
+        except Exception as e:
+            self.logger.warning(f"[{self.name}] Standby launch raised: {e}")
+            launched = None
+        if launched is None:
+            self.logger.warning(f"[{self.name}] Standby driver could not be launched")
+            return
+        with self._lock:
+            if not self._closed and self._ready is None:
+                self._ready = launched
+                launched = None
+        if launched is not None:  # closed (or already stocked) meanwhile
+            self.discard(launched)
+            return
+        self.logger.info(f"[{self.name}] Standby driver ready")
+
+    def take(self) -> Optional[Dict]:
+        """Hand over the ready spare (None if not ready yet) and warm a new one."""
+        with self._lock:
+            launched, self._ready = self._ready, None
+        if launched is not None:
+            self.logger.info(f"[{self.name}] Handing over standby driver")
+        self.warm()
+        return launched
+
+    def close(self):
+        """Stop warming and tear down the spare, if any."""
+        with self._lock:
+            self._closed = True
+            launched, self._ready = self._ready, None
+        if launched is not None:
+            self.discard(launched)
@@ -0,0 +1,192 @@
+"""
+Local catalog of ANBIMA funds by CNPJ, so scrapers can skip the search.
+
+On a new set of CNPJs, each fund costs a full search interaction:
+load the results page, wait, then read the links. The catalog is a small
+sqlite3 database in STATE_DIR. It maps a CNPJ to the fund codes the search
+would list: the fund or class, and its FIDC subclasses. discover_funds.py
+fills it in bulk by paging through the site's fund listing. The scrapers
+consult it before searching:
+
+    catalog = FundCatalog.from_config()      # None when disabled
+    fund = catalog.fund(cnpj)                # {"code", "href", "name"} or None
+    subs = catalog.subclasses(cnpj)          # [{"name", "href", "code"}, ...]
+
+Entries older than FUND_CATALOG_TTL are ignored. A scraper that cannot open
+a cataloged fund's page calls forget(cnpj). That CNPJ's next attempt then
+searches for real.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS funds (
+    code TEXT PRIMARY KEY,      -- fund / class / subclass code (C..., S...)
+    cnpj TEXT NOT NULL,         -- cnpj_key() of the CNPJ it is listed under
+    name TEXT,
+    fund_class TEXT,
+    parent TEXT,                -- class code, for a subclass
+    position INTEGER,           -- order in the listing
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS funds_cnpj ON funds (cnpj);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def cnpj_key(cnpj) -> str:
+    """A CNPJ as a catalog key: letters and digits only, upper-case."""
+    return re.sub(r"[^0-9A-Za-z]", "", str(cnpj or "")).upper()
+
+
+class FundCatalog:
+    """sqlite3-backed CNPJ -> fund codes, with a TTL."""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            path: Database file (default: config.FUND_CATALOG_FILE)
+            ttl: Seconds an entry stays usable (default: config.FUND_CATALOG_TTL)
+        """
+        self.path = path or getattr(
+            config, "FUND_CATALOG_FILE", os.path.join(".cota_state", "fund_catalog.sqlite3")
+        )
+        self.ttl = ttl if ttl is not None else getattr(config, "FUND_CATALOG_TTL", 30 * 86400)
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls) -> Optional["FundCatalog"]:
+        """The configured catalog, or None when FUND_CATALOG_ENABLED is off."""
+        return cls() if getattr(config, "FUND_CATALOG_ENABLED", True) else None
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")  # workers read while discovery writes
+        conn.executescript(_SCHEMA)
+        return conn
+
+    # -- writing -----------------------------------------------------------
+    def upsert(self, entries: Iterable[Dict]) -> int:
+        """Add or refresh entries ({"cnpj", "code", "name", "fund_class", "parent", "position"}).
+
+        Returns the number of entries written (those without a CNPJ or code are skipped).
+        """
+        now = time.time()
+        rows = [
+            (str(e["code"]), cnpj_key(e["cnpj"]), e.get("name") or "N/A",
+             e.get("fund_class") or "N/A", e.get("parent"), e.get("position"), now)
+            for e in entries
+            if e.get("code") and cnpj_key(e.get("cnpj"))
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO funds "
+                    "(code, cnpj, name, fund_class, parent, position, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+        return len(rows)
+
+    def forget(self, cnpj: str):
+        """Drop a CNPJ's entries (its cataloged codes did not work)."""
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM funds WHERE cnpj = ?", (cnpj_key(cnpj),))
+        finally:
+            conn.close()
+        self.logger.info(f"Dropped catalog entries for {cnpj}")
+
+    def set_meta(self, key: str, value):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             (key, str(value)))
+        finally:
+            conn.close()
+
+    # -- reading -----------------------------------------------------------
+    def get_meta(self, key: str, default=None):
+        if not os.path.exists(self.path):
+            return default
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row["value"] if row else default
+
+    def entries(self, cnpj: str) -> List[Dict]:
+        """A CNPJ's fresh entries, in listing order ([] when unknown or expired)."""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM funds WHERE cnpj = ? AND updated_at >= ? "
+                    "ORDER BY position, code",
+                    (cnpj_key(cnpj), time.time() - self.ttl),
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not read fund catalog {self.path}: {e}")
+            return []
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def href(code: str) -> str:
+        """The fund page URL of a code, as the search results link it."""
+        return f"{config.ANBIMA_BASE_URL.split('/busca/')[0]}/fundos/{code}"
+
+    def fund(self, cnpj: str) -> Optional[Dict]:
+        """The fund the regular workflow would pick (first "C..." code), as resolve_fund() returns it."""
+        for entry in self.entries(cnpj):
+            if entry["code"].startswith("C"):
+                return {"code": entry["code"], "href": self.href(entry["code"]), "name": entry["name"]}
+        return None
+
+    def subclasses(self, cnpj: str) -> List[Dict]:
+        """The links the FIDC workflow would collect, as search_fidc_subclasses() returns them.
+
+        A CNPJ's subclasses when it has any, otherwise all of its entries.
+        """
+        entries = self.entries(cnpj)
+        chosen = [e for e in entries if e["parent"]] or entries
+        return [{"name": e["name"], "href": self.href(e["code"]), "code": e["code"]} for e in chosen]
+
+    def stats(self) -> Dict:
+        """Entry and CNPJ counts (fresh ones, and all)."""
+        if not os.path.exists(self.path):
+            return {"entries": 0, "cnpjs": 0, "fresh_entries": 0, "fresh_cnpjs": 0}
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COUNT(*), COUNT(DISTINCT cnpj) FROM funds").fetchone()
+            fresh = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT cnpj) FROM funds WHERE updated_at >= ?",
+                (time.time() - self.ttl,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"entries": total[0], "cnpjs": total[1], "fresh_entries": fresh[0], "fresh_cnpjs": fresh[1]}
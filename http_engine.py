@@ -0,0 +1,673 @@
+"""
+HTTP-only engine: ANBIMA's JSON endpoints over a pooled keep-alive session.
+
+The data.anbima.com.br SPA renders search results, fund headers and the
+periodic series from JSON endpoints. Rendering them in Chrome costs a full
+page load per data point; AnbimaHttpClient calls the endpoints directly
+through one requests.Session (HTTP_POOL_SIZE keep-alive connections, shared
+by every worker thread). A browser is used once, to bootstrap the session's
+cookies and user agent (bootstrap()) — or not at all while the stealth
+scrapers' saved session state (session_state.py) is fresh.
+
+Endpoint paths and the JSON field names are configuration (HTTP_ENDPOINTS,
+HTTP_FIELDS, HTTP_FUND_FIELDS, HTTP_FIDC_FIELDS): check them against the
+browser's network tab when the site changes. When a response no longer
+matches them (ContractError) or the endpoints start refusing us
+(EndpointBlocked), HttpANBIMAScraper hands the CNPJ to a
+StealthANBIMAScraper and returns its result — a contract error switches the
+whole client to the browser for the rest of the run.
+
+    client = AnbimaHttpClient()
+    client.bootstrap(headless=True)
+    scraper = HttpANBIMAScraper(client=client)
+    result = scraper.scrape_fund_data("12.345.678/0001-90")
+"""
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from date_window import DateWindow
+from fund_catalog import FundCatalog
+from page_scripts import RATE_LIMIT_STATUSES
+from retry_policy import OTHER, RetryPolicy, classify
+from session_state import SessionStateStore
+
+DEFAULT_ENDPOINTS = {
+    "search": "/fundos?q={query}&page=0&size=20",
+    "fund": "/fundos/{code}",
+    "periodic": "/fundos/{code}/dados-periodicos?page={page}&size={size}",
+    "listing": "/fundos?page={page}&size={size}",
+}
+DEFAULT_FIELDS = {
+    "results": "content",  # list of funds in a search / listing response
+    "code": "codigo_fundo",
+    "name": "razao_social",
+    "rows": "content",  # list of periodic rows in a periodic response
+    "last_page": "last",  # true on the last page of a paged response
+    "cnpj": "cnpj_fundo",  # CNPJ of a listing item
+    "class": "tipo_fundo",  # fund class of a listing item (optional)
+    "subclasses": "subclasses",  # subclasses of a listing item (optional)
+}
+DEFAULT_FUND_FIELDS = {
+    "Data da cotização": "data_competencia",
+    "Valor cota": "valor_cota",
+}
+DEFAULT_FIDC_FIELDS = {
+    "Data competência": "data_competencia",
+    "Valor patrimônio líquido": "patrimonio_liquido",
+    "Valor cota": "valor_cota",
+    "Valor volume total de aplicação": "volume_total_aplicacao",
+    "Valor volume total de resgates": "volume_total_resgate",
+    "Número total de cotistas": "numero_cotistas",
+}
+
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+
+class ContractError(Exception):
+    """An endpoint's response no longer matches the configured contract."""
+
+
+class EndpointBlocked(Exception):
+    """The endpoints refuse the session (rate limit, expired cookies...)."""
+
+
+class FundMissing(Exception):
+    """A per-code endpoint answered 404: that fund code is gone, not the contract."""
+
+
+def field(obj: Dict, path: str):
+    """Value at a dotted `path` of a JSON object (ContractError if missing)."""
+    value = obj
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            raise ContractError(f"missing field {path!r}")
+        value = value[key]
+    return value
+
+
+def format_value(value) -> str:
+    """A JSON value as the site displays it: dd/mm/yyyy dates, pt-BR numbers."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}".replace(",", ".")
+    if isinstance(value, float):
+        decimals = len(repr(value).split(".")[1]) if "." in repr(value) else 0
+        text = f"{value:,.{max(decimals, 2)}f}"
+        return text.replace(",", "_").replace(".", ",").replace("_", ".")
+    text = str(value).strip()
+    match = _ISO_DATE.match(text)
+    if match:
+        return f"{match.group(3)}/{match.group(2)}/{match.group(1)}"
+    return text
+
+
+def _date_key(text: str):
+    try:
+        return datetime.strptime(text, "%d/%m/%Y")
+    except ValueError:
+        return datetime.min
+
+
+class AnbimaHttpClient:
+    """Pooled keep-alive session against ANBIMA's data endpoints (thread-safe)."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            base_url: Root the endpoint paths are relative to
+                (default: config.HTTP_API_BASE_URL)
+            pool_size: Keep-alive connections kept open (default:
+                config.HTTP_POOL_SIZE; use at least the number of workers)
+            timeout: Seconds per request (default: config.HTTP_TIMEOUT)
+        """
+        self.base_url = (base_url or getattr(
+            config, "HTTP_API_BASE_URL", "https://data.anbima.com.br/web-bff/v1"
+        )).rstrip("/")
+        self.endpoints = dict(DEFAULT_ENDPOINTS, **getattr(config, "HTTP_ENDPOINTS", {}))
+        self.fields = dict(DEFAULT_FIELDS, **getattr(config, "HTTP_FIELDS", {}))
+        self.fund_fields = getattr(config, "HTTP_FUND_FIELDS", DEFAULT_FUND_FIELDS)
+        self.fidc_fields = getattr(config, "HTTP_FIDC_FIELDS", DEFAULT_FIDC_FIELDS)
+        self.timeout = timeout or getattr(config, "HTTP_TIMEOUT", 20)
+        self.logger = logging.getLogger(__name__)
+        self.bootstrapped = False
+        self.bootstrap_attempted = False
+        self.session_store = (
+            SessionStateStore() if getattr(config, "SESSION_STATE_ENABLED", True) else None
+        )
+        self._from_store = False  # cookies came from the saved session state
+        # Set by the first ContractError: every scraper sharing this client
+        # goes straight to the browser until the endpoints are fixed.
+        self.contract_broken: Optional[str] = None
+
+        pool_size = pool_size or getattr(config, "HTTP_POOL_SIZE", 8)
+        self.session = requests.Session()
+        # pool_size is per host; the number of host pools stays at requests' default
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+            "Referer": config.ANBIMA_BASE_URL,
+        })
+        self._lock = threading.Lock()
+        self._bootstrap_lock = threading.Lock()
+
+    # -- bootstrap -----------------------------------------------------------
+    def _apply_cookies(self, cookies: List[Dict], user_agent: Optional[str]):
+        with self._lock:
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/"),
+                )
+            if user_agent:
+                self.session.headers["User-Agent"] = user_agent
+            self.bootstrapped = True
+
+    def bootstrap_from_driver(self, driver) -> int:
+        """Copy a live browser's cookies and user agent into the session.
+
+        Returns the number of cookies copied.
+        """
+        cookies = driver.get_cookies()
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+        except Exception:
+            user_agent = None  # keep requests' own UA
+        self._apply_cookies(cookies, user_agent)
+        self._from_store = False
+        self.logger.info(f"HTTP session bootstrapped with {len(cookies)} cookie(s)")
+        return len(cookies)
+
+    def bootstrap_from_store(self) -> bool:
+        """Use the saved session state's cookies, if there is a fresh one."""
+        state = self.session_store.load() if self.session_store else None
+        if state is None:
+            return False
+        self._apply_cookies(state["cookies"], state.get("user_agent"))
+        self._from_store = True
+        self.logger.info(f"HTTP session bootstrapped from saved state ({len(state['cookies'])} cookie(s))")
+        return True
+
+    def bootstrap(self, headless: bool = True, proxy: Optional[str] = None) -> bool:
+        """Open the search page once in a stealth browser and take its cookies.
+
+        Workers sharing the client call this concurrently at startup; only
+        the first launches a browser, the others wait for its outcome.
+        """
+        from stealth_scraper import StealthANBIMAScraper
+
+        with self._bootstrap_lock:
+            if self.bootstrap_attempted:
+                return self.bootstrapped
+            self.bootstrap_attempted = True
+            if self.bootstrap_from_store():
+                return True
+            scraper = StealthANBIMAScraper(headless=headless, proxy=proxy, standby=False)
+            return self._bootstrap_with(scraper)
+
+    def _bootstrap_with(self, scraper) -> bool:
+        try:
+            if not scraper.setup_driver():
+                self.logger.error(f"HTTP bootstrap: browser failed to start: {scraper.last_init_error}")
+                return False
+            scraper._navigate(config.ANBIMA_BASE_URL)
+            scraper.wait_until_ready()
+            self.bootstrap_from_driver(scraper.driver)
+            return True
+        except Exception as e:
+            self.logger.error(f"HTTP bootstrap failed: {e}")
+            return False
+        finally:
+            scraper.close(kill_orphans=False)
+
+    # -- requests ------------------------------------------------------------
+    def get_json(self, endpoint: str, **params):
+        """
+        GET one configured endpoint and decode its JSON
+
+        Raises:
+            EndpointBlocked: 401 or a rate-limit status
+            FundMissing: 404 from an endpoint of one fund code ("{code}" in its path)
+            ContractError: 404 from any other endpoint, or a non-JSON body
+                (the endpoint has moved)
+            requests.RequestException: network errors and other HTTP errors
+        """
+        path = self.endpoints[endpoint].format(**params)
+        response = self.session.get(self.base_url + path, timeout=self.timeout)
+        if response.status_code == 401 or response.status_code in RATE_LIMIT_STATUSES:
+            if response.status_code == 401 and self._from_store:
+                self.session_store.invalidate("HTTP 401 with the saved cookies")
+                self._from_store = False
+            raise EndpointBlocked(f"HTTP {response.status_code} from {endpoint}")
+        if response.status_code == 404:
+            if "{code}" in self.endpoints[endpoint]:
+                raise FundMissing(f"HTTP 404 from {endpoint} ({path})")
+            raise ContractError(f"HTTP 404 from {endpoint} ({path})")
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            raise ContractError(f"{endpoint} did not return JSON")
+
+    def search(self, cnpj: str) -> List[Dict]:
+        """Funds/subclasses listed for a CNPJ, as {"code", "name"} dicts."""
+        payload = self.get_json("search", query=quote(cnpj))
+        items = field(payload, self.fields["results"])
+        if not isinstance(items, list):
+            raise ContractError(f"{self.fields['results']!r} is not a list")
+        funds = []
+        for item in items:
+            name = item.get(self.fields["name"]) if isinstance(item, dict) else None
+            funds.append({"code": str(field(item, self.fields["code"])), "name": str(name or "N/A")})
+        return funds
+
+    def listing(self, page: int, size: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """
+        One page of the whole fund listing, as FundCatalog entries
+
+        Args:
+            page: Page number (0 first)
+            size: Items per page (default: config.HTTP_PAGE_SIZE)
+
+        Returns:
+            Tuple of (entries, last_page: bool). An item gives one entry, plus
+            one per subclass it lists (with "parent" set to its code).
+        """
+        size = size or getattr(config, "HTTP_PAGE_SIZE", 100)
+        payload = self.get_json("listing", page=page, size=size)
+        items = field(payload, self.fields["results"])
+        if not isinstance(items, list):
+            raise ContractError(f"{self.fields['results']!r} is not a list")
+
+        def optional(obj, key):
+            try:
+                return field(obj, self.fields[key])
+            except ContractError:
+                return None
+
+        entries = []
+        for item in items:
+            cnpj = optional(item, "cnpj")
+            code = str(field(item, self.fields["code"]))
+            fund_class = optional(item, "class")
+            entries.append({
+                "cnpj": cnpj, "code": code, "name": str(optional(item, "name") or "N/A")[:200],
+                "fund_class": fund_class, "parent": None, "position": page * size + len(entries),
+            })
+            for sub in optional(item, "subclasses") or []:
+                if isinstance(sub, dict) and optional(sub, "code"):
+                    entries.append({
+                        "cnpj": cnpj, "code": str(field(sub, self.fields["code"])),
+                        "name": str(optional(sub, "name") or "N/A")[:200],
+                        "fund_class": fund_class, "parent": code,
+                        "position": page * size + len(entries),
+                    })
+        if items and not any(e["cnpj"] for e in entries):
+            raise ContractError(f"listing items have no {self.fields['cnpj']!r}")
+        last = payload.get(self.fields["last_page"], True) if isinstance(payload, dict) else True
+        return entries, bool(last) or not items
+
+    def periodic(self, code: str, columns: Dict[str, str], max_pages: Optional[int] = None,
+                 cancelled=None, window: Optional[DateWindow] = None) -> List[Dict]:
+        """
+        A fund's periodic series, page by page
+
+        Args:
+            code: Fund / subclass code from search()
+            columns: Output label -> JSON field (HTTP_FUND_FIELDS / HTTP_FIDC_FIELDS);
+                the first one is the date and must be present in every row
+            max_pages: Page limit (default: config.HTTP_MAX_PAGES)
+            cancelled: Optional callable, checked between pages
+            window: Optional since / until bounds. Paging stops at a page
+                entirely older than `since` once in-window rows were seen.
+
+        Returns:
+            {label: text} records, unique per date, oldest first
+        """
+        size = getattr(config, "HTTP_PAGE_SIZE", 100)
+        max_pages = max_pages or getattr(config, "HTTP_MAX_PAGES", 50)
+        date_label = next(iter(columns))
+        records, seen_dates = [], set()
+        in_window_seen = False
+        for page in range(max_pages):
+            if cancelled is not None and cancelled():
+                break
+            payload = self.get_json("periodic", code=quote(code), page=page, size=size)
+            rows = field(payload, self.fields["rows"])
+            if not isinstance(rows, list):
+                raise ContractError(f"{self.fields['rows']!r} is not a list")
+            page_before = bool(rows)  # every row of this page older than since
+            for row in rows:
+                record = {date_label: format_value(field(row, columns[date_label]))}
+                if window is not None and not window.contains(record[date_label]):
+                    page_before = page_before and window.is_before(record[date_label])
+                    continue
+                page_before = False
+                in_window_seen = True
+                for label, path in columns.items():
+                    if label != date_label:
+                        try:
+                            record[label] = format_value(field(row, path))
+                        except ContractError:
+                            record[label] = ""
+                if record[date_label] and record[date_label] not in seen_dates:
+                    seen_dates.add(record[date_label])
+                    records.append(record)
+            last = payload.get(self.fields["last_page"], True) if isinstance(payload, dict) else True
+            if last or not rows:
+                break
+            if window is not None and in_window_seen and page_before:
+                break  # newest-first series: the rest is older still
+        records.sort(key=lambda r: _date_key(r[date_label]))
+        return records
+
+    def close(self):
+        self.session.close()
+
+
+class HttpANBIMAScraper:
+    """scrape_fund_data / scrape_fidc_data over AnbimaHttpClient, browser as fallback"""
+
+    def __init__(
+        self,
+        client: Optional[AnbimaHttpClient] = None,
+        headless: bool = True,
+        proxy: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        fallback=None,
+    ):
+        """
+        Args:
+            client: Shared AnbimaHttpClient (one session pool for every
+                worker); a private one is created if omitted
+            headless: Headless mode for the bootstrap / fallback browser
+            proxy: Optional upstream proxy for the bootstrap / fallback browser
+            retry_policy: Shared RetryPolicy (per-CNPJ budgets, failure
+                categories); a private one is created if omitted
+            fallback: Scraper used when the HTTP path fails (default: a
+                StealthANBIMAScraper, launched on first use)
+        """
+        self.client = client or AnbimaHttpClient()
+        self._owns_client = client is None
+        self.headless = headless
+        self.proxy = proxy
+        self.logger = logging.getLogger(__name__)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.catalog = FundCatalog.from_config()  # known CNPJs skip the search request
+        self.fallback = fallback
+        self.driver_mode = "HTTP (pooled JSON endpoints)"
+        self.last_init_error: Optional[str] = None
+        self.last_init_traceback: Optional[str] = None
+        self._driver_permanently_dead = False  # parity with the stealth scraper
+        self.cancel_reason: Optional[str] = None
+        self._cancel_event = threading.Event()
+        self._cancel_cnpj: Optional[str] = None  # CNPJ a pending cancel() is aimed at
+        self.fallback_count = 0
+
+    # -- lifecycle -----------------------------------------------------------
+    @property
+    def driver(self):
+        """The fallback browser's driver, if one is running."""
+        return getattr(self.fallback, "driver", None)
+
+    def setup_driver(self) -> bool:
+        """Bootstrap the shared session's cookies (once per client)."""
+        if not self.client.bootstrap(self.headless, self.proxy):
+            # Not fatal: the endpoints may answer without cookies, and a
+            # refusal falls back to the browser anyway.
+            self.logger.warning("Continuing without bootstrapped cookies")
+        return True
+
+    def is_driver_alive(self) -> bool:
+        return True
+
+    def cancel(self, reason: str = "Cancelled", cnpj: Optional[str] = None):
+        """Stop the running scrape between requests (thread-safe).
+
+        With `cnpj`, a cancel that arrives before that CNPJ's call has
+        started still stops it.
+        """
+        self.cancel_reason = reason
+        self._cancel_cnpj = cnpj
+        self._cancel_event.set()
+        if self.fallback is not None and hasattr(self.fallback, "cancel"):
+            self.fallback.cancel(reason, cnpj)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def close(self, kill_orphans: bool = False):
+        """Close the fallback browser (and the session, if it is private)"""
+        if self.fallback is not None:
+            try:
+                self.fallback.close(kill_orphans=kill_orphans)
+            except Exception as e:
+                self.logger.warning(f"Could not close the fallback scraper: {e}")
+        if self._owns_client:
+            self.client.close()
+
+    def _fallback_scraper(self):
+        if self.fallback is None:
+            from stealth_scraper import StealthANBIMAScraper
+
+            self.fallback = StealthANBIMAScraper(
+                headless=self.headless, proxy=self.proxy, standby=False,
+                retry_policy=self.retry_policy,
+            )
+        return self.fallback
+
+    # -- scraping ------------------------------------------------------------
+    def scrape_fund_data(self, cnpj: str, since=None, until=None) -> Dict:
+        """Complete scraping workflow for one CNPJ (same result as the browser scrapers)."""
+        empty = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": []}
+        return self._scrape(cnpj, empty, self._fetch_fund, "scrape_fund_data",
+                            DateWindow.of(since, until))
+
+    def scrape_combined_data(self, cnpj: str, since=None, until=None) -> Dict:
+        """scrape_fund_data() reading every field, with the FIDC-shaped "subclasses" too."""
+        empty = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": [], "subclasses": []}
+        return self._scrape(cnpj, empty, partial(self._fetch_fund, all_columns=True),
+                            "scrape_combined_data", DateWindow.of(since, until))
+
+    def scrape_fidc_data(self, cnpj: str, since=None, until=None,
+                         desired: Optional[str] = None) -> Dict:
+        """Complete FIDC workflow for one CNPJ (every subclass, or those matching `desired`)."""
+        empty = {"CNPJ": cnpj, "subclasses": []}
+        extra = {"desired": desired} if desired else {}
+        return self._scrape(cnpj, empty, self._fetch_fidc, "scrape_fidc_data",
+                            DateWindow.of(since, until), **extra)
+
+    def _scrape(self, cnpj: str, empty: Dict, fetch, fallback_method: str,
+                window: DateWindow, **extra) -> Dict:
+        """Run `fetch` over HTTP; on a contract error or a block, use the browser.
+
+        `extra` keyword arguments go to both `fetch` and the fallback method.
+        """
+        if self.client.contract_broken:
+            return self._fall_back(cnpj, fallback_method, self.client.contract_broken,
+                                   window=window, **extra)
+
+        budget = self.retry_policy.budget(cnpj)
+        if not budget.begin_attempt("http"):
+            result, category = dict(empty, Status="Retry budget exhausted"), OTHER
+            self.retry_policy.annotate(result, budget, category)
+            self.retry_policy.release(cnpj)
+            return result
+
+        if self._cancel_cnpj != cnpj:  # a cancel aimed at this CNPJ still applies
+            self._cancel_event.clear()
+            self.cancel_reason = None
+        self._cancel_cnpj = None
+        started = time.time()
+        try:
+            result = fetch(cnpj, dict(empty, Status="Unknown error"), window, **extra)
+        except ContractError as e:
+            self.client.contract_broken = str(e)
+            self.logger.error(f"HTTP contract changed ({e}); switching to the browser scraper")
+            return self._fall_back(cnpj, fallback_method, str(e), budget, window, **extra)
+        except (EndpointBlocked, FundMissing) as e:
+            # One CNPJ's problem: the browser tries it, the client stays on
+            return self._fall_back(cnpj, fallback_method, str(e), budget, window, **extra)
+        except requests.Timeout as e:
+            result = dict(empty, Status=f"Timeout: HTTP request timed out ({e})")
+        except requests.RequestException as e:
+            result = dict(empty, Status=f"HTTP error: {e}")
+
+        if self.cancelled and result["Status"] != "Success":
+            result["Status"] = self.cancel_reason
+        elapsed = time.time() - started
+        category = classify(result["Status"])
+        budget.end_attempt("http", category, result["Status"])
+        self.retry_policy.annotate(result, budget, category)
+        if category not in self.retry_policy.RETRYABLE or budget.exhausted:
+            self.retry_policy.release(cnpj)
+        result["timing"] = {"total": elapsed, "loading": elapsed, "waiting": 0.0, "other": 0.0}
+        return result
+
+    def _fall_back(self, cnpj: str, method: str, reason: str, budget=None,
+                   window: Optional[DateWindow] = None, **extra) -> Dict:
+        """Scrape `cnpj` with the browser scraper, then refresh the session's cookies.
+
+        `budget` is the CNPJ's budget when an HTTP attempt is open; it is
+        closed here, and the browser scraper draws its own attempt.
+        """
+        if budget is not None:
+            budget.end_attempt("http", classify(reason), f"falling back to the browser: {reason}")
+        self.logger.warning(f"{cnpj}: HTTP path unavailable ({reason}) — using the browser scraper")
+        self.fallback_count += 1
+        scraper = self._fallback_scraper()
+        if window is not None and window.bounded:
+            extra["since"] = window
+        result = getattr(scraper, method)(cnpj, **extra)
+        driver = getattr(scraper, "driver", None)
+        if driver is not None and result.get("Status") == "Success":
+            try:
+                self.client.bootstrap_from_driver(driver)  # fresh cookies for the next CNPJ
+            except Exception as e:
+                self.logger.debug(f"Could not refresh HTTP cookies: {e}")
+        return result
+
+    def _search(self, cnpj: str, fidc: bool = False) -> List[Dict]:
+        """client.search(), answered by the fund catalog when it knows the CNPJ."""
+        if self.catalog is not None:
+            if fidc:
+                known = self.catalog.subclasses(cnpj)
+            else:
+                fund = self.catalog.fund(cnpj)
+                known = [fund] if fund else []
+            if known:
+                self.logger.info(f"{cnpj}: {len(known)} code(s) from the fund catalog")
+                return [dict(entry, cataloged=True) for entry in known]
+        return self.client.search(cnpj)
+
+    def _forget_stale(self, cnpj: str, codes: List[Dict]) -> bool:
+        """After a FundMissing / contract error on cataloged codes: drop them
+        so the next call searches. True if they were cataloged (search again)."""
+        if not codes or not codes[0].get("cataloged"):
+            return False
+        self.logger.warning(f"{cnpj}: cataloged code(s) failed over HTTP; searching instead")
+        self.catalog.forget(cnpj)
+        return True
+
+    def _fetch_fund(self, cnpj: str, result: Dict, window: DateWindow,
+                    all_columns: bool = False) -> Dict:
+        funds = self._search(cnpj)
+        if not funds:
+            result["Status"] = "No fund found for this CNPJ"
+            return result
+        fund = funds[0]
+        name = fund["name"]
+        if name in ("", "N/A"):
+            try:
+                name = str(field(self.client.get_json("fund", code=quote(fund["code"])),
+                                 self.client.fields["name"]))
+            except (ContractError, FundMissing):
+                name = "N/A"  # the header is optional; the series is what counts
+        result["Nome do Fundo"] = name[:200]
+
+        fields = self.client.fidc_fields if all_columns else self.client.fund_fields
+        try:
+            data = self.client.periodic(fund["code"], fields,
+                                        cancelled=lambda: self.cancelled, window=window)
+        except (ContractError, FundMissing):
+            if self._forget_stale(cnpj, funds):
+                return self._fetch_fund(cnpj, result, window, all_columns)
+            raise
+        if not data and window.bounded:
+            result["Status"] = "Success"  # the fund has a series, none of it in the window
+            return result
+        if not data:
+            result["Status"] = "No data extracted from table"
+            return result
+        if all_columns:
+            from stealth_scraper import combined_views
+
+            result["periodic_data"], result["subclasses"] = combined_views(
+                result["Nome do Fundo"], fund["code"], data
+            )
+        else:
+            result["periodic_data"] = data
+        result["Status"] = "Success"
+        self.logger.info(f"{cnpj}: {len(data)} periodic record(s) over HTTP")
+        return result
+
+    def _fetch_fidc(self, cnpj: str, result: Dict, window: DateWindow,
+                    desired: Optional[str] = None) -> Dict:
+        from stealth_scraper import filter_subclass_links
+
+        subclasses = self._search(cnpj, fidc=True)
+        if not subclasses:
+            result["Status"] = "No subclasses found for this CNPJ"
+            return result
+        self.logger.info(f"[FIDC] Found {len(subclasses)} subclass(es) for {cnpj}")
+        if desired:
+            subclasses, matched = filter_subclass_links(desired, subclasses)
+            result["subclass_filter"] = "matched" if matched else "no match"
+
+        def series(sub: Dict) -> Tuple[Dict, List[Dict]]:
+            return sub, self.client.periodic(sub["code"], self.client.fidc_fields,
+                                             cancelled=lambda: self.cancelled, window=window)
+
+        # Subclass series are independent: fetch them concurrently over the pool
+        workers = max(1, min(len(subclasses), getattr(config, "HTTP_FIDC_CONCURRENCY", 4)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(series, subclasses))
+        except (ContractError, FundMissing):
+            if self._forget_stale(cnpj, subclasses):
+                result.pop("subclass_filter", None)
+                return self._fetch_fidc(cnpj, result, window, desired)
+            raise
+        for sub, rows in fetched:
+            if not rows:
+                self.logger.warning(f"[FIDC] No data for subclass {sub['code']}")
+            result["subclasses"].append({
+                "subclasse_name": sub["name"][:200],
+                "subclasse_code": sub["code"],
+                "periodic_data": rows,
+            })
+        result["Status"] = "Success" if any(s["periodic_data"] for s in result["subclasses"]) else "No data extracted"
+        return result
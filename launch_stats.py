@@ -0,0 +1,155 @@
+"""
+Per-host memory of which WebDriver launch strategy works.
+
+StealthANBIMAScraper.setup_driver() knows two strategies: undetected-chromedriver
+("uc") and plain Selenium + selenium-stealth ("plain"). On hosts where UC never
+starts, every driver start and every recovery used to pay for two doomed UC
+launches before reaching the one that works. This store records each launch
+outcome (duration + failure reason) per host in a small JSON file so the
+scraper can try the strategy that has been winning first, and re-probe a
+demoted strategy in the background now and then.
+"""
+
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+# One lock for every store in this process — parallel workers share the file.
+_FILE_LOCK = threading.Lock()
+
+
+class LaunchStatsStore:
+    """JSON-backed launch outcome history, keyed by host then strategy."""
+
+    def __init__(self, path: Optional[str] = None, host_key: Optional[str] = None):
+        """
+        Args:
+            path: JSON file to persist to (default: config.LAUNCH_STATS_FILE)
+            host_key: Identifies this host/launch flavour (default: see host_key_for)
+        """
+        self.path = path or getattr(
+            config, "LAUNCH_STATS_FILE", os.path.join(".cota_state", "launch_stats.json")
+        )
+        self.host_key = host_key or self.host_key_for(headless=False)
+        self.demote_after = getattr(config, "LAUNCH_DEMOTE_AFTER_FAILURES", 2)
+        self.reprobe_interval = getattr(config, "LAUNCH_REPROBE_INTERVAL", 6 * 3600)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def host_key_for(headless: bool) -> str:
+        """Host fingerprint. Headless and headed launches fail differently
+        (the classic macOS headless death), so they are tracked separately."""
+        mode = "headless" if headless else "headed"
+        return f"{platform.system()}|{platform.node()}|{mode}"
+
+    # -- persistence -------------------------------------------------------
+    def _load_all(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.warning(f"Could not read launch stats {self.path}: {e}")
+            return {}
+
+    def _save_all(self, data: Dict):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)  # atomic: readers never see half a file
+        except Exception as e:
+            self.logger.warning(f"Could not persist launch stats {self.path}: {e}")
+
+    def _update(self, strategy: str, mutate):
+        """Apply `mutate` to a strategy's entry; the file is only written if it changed."""
+        with _FILE_LOCK:
+            data = self._load_all()
+            before = data.get(self.host_key, {}).get(strategy, {})
+            entry = dict(before)
+            mutate(entry)
+            if entry == before:
+                return
+            data.setdefault(self.host_key, {})[strategy] = entry
+            self._save_all(data)
+
+    # -- queries -----------------------------------------------------------
+    def stats(self, strategy: str) -> Dict:
+        """Recorded stats for one strategy on this host ({} if never tried)."""
+        with _FILE_LOCK:
+            return dict(self._load_all().get(self.host_key, {}).get(strategy, {}))
+
+    def is_demoted(self, strategy: str) -> bool:
+        """True once a strategy has failed `demote_after` times in a row here."""
+        return self.stats(strategy).get("consecutive_failures", 0) >= self.demote_after
+
+    def order(self, strategies: List[str]) -> List[str]:
+        """Return `strategies` with demoted ones moved to the end.
+
+        The input order is the preference when nothing is known (UC first —
+        better anti-bot properties), so a healthy UC host keeps using UC.
+        """
+        return sorted(
+            strategies, key=lambda s: (self.is_demoted(s), strategies.index(s))
+        )
+
+    def claim_reprobe(self, strategy: str) -> bool:
+        """True if a demoted strategy is due for a background re-probe.
+
+        Claims the slot (stamps `last_probe_at`) so parallel workers on the
+        same host don't all launch the same probe at once.
+        """
+        if not self.reprobe_interval or not self.is_demoted(strategy):
+            return False  # the common case: no lock, no write
+        claimed = []
+
+        def mutate(entry):
+            if entry.get("consecutive_failures", 0) < self.demote_after:
+                return
+            last = max(entry.get("last_probe_at", 0), entry.get("last_fail_at", 0))
+            if time.time() - last >= self.reprobe_interval:
+                entry["last_probe_at"] = time.time()
+                claimed.append(True)
+
+        self._update(strategy, mutate)
+        return bool(claimed)
+
+    # -- recording ---------------------------------------------------------
+    def record(
+        self,
+        strategy: str,
+        ok: bool,
+        seconds: float,
+        error: Optional[str] = None,
+    ):
+        """Record one launch outcome for `strategy` on this host."""
+
+        def mutate(entry):
+            now = time.time()
+            entry["last_seconds"] = round(seconds, 2)
+            prev_avg = entry.get("avg_seconds")
+            entry["avg_seconds"] = round(
+                seconds if prev_avg is None else 0.7 * prev_avg + 0.3 * seconds, 2
+            )
+            if ok:
+                entry["successes"] = entry.get("successes", 0) + 1
+                entry["consecutive_failures"] = 0
+                entry["last_ok_at"] = now
+            else:
+                entry["failures"] = entry.get("failures", 0) + 1
+                entry["consecutive_failures"] = entry.get("consecutive_failures", 0) + 1
+                entry["last_fail_at"] = now
+                entry["last_error"] = (error or "unknown")[:300]
+
+        self._update(strategy, mutate)
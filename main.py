@@ -13,6 +13,8 @@ from tqdm import tqdm
 import config
 from anbima_scraper import ANBIMAScraper
 from data_processor import DataProcessor
+from date_window import DateWindow
+from retry_policy import DeferredRetryQueue, classify
 
 
 def setup_logging():
@@ -44,7 +46,8 @@ def setup_logging():
     return logger
 
 
-def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless: bool = True):
+def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless: bool = True,
+         launch_profile: str = None, since=None, until=None):
     """
     Main execution function
     
@@ -52,8 +55,12 @@ def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless
         input_file: Path to input Excel file with CNPJs
         output_file: Path to output Excel file (auto-generated if None)
         headless: Whether to run browser in headless mode
+        launch_profile: "default" or "lean" Chrome flags (default: config.CHROME_LAUNCH_PROFILE)
+        since: Only fetch rows on/after this date (dd/mm/yyyy, yyyy-mm-dd or e.g. "6m")
+        until: Only fetch rows on/before this date
     """
     logger = setup_logging()
+    window = DateWindow.of(since, until)
     
     try:
         # Generate output filename if not provided
@@ -64,6 +71,8 @@ def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless
         logger.info(f"Input file: {input_file}")
         logger.info(f"Output file: {output_file}")
         logger.info(f"Headless mode: {headless}")
+        if window.bounded:
+            logger.info(f"Date window: {window}")
         
         # Initialize data processor
         processor = DataProcessor()
@@ -93,7 +102,7 @@ def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless
         logger.info("Step 2: Initializing web scraper")
         logger.info("="*80)
         
-        scraper = ANBIMAScraper(headless=headless)
+        scraper = ANBIMAScraper(headless=headless, launch_profile=launch_profile)
         
         if not scraper.setup_driver():
             logger.error("Failed to initialize web driver")
@@ -112,53 +121,55 @@ def main(input_file: str = "input_cnpjs.xlsx", output_file: str = None, headless
         
         print(f"\n🔍 Scraping data for {len(cnpjs)} fund(s)...\n")
         
+        # Retryable failures wait out their backoff in here while the loop
+        # carries on with the next CNPJs.
+        deferred = DeferredRetryQueue(name="main")
+        pbar = tqdm(total=len(cnpjs), desc="Progress", unit="fund")
+        
         try:
-            for idx, cnpj in enumerate(tqdm(cnpjs, desc="Progress", unit="fund")):
+            for cnpj in deferred.run(cnpjs):
                 logger.info(f"\n{'='*80}")
-                logger.info(f"Processing CNPJ {idx+1}/{len(cnpjs)}: {cnpj}")
+                logger.info(f"Processing CNPJ {len(results)+1}/{len(cnpjs)}: {cnpj}")
                 logger.info(f"{'='*80}")
                 
-                # Scrape fund data with retry logic
-                max_retries = config.MAX_RETRIES
-                retry_count = 0
-                result = None
+                # Scrape fund data. The scraper's RetryPolicy classifies each
+                # failure and decides whether (and when) to try again.
+                try:
+                    result = scraper.scrape_fund_data(cnpj, since=window)
+                except Exception as e:
+                    logger.error(f"Error scraping {cnpj}: {str(e)}")
+                    result = {
+                        "CNPJ": cnpj,
+                        "Nome do Fundo": "N/A",
+                        "periodic_data": [],
+                        "Status": f"Error: {str(e)}",
+                        "error_category": classify(None, e),
+                        "attempts_left": 0,
+                    }
                 
-                while retry_count < max_retries:
-                    try:
-                        result = scraper.scrape_fund_data(cnpj)
-                        
-                        if result.get("Status") == "Success":
-                            logger.info(f"✓ Successfully scraped data for {cnpj}")
-                            break
-                        else:
-                            logger.warning(f"Failed to scrape {cnpj}: {result.get('Status')}")
-                            if retry_count < max_retries - 1:
-                                logger.info(f"Retrying... (attempt {retry_count + 2}/{max_retries})")
-                                time.sleep(config.RETRY_DELAY)
-                            retry_count += 1
-                    
-                    except Exception as e:
-                        logger.error(f"Error scraping {cnpj}: {str(e)}")
-                        if retry_count < max_retries - 1:
-                            logger.info(f"Retrying... (attempt {retry_count + 2}/{max_retries})")
-                            time.sleep(config.RETRY_DELAY)
-                        retry_count += 1
-                        result = {
-                            "CNPJ": cnpj,
-                            "Nome do Fundo": "N/A",
-                            "periodic_data": [],
-                            "Status": f"Error after {max_retries} retries: {str(e)}"
-                        }
+                if result.get("Status") == "Success":
+                    logger.info(f"✓ Successfully scraped data for {cnpj}")
+                    scraper.retry_policy.release(cnpj)
+                    retry = False
+                else:
+                    logger.warning(
+                        f"Failed to scrape {cnpj}: {result.get('Status')} [{result.get('error_category')}]"
+                    )
+                    retry, delay, _ = scraper.retry_policy.decide(result, layer="main")
+                    if retry:
+                        deferred.push(cnpj, delay, result)
                 
-                if result:
+                if not retry:
                     results.append(result)
+                    pbar.update(1)
                 
                 # Add delay between requests to avoid rate limiting
-                if idx < len(cnpjs) - 1:  # Don't wait after the last one
+                if len(results) < len(cnpjs):  # Don't wait after the last one
                     time.sleep(config.SLEEP_BETWEEN_REQUESTS)
         
         finally:
             # Always close the browser
+            pbar.close()
             scraper.close()
         
         # Process and save results
@@ -234,14 +245,37 @@ if __name__ == "__main__":
         action="store_true",
         help="Run browser in visible mode (default: headless)"
     )
+    parser.add_argument(
+        "--launch-profile",
+        choices=["default", "lean"],
+        default=None,
+        help="Chrome flag set: 'default' (stealth-tuned) or 'lean' (low memory) (default: config.CHROME_LAUNCH_PROFILE)"
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Only fetch rows on/after this date: dd/mm/yyyy, yyyy-mm-dd or relative (e.g. 6m, 90d, 2y)"
+    )
+    parser.add_argument(
+        "--until",
+        default=None,
+        help="Only fetch rows on/before this date (same formats as --since)"
+    )
     
     args = parser.parse_args()
+    try:
+        DateWindow(args.since, args.until)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Run main function
     success = main(
         input_file=args.input,
         output_file=args.output,
-        headless=not args.no_headless
+        headless=not args.no_headless,
+        launch_profile=args.launch_profile,
+        since=args.since,
+        until=args.until
     )
     
     # Exit with appropriate code
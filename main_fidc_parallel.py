@@ -0,0 +1,435 @@
+"""
+Main script for ANBIMA FIDC Scraper - PARALLEL VERSION
+Runs the FIDC workflow (every subclass of a CNPJ) over a batch of CNPJs with
+the workers, rate limiter and deferred retries of main_parallel.py
+"""
+
+import os
+import sys
+import time
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from tqdm import tqdm
+
+import config
+from data_processor import DataProcessor
+from date_window import DateWindow
+from retry_policy import DeferredRetryQueue, classify
+from run_journal import RunJournal
+from main_parallel import launch_workers, preinitialize_chromedriver, rate_limiter, setup_logging
+
+
+# Global variables for thread-safe operations
+results_lock = Lock()
+all_results = []
+processed_count = 0
+success_count = 0
+failed_count = 0
+start_time = None
+
+
+def fidc_worker(worker_id: int, cnpj_list: list, scraper, pbar: tqdm = None,
+                window: DateWindow = None, desired: dict = None, journal: RunJournal = None):
+    """
+    Worker function that processes a list of FIDC CNPJs
+
+    Args:
+        worker_id: ID of this worker (for logging)
+        cnpj_list: List of CNPJs to process
+        scraper: Scraper with an already-running driver (from launch_workers)
+        pbar: Progress bar to update
+        window: Optional since / until DateWindow for the periodic rows
+        desired: DataProcessor.cnpj_key(CNPJ) -> desired subclass label
+        journal: RunJournal that each final result is appended to
+
+    Returns:
+        List of results
+    """
+    logger = logging.getLogger(f"FIDC-Worker-{worker_id}")
+    logger.info(f"Worker {worker_id} starting with {len(cnpj_list)} CNPJs")
+    desired = desired or {}
+
+    worker_results = []
+    worker_success = 0
+    worker_failed = 0
+
+    def record(result):
+        """Count a final result, journal it and add it to the run's results"""
+        global processed_count, success_count, failed_count
+        worker_results.append(result)
+        if journal:
+            journal.append(result)
+
+        with results_lock:
+            all_results.append(result)
+            processed_count += 1
+            if result.get("Status") in RunJournal.DONE_STATUSES:
+                success_count += 1
+            else:
+                failed_count += 1
+            if pbar:
+                pbar.update(1)
+                pbar.set_postfix({'success': success_count, 'failed': failed_count})
+
+    def scrape(cnpj):
+        try:
+            return scraper.scrape_fidc_data(cnpj, since=window,
+                                            desired=desired.get(DataProcessor.cnpj_key(cnpj)))
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: Error scraping FIDC {cnpj}: {str(e)}")
+            return {
+                "CNPJ": cnpj,
+                "Status": f"Error: {str(e)}",
+                "subclasses": [],
+                "error_category": classify(None, e),
+                "attempts_left": 0,
+            }
+
+    # Retryable failures wait out their backoff here while this worker moves
+    # on to fresh CNPJs; they come back once it expires.
+    deferred = DeferredRetryQueue(name=f"fidc-worker-{worker_id}")
+
+    try:
+        for cnpj in deferred.run(cnpj_list):
+            logger.info(f"Worker {worker_id}: Processing FIDC {cnpj}")
+            rate_limiter.wait_if_needed()
+
+            result = scrape(cnpj)
+            if result.get("Status") in RunJournal.DONE_STATUSES:
+                logger.info(
+                    f"Worker {worker_id}: ✓ {cnpj}: {len(result.get('subclasses') or [])} subclass(es) "
+                    f"({result['Status']})"
+                )
+                worker_success += 1
+                scraper.retry_policy.release(cnpj)
+            else:
+                logger.warning(
+                    f"Worker {worker_id}: Failed to scrape FIDC {cnpj}: {result.get('Status', 'Unknown error')} "
+                    f"[{result.get('error_category')}]"
+                )
+                retry, delay, _ = scraper.retry_policy.decide(result, layer=f"fidc-worker-{worker_id}")
+                if retry:
+                    deferred.push(cnpj, delay, result)
+                    result = None  # not final yet
+                else:
+                    worker_failed += 1
+
+            if result:
+                record(result)
+
+            time.sleep(config.SLEEP_BETWEEN_REQUESTS)
+
+    finally:
+        # Close browser for this worker (not its siblings' — they may still be running)
+        scraper.close(kill_orphans=False)
+        logger.info(f"Worker {worker_id}: Finished. Success: {worker_success}, Failed: {worker_failed}")
+
+    return worker_results
+
+
+def main_fidc_parallel(input_file: str = "input_cnpjs.xlsx",
+                       output_file: str = None,
+                       headless: bool = True,
+                       num_workers: int = 2,
+                       resume: bool = False,
+                       launch_concurrency: int = None,
+                       launch_profile: str = None,
+                       engine: str = "selenium",
+                       since=None,
+                       until=None):
+    """
+    Main execution function for parallel FIDC scraping
+
+    Args:
+        input_file: Path to input Excel file with a CNPJ column and, optionally,
+            a desired-subclass column (see DataProcessor.DESIRED_SUBCLASS_COLUMNS)
+        output_file: Path to output Excel file (auto-generated if None)
+        headless: Whether to run browser in headless mode
+        num_workers: Number of parallel workers (default: 2)
+        resume: Skip CNPJs the output's journal already settled and keep
+            their results (see RunJournal); otherwise the journal starts over
+        launch_concurrency: Maximum simultaneous browser launches at startup
+        launch_profile: "default" or "lean" Chrome flags (default: config.CHROME_LAUNCH_PROFILE)
+        engine: "selenium" (one stealth Chrome per worker), "playwright" (one
+            Chromium, one browser context per worker) or "http" (JSON
+            endpoints, stealth browser as fallback)
+        since: Only fetch rows on/after this date (dd/mm/yyyy, yyyy-mm-dd or e.g. "6m")
+        until: Only fetch rows on/before this date
+    """
+    global all_results, processed_count, success_count, failed_count, start_time
+
+    logger, log_file = setup_logging("scraper_fidc_parallel", "ANBIMA FIDC Scraper - PARALLEL MODE")
+
+    try:
+        if output_file is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = f"output_anbima_fidc_parallel_{timestamp}.xlsx"
+        journal = RunJournal.for_output(output_file)
+
+        logger.info(f"Input file: {input_file}")
+        logger.info(f"Output file: {output_file}")
+        logger.info(f"Journal: {journal.path} ({'resume' if resume else 'fresh'})")
+        logger.info(f"Headless mode: {headless}")
+        logger.info(f"Number of workers: {num_workers}")
+        logger.info(f"Engine: {engine}")
+        window = DateWindow.of(since, until)
+        if window.bounded:
+            logger.info(f"Date window: {window}")
+
+        processor = DataProcessor()
+
+        # Read CNPJs (and desired subclasses) from input file
+        logger.info("\n" + "="*80)
+        logger.info("Step 1: Reading CNPJs from input file")
+        logger.info("="*80)
+
+        if not os.path.exists(input_file):
+            logger.error(f"Input file not found: {input_file}")
+            print(f"\n❌ Error: Input file '{input_file}' not found!")
+            return False
+
+        cnpjs, desired = processor.read_fidc_input(input_file)
+
+        if not cnpjs:
+            logger.error("No CNPJs found in input file")
+            print("\n❌ Error: No CNPJs found in input file!")
+            return False
+
+        print(f"\n✓ Found {len(cnpjs)} CNPJ(s) to process ({len(desired)} with a desired subclass)")
+
+        # Resume from the journal, or start it over
+        kept = {}
+        if resume:
+            kept = journal.done()
+            cnpjs = [cnpj for cnpj in cnpjs if cnpj not in kept]
+            if kept:
+                logger.info(f"Resuming: {len(kept)} CNPJs already settled in {journal.path}")
+                print(f"✓ Resuming: skipping {len(kept)} already processed CNPJs")
+                print(f"✓ Remaining to process: {len(cnpjs)} CNPJs")
+        else:
+            journal.reset()
+
+        all_results = list(kept.values())
+        processed_count = success_count = failed_count = 0
+        start_time = time.time()
+
+        worker_scrapers = []
+        if cnpjs:
+            logger.info("\n" + "="*80)
+            logger.info("Step 1.5: Pre-initializing ChromeDriver")
+            logger.info("="*80)
+
+            pw_engine = http_client = None
+            if engine == "http":
+                from http_engine import AnbimaHttpClient
+                http_client = AnbimaHttpClient(
+                    pool_size=max(num_workers, getattr(config, "HTTP_POOL_SIZE", 8))
+                )
+                if not preinitialize_chromedriver(headless, True):
+                    logger.warning("ChromeDriver unavailable — HTTP engine runs without browser fallback")
+            elif engine == "playwright":
+                from playwright_engine import PlaywrightEngine
+                pw_engine = PlaywrightEngine(headless=headless)
+                if not pw_engine.start():
+                    logger.error(f"Failed to start the Playwright engine: {pw_engine.last_init_error}")
+                    print(f"\n❌ Error: Failed to start Playwright: {pw_engine.last_init_error}")
+                    return False
+            elif not preinitialize_chromedriver(headless, True):
+                logger.error("Failed to pre-initialize ChromeDriver")
+                print("\n❌ Error: Failed to pre-initialize ChromeDriver!")
+                return False
+
+            # The FIDC workflow lives on the stealth scraper (and the engines
+            # that mirror it), so Selenium workers are always stealth.
+            num_workers = max(1, min(num_workers, len(cnpjs)))
+            logger.info("\n" + "="*80)
+            logger.info(f"Step 1.6: Launching {num_workers} workers")
+            logger.info("="*80)
+            worker_scrapers = launch_workers(num_workers, headless, True, launch_concurrency, None,
+                                             launch_profile, pw_engine, http_client)
+            if not worker_scrapers:
+                logger.error(f"Failed to initialize any of the {num_workers} workers")
+                print("\n❌ Error: No worker could initialize!")
+                if pw_engine is not None:
+                    pw_engine.close()
+                if http_client is not None:
+                    http_client.close()
+                return False
+            num_workers = len(worker_scrapers)
+            for scraper in worker_scrapers:
+                # Subclass tabs are paced by the same limiter as the workers
+                scraper.rate_limiter = rate_limiter
+
+            # Divide CNPJs among workers: round-robin, every chunk non-empty
+            cnpj_chunks = [cnpjs[i::num_workers] for i in range(num_workers)]
+            for i, chunk in enumerate(cnpj_chunks):
+                logger.info(f"Worker {i+1} will process {len(chunk)} CNPJs")
+
+            logger.info("\n" + "="*80)
+            logger.info(f"Step 2: Starting parallel FIDC scraping with {num_workers} workers")
+            logger.info("="*80)
+            print(f"\n🔍 Scraping FIDC data for {len(cnpjs)} CNPJ(s) using {num_workers} parallel workers...\n")
+
+            pbar = tqdm(total=len(cnpjs), desc="Overall Progress", unit="cnpj")
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = [
+                    executor.submit(fidc_worker, i+1, chunk, worker_scrapers[i], pbar,
+                                    window, desired, journal)
+                    for i, chunk in enumerate(cnpj_chunks)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Worker failed with error: {str(e)}")
+            pbar.close()
+
+            # Workers only quit their own browser; sweep whatever is left over
+            if http_client is not None:
+                http_client.close()
+            if pw_engine is not None:
+                pw_engine.close()
+            else:
+                from stealth_scraper import StealthANBIMAScraper
+                StealthANBIMAScraper.kill_orphan_processes()
+        else:
+            logger.info("All CNPJs already processed — rewriting the output from the journal")
+            print("\n✓ All CNPJs already processed!")
+
+        total_time = time.time() - start_time
+
+        # Process and save results
+        logger.info("\n" + "="*80)
+        logger.info("Step 3: Processing and saving results")
+        logger.info("="*80)
+
+        if not all_results:
+            logger.error("No results to save")
+            print("\n❌ Error: No results were collected!")
+            return False
+
+        df = processor.process_fidc_data(all_results)
+        processor.save_results(df, output_file)
+        summary = processor.create_summary_report(all_results)
+
+        print("\n" + "="*80)
+        print("PARALLEL FIDC SCRAPING SUMMARY")
+        print("="*80)
+        print(f"Number of workers: {len(worker_scrapers)}")
+        print(f"Total CNPJs: {summary['total_cnpjs']} ({len(kept)} from the journal)")
+        print(f"Successful: {summary['successful']} ({summary['success_rate']})")
+        print(f"Failed: {summary['failed']}")
+        print(f"Subclasses: {df['Código'].nunique()}, rows: {len(df)}")
+        print(f"Total time: {total_time/60:.2f} minutes")
+        if cnpjs:
+            print(f"Average time per CNPJ: {total_time/len(cnpjs):.2f} seconds")
+
+        if summary['error_breakdown']:
+            print("\nError breakdown:")
+            for error, count in summary['error_breakdown'].items():
+                print(f"  - {error}: {count}")
+
+        print(f"\n✓ Results saved to: {output_file}")
+        print(f"✓ Journal: {journal.path}")
+        print(f"✓ Log file saved to: {log_file}")
+        print("="*80 + "\n")
+
+        logger.info("ANBIMA FIDC Scraper - PARALLEL MODE Completed Successfully")
+        return True
+
+    except KeyboardInterrupt:
+        logger.warning("\n\nScript interrupted by user")
+        print("\n\n⚠️  Script interrupted by user (rerun with --resume to continue)")
+        return False
+
+    except Exception as e:
+        logger.error(f"Unexpected error in main: {str(e)}", exc_info=True)
+        print(f"\n❌ Unexpected error: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ANBIMA FIDC Scraper - PARALLEL VERSION")
+    parser.add_argument(
+        "-i", "--input",
+        default="input_cnpjs.xlsx",
+        help="Input Excel file with a CNPJ column and an optional desired-subclass column "
+             "('Subclasse desejada', 'Subclasse', ...) (default: input_cnpjs.xlsx)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Output Excel file (default: auto-generated with timestamp; required with --resume)"
+    )
+    parser.add_argument(
+        "--no-headless",
+        action="store_true",
+        help="Run browser in visible mode (default: headless)"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=2,
+        help="Number of parallel workers (default: 2)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip CNPJs already settled in the output's journal (<output>.journal.jsonl) and keep their results"
+    )
+    parser.add_argument(
+        "--launch-profile",
+        choices=["default", "lean"],
+        default=None,
+        help="Chrome flag set: 'default' (stealth-tuned) or 'lean' (low memory) (default: config.CHROME_LAUNCH_PROFILE)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["selenium", "playwright", "http"],
+        default="selenium",
+        help="Engine: 'selenium' (one stealth Chrome per worker), 'playwright' "
+             "(one Chromium, one context per worker) or 'http' (JSON endpoints, browser fallback)"
+    )
+    parser.add_argument(
+        "--launch-concurrency",
+        type=int,
+        default=None,
+        help="Maximum browsers launched at the same time at startup (default: config.MAX_CONCURRENT_LAUNCHES)"
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Only fetch rows on/after this date: dd/mm/yyyy, yyyy-mm-dd or relative (e.g. 6m, 90d, 2y)"
+    )
+    parser.add_argument(
+        "--until",
+        default=None,
+        help="Only fetch rows on/before this date (same formats as --since)"
+    )
+
+    args = parser.parse_args()
+    if args.resume and not args.output:
+        parser.error("--resume needs the -o/--output of the run to resume")
+    try:
+        DateWindow(args.since, args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    success = main_fidc_parallel(
+        input_file=args.input,
+        output_file=args.output,
+        headless=not args.no_headless,
+        num_workers=args.workers,
+        resume=args.resume,
+        launch_concurrency=args.launch_concurrency,
+        launch_profile=args.launch_profile,
+        engine=args.engine,
+        since=args.since,
+        until=args.until
+    )
+
+    sys.exit(0 if success else 1)
@@ -17,6 +17,8 @@ import pandas as pd
 import config
 from anbima_scraper import ANBIMAScraper
 from data_processor import DataProcessor
+from date_window import DateWindow
+from retry_policy import DeferredRetryQueue, RetryPolicy, classify
 # Stealth scraper will be imported conditionally if needed
 
 
@@ -74,155 +76,151 @@ class GlobalRateLimiter:
 rate_limiter = GlobalRateLimiter(max_requests_per_minute=15)
 
 
-def scrape_worker(worker_id: int, cnpj_list: list, headless: bool = True, pbar: tqdm = None, use_stealth: bool = False):
+class HedgeCoordinator:
     """
-    Worker function that processes a list of CNPJs
-
-    Args:
-        worker_id: ID of this worker (for logging)
-        cnpj_list: List of CNPJs to process
-        headless: Whether to run browser in headless mode
-        pbar: Progress bar to update
-        use_stealth: Whether to use stealth mode
-
-    Returns:
-        List of results
+    Hedged requests for straggler CNPJs
+
+    Workers that have run out of their own CNPJs start a duplicate attempt
+    of a CNPJ that has been in flight on another worker for longer than
+    HEDGE_PERCENTILE of the latencies observed so far. The first attempt to
+    succeed (or to fail for good) wins and the other one is cancelled
+    (scraper.cancel()). A hedge that fails is simply dropped; an original
+    that fails but could be retried hands the CNPJ over to its running
+    hedge instead. Hedges are capped at HEDGE_MAX_FRACTION of the run's
+    CNPJs and HEDGE_MAX_IN_FLIGHT at a time.
     """
-    global all_results, processed_count, success_count, failed_count, start_time, rate_limiter
-
-    logger = logging.getLogger(f"Worker-{worker_id}")
-    logger.info(f"Worker {worker_id} starting with {len(cnpj_list)} CNPJs")
-
-    worker_results = []
-    worker_success = 0
-    worker_failed = 0
-
-    # Initialize scraper for this worker
-    if use_stealth:
-        from stealth_scraper import StealthANBIMAScraper
-        scraper = StealthANBIMAScraper(headless=headless)
-    else:
-        scraper = ANBIMAScraper(headless=headless)
-
-    if not scraper.setup_driver():
-        logger.error(f"Worker {worker_id}: Failed to initialize web driver")
-        return []
 
-    logger.info(f"Worker {worker_id}: Web driver initialized successfully")
-
-    try:
-        for cnpj in cnpj_list:
-            logger.info(f"Worker {worker_id}: Processing {cnpj}")
-
-            # Wait for global rate limiter before making request
-            rate_limiter.wait_if_needed()
-
-            # Scrape fund data with retry logic and exponential backoff
-            max_retries = config.MAX_RETRIES
-            retry_count = 0
-            result = None
-            base_retry_delay = config.RETRY_DELAY
+    def __init__(self, total_cnpjs: int, num_workers: int):
+        """
+        Args:
+            total_cnpjs: CNPJs in the run (for the hedge cap)
+            num_workers: Workers that will call worker_done()
+        """
+        self.percentile = getattr(config, 'HEDGE_PERCENTILE', 90)
+        self.min_samples = getattr(config, 'HEDGE_MIN_SAMPLES', 5)
+        self.max_hedges = max(1, int(total_cnpjs * getattr(config, 'HEDGE_MAX_FRACTION', 0.1)))
+        self.max_in_flight = getattr(config, 'HEDGE_MAX_IN_FLIGHT', 1)
+        self.lock = Lock()
+        self.logger = logging.getLogger("Hedge")
+        self.latencies = []
+        self.hedges_started = 0
+        self.hedges_won = 0
+        self.active_workers = num_workers
+        # cnpj -> {worker_id: {"started", "scraper", "hedge"}} for attempts in flight
+        self.in_flight = {}
+        self.settled = set()  # CNPJs whose race has a winner
+        self.handed_over = set()  # CNPJs whose original attempt left them to the hedge
+
+    def start(self, cnpj: str, worker_id: int, scraper):
+        """Register a worker's own attempt that is about to run"""
+        with self.lock:
+            self.settled.discard(cnpj)  # a later (deferred) retry starts a new race
+            self.in_flight.setdefault(cnpj, {})[worker_id] = {
+                "started": time.time(), "scraper": scraper, "hedge": False,
+            }
 
-            while retry_count < max_retries:
-                try:
-                    result = scraper.scrape_fund_data(cnpj)
-
-                    if result.get("Status") == "Success":
-                        logger.info(f"Worker {worker_id}: ✓ Successfully scraped {cnpj}")
-                        worker_success += 1
-                        break
-                    else:
-                        error_msg = result.get('Status', 'Unknown error')
-                        logger.warning(f"Worker {worker_id}: Failed to scrape {cnpj}: {error_msg}")
-
-                        # Don't retry if CNPJ not found
-                        if "not found" in error_msg.lower() or "no results" in error_msg.lower():
-                            logger.info(f"Worker {worker_id}: CNPJ not found, skipping retries")
-                            worker_failed += 1
-                            break
-
-                        # Exponential backoff for rate limiting
-                        if "rate limit" in error_msg.lower():
-                            if retry_count < max_retries - 1:
-                                # Exponential backoff: 60s, 120s, 240s
-                                backoff_delay = 60 * (2 ** retry_count)
-                                logger.warning(f"Worker {worker_id}: Rate limited! Backing off for {backoff_delay}s (attempt {retry_count + 2}/{max_retries})")
-                                time.sleep(backoff_delay)
-                            else:
-                                worker_failed += 1
-                            retry_count += 1
-                            continue
-
-                        # Standard retry for other errors
-                        if retry_count < max_retries - 1:
-                            retry_delay = base_retry_delay * (1.5 ** retry_count)  # Mild exponential increase
-                            logger.info(f"Worker {worker_id}: Retrying in {retry_delay:.1f}s... (attempt {retry_count + 2}/{max_retries})")
-                            time.sleep(retry_delay)
-                        else:
-                            worker_failed += 1
-                        retry_count += 1
+    def finish(self, cnpj: str, worker_id: int, result: dict, final: bool = True) -> bool:
+        """
+        Unregister an attempt and say whether its result counts
 
-                except Exception as e:
-                    logger.error(f"Worker {worker_id}: Error scraping {cnpj}: {str(e)}")
-                    if retry_count < max_retries - 1:
-                        retry_delay = base_retry_delay * (1.5 ** retry_count)
-                        logger.info(f"Worker {worker_id}: Retrying in {retry_delay:.1f}s... (attempt {retry_count + 2}/{max_retries})")
-                        time.sleep(retry_delay)
-                    else:
-                        worker_failed += 1
-                    retry_count += 1
-                    result = {
-                        "CNPJ": cnpj,
-                        "Nome do Fundo": "N/A",
-                        "periodic_data": [],
-                        "Status": f"Error after {max_retries} retries: {str(e)}"
-                    }
-
-            if result:
-                worker_results.append(result)
-
-                # Update global counters (thread-safe)
-                with results_lock:
-                    all_results.append(result)
-                    processed_count += 1
-                    if result.get("Status") == "Success":
-                        success_count += 1
-                    else:
-                        failed_count += 1
-
-                    # Update progress bar
-                    if pbar:
-                        pbar.update(1)
-                        # Calculate statistics
-                        elapsed = time.time() - start_time
-                        rate = processed_count / elapsed if elapsed > 0 else 0
-                        remaining = len(cnpj_list) * 4 - processed_count  # Approximate total
-                        eta = remaining / rate if rate > 0 else 0
-                        pbar.set_postfix({
-                            'success': success_count,
-                            'failed': failed_count,
-                            'rate': f'{rate:.2f}/s',
-                            'eta': f'{eta/60:.1f}min'
-                        })
+        Args:
+            final: False when a failed result would be retried (the
+                caller's retry_policy.decide() said so)
 
-            # Delay between requests - use full delay since we have 1 worker by default now
-            time.sleep(config.SLEEP_BETWEEN_REQUESTS)
+        Returns:
+            True if this attempt won (its result is recorded, or retried by
+            the caller), False if it lost the race, is a failed hedge, or
+            was handed over to the hedge still running
+        """
+        with self.lock:
+            attempts = self.in_flight.get(cnpj, {})
+            mine = attempts.pop(worker_id, None)
+            if not attempts:
+                self.in_flight.pop(cnpj, None)
+            if mine is None or cnpj in self.settled:
+                return False  # the other attempt already won
+            success = result.get("Status") == "Success"
+            if not success and attempts and (mine["hedge"] or not final):
+                if not mine["hedge"]:
+                    # A retry would race the hedge: let the hedge carry on instead
+                    self.handed_over.add(cnpj)
+                    self.logger.info(f"{cnpj}: worker {worker_id} failed, leaving it to the hedge")
+                return False  # the other attempt carries on
+            if success and not mine["hedge"]:
+                self.latencies.append(time.time() - mine["started"])
+            if success and mine["hedge"]:
+                self.hedges_won += 1
+            self.settled.add(cnpj)
+            self.handed_over.discard(cnpj)
+            # Stop the attempt(s) still running for this CNPJ
+            for other_id, other in attempts.items():
+                self.logger.info(f"{cnpj}: worker {worker_id} finished first, cancelling worker {other_id}")
+                other["scraper"].cancel(
+                    f"Cancelled: hedged attempt on worker {worker_id} finished first", cnpj
+                )
+            return True
 
-    finally:
-        # Close browser for this worker
-        scraper.close()
-        logger.info(f"Worker {worker_id}: Finished. Success: {worker_success}, Failed: {worker_failed}")
+    def is_settled(self, cnpj: str) -> bool:
+        """True once a CNPJ's race has a winner (no attempt of it still counts)"""
+        with self.lock:
+            return cnpj in self.settled
+
+    def threshold(self):
+        """Latency (s) past which a CNPJ counts as a straggler (None: too few samples)"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def pick_straggler(self, worker_id: int, scraper):
+        """A CNPJ worth hedging now, or None; registers `worker_id`'s hedge attempt"""
+        with self.lock:
+            threshold = self.threshold()
+            if threshold is None or self.hedges_started >= self.max_hedges:
+                return None
+            hedging = sum(1 for a in self.in_flight.values() for x in a.values() if x["hedge"])
+            if hedging >= self.max_in_flight:
+                return None
+            now = time.time()
+            candidates = [
+                (now - next(iter(a.values()))["started"], cnpj)
+                for cnpj, a in self.in_flight.items()
+                if len(a) == 1 and not next(iter(a.values()))["hedge"]
+            ]
+            candidates = [(elapsed, cnpj) for elapsed, cnpj in candidates if elapsed > threshold]
+            if not candidates:
+                return None
+            elapsed, cnpj = max(candidates)
+            self.hedges_started += 1
+            self.in_flight[cnpj][worker_id] = {
+                "started": now, "scraper": scraper, "hedge": True,
+            }
+            self.logger.info(
+                f"Hedging {cnpj}: running {elapsed:.0f}s > p{self.percentile} {threshold:.0f}s "
+                f"(hedge {self.hedges_started}/{self.max_hedges})"
+            )
+            return cnpj
+
+    def worker_done(self):
+        """A worker has finished its own CNPJs (it may still hedge)"""
+        with self.lock:
+            self.active_workers -= 1
 
-    return worker_results
+    @property
+    def run_active(self) -> bool:
+        """True while some worker still has CNPJs of its own"""
+        with self.lock:
+            return self.active_workers > 0
 
 
-def setup_logging():
-    """Setup logging configuration"""
+def setup_logging(prefix: str = "scraper_parallel", title: str = "ANBIMA Fund Data Scraper - PARALLEL MODE"):
+    """Setup logging configuration (log file <prefix>_<timestamp>.log)"""
     if not os.path.exists(config.LOG_DIR):
         os.makedirs(config.LOG_DIR)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(config.LOG_DIR, f"scraper_parallel_{timestamp}.log")
+    log_file = os.path.join(config.LOG_DIR, f"{prefix}_{timestamp}.log")
     
     logging.basicConfig(
         level=logging.INFO,
@@ -235,7 +233,7 @@ def setup_logging():
     
     logger = logging.getLogger(__name__)
     logger.info("="*80)
-    logger.info("ANBIMA Fund Data Scraper - PARALLEL MODE Started")
+    logger.info(f"{title} Started")
     logger.info(f"Log file: {log_file}")
     logger.info("="*80)
     
@@ -244,96 +242,126 @@ def setup_logging():
 
 def preinitialize_chromedriver(headless: bool = True, use_stealth: bool = False) -> bool:
     """
-    Pre-initializes ChromeDriver to avoid race condition when multiple workers start.
-    Downloads and installs the driver before workers are created.
-    
+    Resolves the ChromeDriver binary before workers are created, so parallel
+    launches don't race on the download. No browser is started here — the
+    launch itself happens once, in launch_workers().
+
     Args:
-        headless: Whether to use headless mode
+        headless: Whether to use headless mode (logged only)
         use_stealth: Whether to use stealth mode (undetected-chromedriver)
-        
+
     Returns:
         True if successful, False otherwise
     """
     logger = logging.getLogger(__name__)
     logger.info("\n" + "="*80)
-    logger.info(f"PRE-INITIALIZATION: Downloading ChromeDriver ({'STEALTH' if use_stealth else 'STANDARD'} mode)")
+    logger.info(f"PRE-INITIALIZATION: Resolving ChromeDriver ({'STEALTH' if use_stealth else 'STANDARD'} mode)")
     logger.info("="*80)
-    
+
     try:
         if use_stealth:
-            from stealth_scraper import StealthANBIMAScraper
-            scraper = StealthANBIMAScraper(headless=headless)
+            # UC patches a per-instance copy of the driver (system chromedriver
+            # on Linux, a uniquely-named download elsewhere), so there is nothing
+            # shared to race on. Detecting Chrome once warms the version lookup.
+            from stealth_scraper import get_chrome_version
+            logger.info(f"Detected Chrome major version: {get_chrome_version()}")
         else:
-            scraper = ANBIMAScraper(headless=headless)
-        
-        if scraper.setup_driver():
-            logger.info("✅ ChromeDriver downloaded and ready")
-            scraper.close()
-            return True
-        else:
-            logger.error("❌ Failed to initialize ChromeDriver")
-            return False
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+            logger.info(f"ChromeDriver resolved at: {driver_path}")
+        logger.info("✅ ChromeDriver ready")
+        return True
     except Exception as e:
         logger.error(f"❌ Error during ChromeDriver pre-initialization: {e}")
         return False
 
 
-def test_workers(num_workers: int, headless: bool = True, use_stealth: bool = False) -> bool:
+def _driver_healthy(scraper) -> bool:
+    """True if the scraper's browser answers a WebDriver round-trip."""
+    if hasattr(scraper, "is_driver_alive"):
+        return scraper.is_driver_alive()
+    try:
+        _ = scraper.driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def launch_workers(num_workers: int, headless: bool = True, use_stealth: bool = False,
+                   max_concurrent: int = None, standby=None, launch_profile: str = None,
+                   engine=None, http_client=None, retry_policy: RetryPolicy = None) -> list:
     """
-    Test if all workers can initialize their drivers successfully.
-    
+    Launch one browser per worker in parallel and keep the healthy ones.
+
+    This is both the validation step and the real startup: the returned
+    scrapers are handed straight to scrape_worker(), so a run costs exactly
+    one round of Chrome launches.
+
     Args:
-        num_workers: Number of workers to test
+        num_workers: Number of workers to launch
         headless: Whether to use headless mode
         use_stealth: Whether to use stealth mode (undetected-chromedriver)
-        
+        max_concurrent: Maximum simultaneous launches (default: config.MAX_CONCURRENT_LAUNCHES)
+        standby: Hot standby for the stealth scrapers — True for one spare per
+            worker, a shared DriverStandby for one spare for the whole pool
+        launch_profile: "default" or "lean" Chrome flags (default: config.CHROME_LAUNCH_PROFILE)
+        engine: A started PlaywrightEngine — workers become browser contexts
+            in its one Chromium instead of browsers of their own
+        http_client: A shared AnbimaHttpClient — workers call the JSON
+            endpoints over its pooled session and only launch a browser to
+            fall back
+        retry_policy: RetryPolicy shared by every scraper, so a CNPJ has one
+            attempt/time budget across workers (hedges included); a new one
+            when omitted
+
     Returns:
-        True if all workers initialized successfully, False otherwise
+        List of scrapers with a live driver (may be shorter than num_workers)
     """
     logger = logging.getLogger(__name__)
+    retry_policy = retry_policy or RetryPolicy()
+    max_concurrent = max(1, min(num_workers, max_concurrent or getattr(config, 'MAX_CONCURRENT_LAUNCHES', 2)))
     logger.info("\n" + "="*80)
-    logger.info(f"TESTING: Initializing {num_workers} workers ({'STEALTH' if use_stealth else 'STANDARD'} mode)")
+    logger.info(f"LAUNCHING: {num_workers} workers, {max_concurrent} at a time "
+                f"({'STEALTH' if use_stealth else 'STANDARD'} mode)")
     logger.info("="*80)
-    
-    scrapers = []
-    success = True
-    
-    try:
-        # Try to initialize all workers
-        for i in range(1, num_workers + 1):
-            logger.info(f"  Testing Worker {i}...")
-            if use_stealth:
-                from stealth_scraper import StealthANBIMAScraper
-                scraper = StealthANBIMAScraper(headless=headless)
-            else:
-                scraper = ANBIMAScraper(headless=headless)
-            
-            if scraper.setup_driver():
-                logger.info(f"  ✅ Worker {i}: Initialized successfully")
-                scrapers.append(scraper)
-                time.sleep(0.5)  # Small delay between initializations
-            else:
-                logger.error(f"  ❌ Worker {i}: Failed to initialize")
-                success = False
-                break
-        
-        if success:
-            logger.info(f"\n✅ ALL {num_workers} WORKERS INITIALIZED SUCCESSFULLY!")
+
+    def launch(worker_id: int):
+        if engine is not None:
+            from playwright_engine import PlaywrightANBIMAScraper
+            scraper = PlaywrightANBIMAScraper(engine=engine, retry_policy=retry_policy)
+        elif http_client is not None:
+            from http_engine import HttpANBIMAScraper
+            scraper = HttpANBIMAScraper(client=http_client, headless=headless,
+                                        retry_policy=retry_policy)
+        elif use_stealth:
+            from stealth_scraper import StealthANBIMAScraper
+            scraper = StealthANBIMAScraper(headless=headless, standby=standby,
+                                           launch_profile=launch_profile,
+                                           retry_policy=retry_policy)
         else:
-            logger.error(f"\n❌ WORKER INITIALIZATION FAILED")
-            
-    finally:
-        # Clean up test scrapers
-        logger.info("\nCleaning up test workers...")
-        for scraper in scrapers:
-            try:
-                scraper.close()
-            except:
-                pass
-        time.sleep(2)  # Wait for cleanup
-    
+            scraper = ANBIMAScraper(headless=headless, launch_profile=launch_profile,
+                                    retry_policy=retry_policy)
+        t0 = time.time()
+        if scraper.setup_driver() and _driver_healthy(scraper):
+            logger.info(f"  ✅ Worker {worker_id}: Browser ready in {time.time() - t0:.1f}s")
+            return scraper
+        logger.error(f"  ❌ Worker {worker_id}: Failed to initialize")
+        # Only this worker's browser — siblings are still launching.
+        scraper.close(kill_orphans=False)
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+        launched = list(executor.map(launch, range(1, num_workers + 1)))
+
+    scrapers = [scraper for scraper in launched if scraper is not None]
+    if len(scrapers) == num_workers:
+        logger.info(f"\n✅ ALL {num_workers} WORKERS INITIALIZED SUCCESSFULLY!")
+    elif scrapers:
+        logger.warning(f"\n⚠️  Only {len(scrapers)}/{num_workers} workers initialized — continuing with those")
+    else:
+        logger.error(f"\n❌ WORKER INITIALIZATION FAILED")
     logger.info("="*80 + "\n")
-    return success
+    return scrapers
 
 
 def get_processed_cnpjs(output_file: str) -> set:
@@ -364,7 +392,9 @@ def get_processed_cnpjs(output_file: str) -> set:
     return processed
 
 
-def scrape_worker(worker_id: int, cnpj_list: list, headless: bool = True, pbar: tqdm = None, use_stealth: bool = False):
+def scrape_worker(worker_id: int, cnpj_list: list, headless: bool = True, pbar: tqdm = None, use_stealth: bool = False,
+                  scraper=None, hedger: HedgeCoordinator = None, window: DateWindow = None,
+                  all_columns: bool = False):
     """
     Worker function that processes a list of CNPJs
     
@@ -374,11 +404,17 @@ def scrape_worker(worker_id: int, cnpj_list: list, headless: bool = True, pbar:
         headless: Whether to run browser in headless mode
         pbar: Progress bar to update
         use_stealth: Whether to use stealth mode
+        scraper: Scraper with an already-running driver (from launch_workers);
+            a new one is launched when omitted
+        hedger: Shared HedgeCoordinator; once its own CNPJs are done the
+            worker hedges stragglers of the other workers
+        window: Optional since / until DateWindow for the periodic rows
+        all_columns: Read every periodic column (scraper.scrape_combined_data)
         
     Returns:
         List of results
     """
-    global all_results, processed_count, success_count, failed_count, start_time
+    global all_results, processed_count, success_count, failed_count, start_time, rate_limiter
     
     logger = logging.getLogger(f"Worker-{worker_id}")
     logger.info(f"Worker {worker_id} starting with {len(cnpj_list)} CNPJs")
@@ -386,118 +422,159 @@ def scrape_worker(worker_id: int, cnpj_list: list, headless: bool = True, pbar:
     worker_results = []
     worker_success = 0
     worker_failed = 0
+    own_work_done = False
     
-    # Initialize scraper for this worker
-    if use_stealth:
-        from stealth_scraper import StealthANBIMAScraper
-        scraper = StealthANBIMAScraper(headless=headless)
-    else:
-        scraper = ANBIMAScraper(headless=headless)
-    
-    if not scraper.setup_driver():
-        logger.error(f"Worker {worker_id}: Failed to initialize web driver")
-        return []
-    
-    logger.info(f"Worker {worker_id}: Web driver initialized successfully")
-    
-    try:
-        for cnpj in cnpj_list:
-            logger.info(f"Worker {worker_id}: Processing {cnpj}")
+    def record(result):
+        """Count a final result and add it to the run's results"""
+        global processed_count, success_count, failed_count
+        worker_results.append(result)
+
+        # Update global counters (thread-safe)
+        with results_lock:
+            all_results.append(result)
+            processed_count += 1
+            if result.get("Status") == "Success":
+                success_count += 1
+            else:
+                failed_count += 1
+
+            # Update progress bar
+            if pbar:
+                pbar.update(1)
+                # Calculate statistics
+                elapsed = time.time() - start_time
+                rate = processed_count / elapsed if elapsed > 0 else 0
+                remaining = len(cnpj_list) * 4 - processed_count  # Approximate total
+                eta = remaining / rate if rate > 0 else 0
+                pbar.set_postfix({
+                    'success': success_count,
+                    'failed': failed_count,
+                    'rate': f'{rate:.2f}/s',
+                    'eta': f'{eta/60:.1f}min'
+                })
+
+    def scrape(cnpj):
+        try:
+            method = scraper.scrape_combined_data if all_columns else scraper.scrape_fund_data
+            if window is not None and window.bounded:
+                return method(cnpj, since=window)
+            return method(cnpj)
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: Error scraping {cnpj}: {str(e)}")
+            return {
+                "CNPJ": cnpj,
+                "Nome do Fundo": "N/A",
+                "periodic_data": [],
+                "Status": f"Error: {str(e)}",
+                "error_category": classify(None, e),
+                "attempts_left": 0,
+            }
+
+    def forget(cnpj, release=True):
+        """Drop this scraper's retry state for a CNPJ another attempt settled
+
+        The RetryPolicy is shared by the workers, so the budget is only
+        released once no other attempt of the CNPJ is still running.
+        """
+        if release:
+            scraper.retry_policy.release(cnpj)
+        if hasattr(scraper, "clear_checkpoint"):
+            scraper.clear_checkpoint(cnpj)
+
+    def attempt(cnpj, hedge=False):
+        """Scrape one attempt of `cnpj`, then record, defer or drop its result"""
+        nonlocal worker_success, worker_failed
+
+        # Wait for global rate limiter before making request (hedges included)
+        rate_limiter.wait_if_needed()
+
+        # Scrape fund data. The shared RetryPolicy classifies each failure
+        # and owns the CNPJ's attempt/time budget; it decides whether (and
+        # after what backoff) another attempt is worthwhile.
+        if hedger and not hedge:
+            hedger.start(cnpj, worker_id, scraper)
+        result = scrape(cnpj)
+        failed = result.get("Status") != "Success"
+        retry, delay = False, 0.0
+        if failed and not hedge:
+            retry, delay, _ = scraper.retry_policy.decide(result, layer=f"worker-{worker_id}")
+        if hedger and not hedger.finish(cnpj, worker_id, result, final=not retry):
+            logger.info(f"Worker {worker_id}: {cnpj} was settled by (or left to) another attempt")
+            forget(cnpj, release=hedger.is_settled(cnpj))
+            return
+        if failed and hedge:
+            # The original attempt left the CNPJ to this one: its retries are ours now
+            retry, delay, _ = scraper.retry_policy.decide(result, layer=f"worker-{worker_id}")
+
+        if not failed:
+            logger.info(f"Worker {worker_id}: ✓ {'Hedged attempt won' if hedge else 'Successfully scraped'} {cnpj}")
+            worker_success += 1
+            if hedge:
+                forget(cnpj)
+            else:
+                scraper.retry_policy.release(cnpj)
+        else:
+            logger.warning(
+                f"Worker {worker_id}: Failed to scrape {cnpj}: {result.get('Status', 'Unknown error')} "
+                f"[{result.get('error_category')}]"
+            )
+            if retry:
+                deferred.push(cnpj, delay, result)
+                return  # not final yet
+            worker_failed += 1
+        record(result)
+
+    # Initialize scraper for this worker (unless launch_workers already did)
+    if scraper is None:
+        if use_stealth:
+            from stealth_scraper import StealthANBIMAScraper
+            scraper = StealthANBIMAScraper(headless=headless)
+        else:
+            scraper = ANBIMAScraper(headless=headless)
 
-            # Scrape fund data with retry logic and exponential backoff
-            max_retries = config.MAX_RETRIES
-            retry_count = 0
-            result = None
-            base_retry_delay = config.RETRY_DELAY
+        if not scraper.setup_driver():
+            logger.error(f"Worker {worker_id}: Failed to initialize web driver")
+            if hedger:
+                hedger.worker_done()
+            return []
 
-            while retry_count < max_retries:
-                try:
-                    result = scraper.scrape_fund_data(cnpj)
-
-                    if result.get("Status") == "Success":
-                        logger.info(f"Worker {worker_id}: ✓ Successfully scraped {cnpj}")
-                        worker_success += 1
-                        break
-                    else:
-                        error_msg = result.get('Status', 'Unknown error')
-                        logger.warning(f"Worker {worker_id}: Failed to scrape {cnpj}: {error_msg}")
-
-                        # Don't retry if CNPJ not found
-                        if "not found" in error_msg.lower() or "no results" in error_msg.lower():
-                            logger.info(f"Worker {worker_id}: CNPJ not found, skipping retries")
-                            worker_failed += 1
-                            break
-
-                        # Exponential backoff for rate limiting
-                        if "rate limit" in error_msg.lower():
-                            if retry_count < max_retries - 1:
-                                # Exponential backoff: 60s, 120s, 240s
-                                backoff_delay = 60 * (2 ** retry_count)
-                                logger.warning(f"Worker {worker_id}: Rate limited! Backing off for {backoff_delay}s (attempt {retry_count + 2}/{max_retries})")
-                                time.sleep(backoff_delay)
-                            else:
-                                worker_failed += 1
-                            retry_count += 1
-                            continue
-
-                        # Standard retry for other errors
-                        if retry_count < max_retries - 1:
-                            retry_delay = base_retry_delay * (1.5 ** retry_count)  # Mild exponential increase
-                            logger.info(f"Worker {worker_id}: Retrying in {retry_delay:.1f}s... (attempt {retry_count + 2}/{max_retries})")
-                            time.sleep(retry_delay)
-                        else:
-                            worker_failed += 1
-                        retry_count += 1
+        logger.info(f"Worker {worker_id}: Web driver initialized successfully")
+    
+    # Retryable failures wait out their backoff here while this worker (and
+    # its browser) moves on to fresh CNPJs; they come back once it expires.
+    deferred = DeferredRetryQueue(name=f"worker-{worker_id}")
 
-                except Exception as e:
-                    logger.error(f"Worker {worker_id}: Error scraping {cnpj}: {str(e)}")
-                    if retry_count < max_retries - 1:
-                        retry_delay = base_retry_delay * (1.5 ** retry_count)
-                        logger.info(f"Worker {worker_id}: Retrying in {retry_delay:.1f}s... (attempt {retry_count + 2}/{max_retries})")
-                        time.sleep(retry_delay)
-                    else:
-                        worker_failed += 1
-                    retry_count += 1
-                    result = {
-                        "CNPJ": cnpj,
-                        "Nome do Fundo": "N/A",
-                        "periodic_data": [],
-                        "Status": f"Error after {max_retries} retries: {str(e)}"
-                    }
-
-            if result:
-                worker_results.append(result)
-
-                # Update global counters (thread-safe)
-                with results_lock:
-                    all_results.append(result)
-                    processed_count += 1
-                    if result.get("Status") == "Success":
-                        success_count += 1
-                    else:
-                        failed_count += 1
-
-                    # Update progress bar
-                    if pbar:
-                        pbar.update(1)
-                        # Calculate statistics
-                        elapsed = time.time() - start_time
-                        rate = processed_count / elapsed if elapsed > 0 else 0
-                        remaining = len(cnpj_list) * 4 - processed_count  # Approximate total
-                        eta = remaining / rate if rate > 0 else 0
-                        pbar.set_postfix({
-                            'success': success_count,
-                            'failed': failed_count,
-                            'rate': f'{rate:.2f}/s',
-                            'eta': f'{eta/60:.1f}min'
-                        })
+    try:
+        for cnpj in deferred.run(cnpj_list):
+            logger.info(f"Worker {worker_id}: Processing {cnpj}")
+            attempt(cnpj)
 
             # Delay between requests - use full delay since we have 1 worker by default now
             time.sleep(config.SLEEP_BETWEEN_REQUESTS)
+
+        # Own CNPJs done: while other workers are still busy, duplicate
+        # their stragglers instead of sitting idle. CNPJs handed over by a
+        # failed original attempt come back through `deferred`.
+        if hedger:
+            hedger.worker_done()
+            own_work_done = True
+            while hedger.run_active or len(deferred):
+                cnpj = deferred.pop_due()
+                hedge = cnpj is None
+                if hedge and hedger.run_active:
+                    cnpj = hedger.pick_straggler(worker_id, scraper)
+                if cnpj is None:
+                    time.sleep(1)
+                    continue
+                logger.info(f"Worker {worker_id}: {'Hedging straggler' if hedge else 'Retrying'} {cnpj}")
+                attempt(cnpj, hedge=hedge)
+                time.sleep(config.SLEEP_BETWEEN_REQUESTS)
     
     finally:
-        # Close browser for this worker
-        scraper.close()
+        if hedger and not own_work_done:
+            hedger.worker_done()
+        # Close browser for this worker (not its siblings' — they may still be running)
+        scraper.close(kill_orphans=False)
         logger.info(f"Worker {worker_id}: Finished. Success: {worker_success}, Failed: {worker_failed}")
     
     return worker_results
@@ -508,7 +585,15 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
                  headless: bool = True,
                  num_workers: int = 4,
                  skip_processed: bool = False,
-                 use_stealth: bool = False):
+                 use_stealth: bool = False,
+                 launch_concurrency: int = None,
+                 hot_standby: str = "none",
+                 launch_profile: str = None,
+                 hedge: bool = False,
+                 engine: str = "selenium",
+                 since=None,
+                 until=None,
+                 all_columns: bool = False):
     """
     Main execution function with parallel processing
     
@@ -519,6 +604,20 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         num_workers: Number of parallel workers (default: 4)
         skip_processed: Whether to skip already processed CNPJs
         use_stealth: Whether to use stealth mode (undetected-chromedriver)
+        launch_concurrency: Maximum simultaneous browser launches at startup
+        hot_standby: "none", "worker" (one spare browser per worker) or "pool"
+            (one spare shared by all workers) — stealth mode only
+        launch_profile: "default" or "lean" Chrome flags (default: config.CHROME_LAUNCH_PROFILE)
+        hedge: Let idle workers duplicate straggler CNPJs (see HedgeCoordinator)
+        engine: "selenium" (one Chrome per worker; --stealth picks the stealth
+            scraper), "playwright" (one Chromium, one browser context per worker)
+            or "http" (JSON endpoints over a pooled session, stealth browser
+            as fallback)
+        since: Only fetch rows on/after this date (dd/mm/yyyy, yyyy-mm-dd or e.g. "6m")
+        until: Only fetch rows on/before this date
+        all_columns: Read every column of each periodic table in the same
+            visit and also save the long (FIDC-style) output next to the
+            pivot one (DataProcessor.all_columns_file)
     """
     global all_results, processed_count, success_count, failed_count, start_time
     
@@ -535,7 +634,18 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         logger.info(f"Headless mode: {headless}")
         logger.info(f"Stealth mode: {use_stealth}")
         logger.info(f"Number of workers: {num_workers}")
+        logger.info(f"Launch profile: {launch_profile or config.CHROME_LAUNCH_PROFILE}")
         logger.info(f"Skip processed: {skip_processed}")
+        logger.info(f"Hedged requests: {hedge}")
+        logger.info(f"Engine: {engine}")
+        if all_columns and engine == "selenium" and not use_stealth:
+            # scrape_combined_data lives on the stealth scraper
+            logger.info("All-columns mode uses the stealth scraper")
+            use_stealth = True
+        logger.info(f"All columns: {all_columns}")
+        window = DateWindow.of(since, until)
+        if window.bounded:
+            logger.info(f"Date window: {window}")
         
         # Initialize data processor
         processor = DataProcessor()
@@ -559,29 +669,6 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         
         print(f"\n✓ Found {len(cnpjs)} CNPJ(s) to process")
         
-        # PRE-INITIALIZE ChromeDriver to avoid race condition
-        logger.info("\n" + "="*80)
-        logger.info("Step 1.5: Pre-initializing ChromeDriver")
-        logger.info("="*80)
-        
-        if not preinitialize_chromedriver(headless, use_stealth):
-            logger.error("Failed to pre-initialize ChromeDriver")
-            print("\n❌ Error: Failed to pre-initialize ChromeDriver!")
-            return False
-        
-        # TEST workers before starting
-        logger.info("\n" + "="*80)
-        logger.info(f"Step 1.6: Testing {num_workers} workers")
-        logger.info("="*80)
-        
-        if not test_workers(num_workers, headless, use_stealth):
-            logger.error(f"Failed to initialize all {num_workers} workers")
-            print(f"\n❌ Error: Not all workers could initialize!")
-            print(f"   Try reducing the number of workers or check your system resources.")
-            return False
-        
-        print(f"\n✅ All {num_workers} workers tested successfully!")
-        
         # Skip already processed CNPJs if requested
         if skip_processed:
             logger.info("Checking for already processed CNPJs...")
@@ -599,6 +686,71 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
             print("\n✓ All CNPJs already processed!")
             return True
         
+        # PRE-INITIALIZE ChromeDriver to avoid race condition
+        logger.info("\n" + "="*80)
+        logger.info("Step 1.5: Pre-initializing ChromeDriver")
+        logger.info("="*80)
+        
+        pw_engine = http_client = None
+        if engine == "http":
+            from http_engine import AnbimaHttpClient
+            http_client = AnbimaHttpClient(
+                pool_size=max(num_workers, getattr(config, "HTTP_POOL_SIZE", 8))
+            )
+            # Chrome is only needed for the cookie bootstrap and fallbacks
+            if not preinitialize_chromedriver(headless, True):
+                logger.warning("ChromeDriver unavailable — HTTP engine runs without browser fallback")
+        elif engine == "playwright":
+            from playwright_engine import PlaywrightEngine
+            pw_engine = PlaywrightEngine(headless=headless)
+            if not pw_engine.start():
+                logger.error(f"Failed to start the Playwright engine: {pw_engine.last_init_error}")
+                print(f"\n❌ Error: Failed to start Playwright: {pw_engine.last_init_error}")
+                return False
+        elif not preinitialize_chromedriver(headless, use_stealth):
+            logger.error("Failed to pre-initialize ChromeDriver")
+            print("\n❌ Error: Failed to pre-initialize ChromeDriver!")
+            return False
+        
+        # LAUNCH workers: one parallel round; the healthy browsers do the real run
+        num_workers = max(1, min(num_workers, len(cnpjs)))
+        logger.info("\n" + "="*80)
+        logger.info(f"Step 1.6: Launching {num_workers} workers")
+        logger.info("="*80)
+        
+        standby = None
+        if pw_engine is not None or http_client is not None:
+            if hot_standby != "none":
+                logger.warning(f"Hot standby is a Selenium feature; ignoring with the {engine} engine")
+        elif use_stealth and hot_standby == "worker":
+            standby = True
+        elif use_stealth and hot_standby == "pool":
+            from stealth_scraper import StealthANBIMAScraper
+            from driver_standby import DriverStandby
+            standby = DriverStandby.for_scraper(StealthANBIMAScraper(headless=headless, standby=False,
+                                                                     launch_profile=launch_profile),
+                                                name="pool-standby")
+        elif hot_standby != "none":
+            logger.warning("Hot standby needs --stealth; ignoring")
+
+        worker_scrapers = launch_workers(num_workers, headless, use_stealth, launch_concurrency, standby,
+                                         launch_profile, pw_engine, http_client)
+        if not worker_scrapers:
+            logger.error(f"Failed to initialize any of the {num_workers} workers")
+            print(f"\n❌ Error: No worker could initialize!")
+            print(f"   Try reducing the number of workers or check your system resources.")
+            if pw_engine is not None:
+                pw_engine.close()
+            if http_client is not None:
+                http_client.close()
+            return False
+        
+        if len(worker_scrapers) < num_workers:
+            print(f"\n⚠️  {len(worker_scrapers)}/{num_workers} workers initialized — continuing with those")
+        else:
+            print(f"\n✅ All {num_workers} workers launched successfully!")
+        num_workers = len(worker_scrapers)
+        
         # Divide CNPJs among workers
         logger.info("\n" + "="*80)
         logger.info(f"Step 2: Dividing work among {num_workers} workers")
@@ -613,9 +765,8 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
             # Distribute remainder among first workers
             end_idx = start_idx + chunk_size + (1 if i < remainder else 0)
             chunk = cnpjs[start_idx:end_idx]
-            if chunk:  # Only add non-empty chunks
-                cnpj_chunks.append(chunk)
-                logger.info(f"Worker {i+1} will process {len(chunk)} CNPJs")
+            cnpj_chunks.append(chunk)  # num_workers <= len(cnpjs): never empty
+            logger.info(f"Worker {i+1} will process {len(chunk)} CNPJs")
             start_idx = end_idx
         
         # Start parallel scraping
@@ -634,13 +785,15 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         
         # Create progress bar
         pbar = tqdm(total=len(cnpjs), desc="Overall Progress", unit="fund")
+        hedger = HedgeCoordinator(len(cnpjs), len(cnpj_chunks)) if hedge and len(cnpj_chunks) > 1 else None
         
         # Execute workers in parallel
         with ThreadPoolExecutor(max_workers=len(cnpj_chunks)) as executor:
             # Submit all workers
             futures = []
             for i, chunk in enumerate(cnpj_chunks):
-                future = executor.submit(scrape_worker, i+1, chunk, headless, pbar, use_stealth)
+                future = executor.submit(scrape_worker, i+1, chunk, headless, pbar, use_stealth,
+                                         worker_scrapers[i], hedger, window, all_columns)
                 futures.append(future)
             
             # Wait for all workers to complete
@@ -652,6 +805,20 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         
         pbar.close()
         
+        # Workers only quit their own browser; sweep whatever is left over now
+        # that none of them is running.
+        if standby not in (None, True):
+            standby.close()
+        if http_client is not None:
+            fallbacks = sum(getattr(s, "fallback_count", 0) for s in worker_scrapers)
+            logger.info(f"HTTP engine: {fallbacks} CNPJ(s) fell back to the browser")
+            http_client.close()
+        if pw_engine is not None:
+            pw_engine.close()
+        elif use_stealth or http_client is not None:
+            from stealth_scraper import StealthANBIMAScraper
+            StealthANBIMAScraper.kill_orphan_processes()
+        
         total_time = time.time() - start_time
         
         # Process and save results
@@ -669,6 +836,11 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         
         # Save to Excel
         processor.save_results(df, output_file)
+        long_file = None
+        if all_columns:
+            # Same results, every column: one row per CNPJ x date
+            long_file = processor.all_columns_file(output_file)
+            processor.save_results(processor.process_fidc_data(all_results), long_file)
         
         # Generate summary report
         summary = processor.create_summary_report(all_results)
@@ -684,6 +856,8 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
         print(f"Total time: {total_time/60:.2f} minutes")
         print(f"Average time per CNPJ: {total_time/len(cnpjs):.2f} seconds")
         print(f"Throughput: {len(cnpjs)/(total_time/3600):.2f} CNPJs/hour")
+        if hedger:
+            print(f"Hedged attempts: {hedger.hedges_started} started, {hedger.hedges_won} won")
         
         if summary['error_breakdown']:
             print("\nError breakdown:")
@@ -691,6 +865,8 @@ def main_parallel(input_file: str = "input_cnpjs.xlsx",
                 print(f"  - {error}: {count}")
         
         print(f"\n✓ Results saved to: {output_file}")
+        if long_file:
+            print(f"✓ All columns saved to: {long_file}")
         print(f"✓ Log file saved to: {log_file}")
         print("="*80 + "\n")
         
@@ -748,8 +924,59 @@ if __name__ == "__main__":
         action="store_true",
         help="Use stealth mode (undetected-chromedriver) to avoid bot detection"
     )
+    parser.add_argument(
+        "--launch-profile",
+        choices=["default", "lean"],
+        default=None,
+        help="Chrome flag set: 'default' (stealth-tuned) or 'lean' (low memory) (default: config.CHROME_LAUNCH_PROFILE)"
+    )
+    parser.add_argument(
+        "--hot-standby",
+        choices=["none", "worker", "pool"],
+        default="none",
+        help="Keep a spare browser warming for instant recovery: one per worker, or one for the pool (stealth only)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["selenium", "playwright", "http"],
+        default="selenium",
+        help="Engine: 'selenium' (one Chrome per worker), 'playwright' "
+             "(one Chromium, one lightweight context per worker; needs the playwright package) "
+             "or 'http' (ANBIMA's JSON endpoints, browser only for cookies and fallback)"
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Let idle workers duplicate straggler CNPJs; the first attempt to finish wins (see config.HEDGE_*)"
+    )
+    parser.add_argument(
+        "--launch-concurrency",
+        type=int,
+        default=None,
+        help="Maximum browsers launched at the same time at startup (default: config.MAX_CONCURRENT_LAUNCHES)"
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Only fetch rows on/after this date: dd/mm/yyyy, yyyy-mm-dd or relative (e.g. 6m, 90d, 2y)"
+    )
+    parser.add_argument(
+        "--until",
+        default=None,
+        help="Only fetch rows on/before this date (same formats as --since)"
+    )
+    parser.add_argument(
+        "--all-columns",
+        action="store_true",
+        help="Read every periodic column in the same visit and also save the long "
+             "(FIDC-style) output as <output>_all_columns.xlsx (Selenium: implies --stealth)"
+    )
     
     args = parser.parse_args()
+    try:
+        DateWindow(args.since, args.until)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Run main function
     success = main_parallel(
@@ -758,7 +985,15 @@ if __name__ == "__main__":
         headless=not args.no_headless,
         num_workers=args.workers,
         skip_processed=args.skip_processed,
-        use_stealth=args.stealth
+        use_stealth=args.stealth,
+        launch_concurrency=args.launch_concurrency,
+        hot_standby=args.hot_standby,
+        launch_profile=args.launch_profile,
+        hedge=args.hedge,
+        engine=args.engine,
+        since=args.since,
+        until=args.until,
+        all_columns=args.all_columns
     )
     
     # Exit with appropriate code
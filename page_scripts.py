@@ -0,0 +1,235 @@
+"""
+In-page JavaScript probes shared by the Selenium scrapers.
+
+Each probe runs in a single execute_script() round trip and returns a small
+JSON-able value, instead of a series of find_element() calls (each of which
+can block for the full implicit wait when the element is missing) or a
+page_source download.
+"""
+
+import json
+import re
+from typing import Dict, Optional
+
+# Fund header facts from a fund detail / dados-periodicos page.
+# Returns {name, anbima_code, cnpj, fund_class, header_lines}.
+FUND_METADATA_JS = r"""
+const text = el => ((el && el.innerText) || '').trim();
+const selectors = ['h1', 'h2', '.fund-name', '.fund-title', "[class*='title']", "[class*='name']"];
+let nameEl = null;
+for (const sel of selectors) {
+    const el = document.querySelector(sel);
+    if (el && text(el).length > 5) { nameEl = el; break; }
+}
+const body = text(document.body);
+let name = nameEl ? text(nameEl).split('\n')[0] : null;
+if (!name) {
+    // Same fallback as the old page_source scan: first long "CLASSE" line
+    const line = body.split('\n').find(l => l.toUpperCase().includes('CLASSE') && l.trim().length > 10);
+    name = line ? line.trim() : null;
+}
+// Header block: the nearest ancestor of the title that carries a few lines
+let header = nameEl;
+for (let i = 0; header && i < 3 && text(header).split('\n').length < 4; i++) {
+    header = header.parentElement;
+}
+const headerLines = text(header).split('\n').map(l => l.trim()).filter(l => l && l.length < 200).slice(0, 20);
+const codeMatch = location.pathname.match(/\/fundos\/([^\/?#]+)/);
+const cnpjMatch = (headerLines.join('\n') + '\n' + body.slice(0, 5000)).match(/\d{2}\.\d{3}\.\d{3}\/\d{4}-\d{2}/);
+return {
+    name: name ? name.slice(0, 200) : null,
+    anbima_code: codeMatch ? codeMatch[1] : null,
+    cnpj: cnpjMatch ? cnpjMatch[0] : null,
+    header_lines: headerLines,
+};
+"""
+
+# Fund class keywords as they appear in ANBIMA fund names / headers.
+_FUND_CLASS_PATTERN = re.compile(
+    r"\b(FIDC|FIAGRO|FII|FIP|FIA|FIM|FIRF|FIC|ETF|RENDA FIXA|MULTIMERCADO|"
+    r"A[CÇ][OÕ]ES|CAMBIAL|PREVID[EÊ]NCIA)\b",
+    re.IGNORECASE,
+)
+
+
+def fund_class_from(metadata: Dict) -> str:
+    """First fund-class keyword in the header lines or name ("N/A" if none)."""
+    for line in list(metadata.get("header_lines") or []) + [metadata.get("name") or ""]:
+        match = _FUND_CLASS_PATTERN.search(line)
+        if match:
+            return match.group(1).upper()
+    return "N/A"
+
+
+# Rate-limit / block probe: main-document HTTP status (Navigation Timing
+# Level 2 responseStatus, Chrome 109+), title and HTML size. The HTML itself
+# is only sent back when the page is small — block pages are; real fund
+# pages are hundreds of KB.
+RATE_LIMIT_PROBE_JS = r"""
+const nav = performance.getEntriesByType('navigation')[0];
+const html = document.documentElement ? document.documentElement.outerHTML : '';
+return {
+    url: location.href,
+    title: document.title || '',
+    status: (nav && nav.responseStatus) || null,
+    html_length: html.length,
+    small_html: html.length < 5000 ? html : '',
+};
+"""
+
+RATE_LIMIT_INDICATORS = [
+    "too many requests",
+    "429",
+    "423",
+    "rate limit",
+    "bloqueado",
+    "blocked",
+    "access denied",
+    "temporarily unavailable",
+    "try again later",
+    "tente novamente",
+    "acesso negado",
+]
+
+# Main-document statuses that mean "blocked / slow down", not "page broken".
+RATE_LIMIT_STATUSES = {403, 423, 429, 503}
+
+
+def rate_limit_reason(probe: Dict) -> Optional[str]:
+    """Why a RATE_LIMIT_PROBE_JS result looks rate limited (None if it doesn't)."""
+    url = (probe.get("url") or "").lower()
+    if not url or url.startswith(("data:", "about:blank")):
+        return None  # initial page load
+    status = probe.get("status")
+    if status in RATE_LIMIT_STATUSES:
+        return f"HTTP {status}"
+    title = (probe.get("title") or "").lower()
+    small_html = (probe.get("small_html") or "").lower()
+    # Only trigger if the indicator appears prominently (title, or a small
+    # block page) — not just somewhere in a real page's metadata
+    for indicator in RATE_LIMIT_INDICATORS:
+        if indicator in title:
+            return f"title contains {indicator!r}"
+        if small_html and indicator in small_html:
+            return f"small page contains {indicator!r}"
+    return None
+
+
+# Page readiness: document state, time since the last resource (XHR/fetch,
+# script, image...) finished loading, and whether `arguments[0]` (a CSS
+# selector, optional) is in the DOM. The resource buffer is enlarged so a
+# busy SPA doesn't stop recording entries at the default 250.
+PAGE_READY_JS = r"""
+const sel = arguments[0];
+performance.setResourceTimingBufferSize(5000);
+const entries = performance.getEntriesByType('resource');
+let lastEnd = 0;
+for (const e of entries) { if (e.responseEnd > lastEnd) lastEnd = e.responseEnd; }
+return {
+    ready_state: document.readyState,
+    resources: entries.length,
+    idle_ms: performance.now() - lastEnd,
+    selector_found: sel ? document.querySelector(sel) !== null : true,
+};
+"""
+
+
+# Periodic table in one round trip: header texts and every body row's cell
+# texts (null when the page has no table).
+PERIODIC_TABLE_JS = r"""
+const table = document.querySelector('table');
+if (!table) return null;
+const texts = els => Array.from(els).map(c => (c.innerText || '').trim());
+const thead = table.querySelector('thead');
+const tbody = table.querySelector('tbody') || table;
+return {
+    headers: thead ? texts(thead.querySelectorAll('th, td')) : [],
+    rows: Array.from(tbody.querySelectorAll('tr')).map(tr => texts(tr.querySelectorAll('td'))),
+};
+"""
+
+
+# The current origin's localStorage (and the UA the cookies were issued to),
+# for SessionStateStore.export_from_driver().
+LOCAL_STORAGE_DUMP_JS = r"""
+const items = {};
+try {
+    for (let i = 0; i < localStorage.length; i++) {
+        const key = localStorage.key(i);
+        items[key] = localStorage.getItem(key);
+    }
+} catch (e) {}
+return {origin: location.origin, items: items, user_agent: navigator.userAgent};
+"""
+
+# Whether the cookie banner's "Prosseguir" is showing, without the implicit
+# wait a find_element() miss costs.
+COOKIE_BANNER_PROBE_JS = r"""
+return Array.from(document.querySelectorAll('a, button'))
+    .some(el => (el.innerText || '').trim() === 'Prosseguir');
+"""
+
+
+# Whether a finished search results page says it found nothing (so a missing
+# result list means "no fund", not "still loading").
+NO_RESULTS_JS = r"""
+if (document.readyState !== 'complete' || !document.body) return false;
+const text = (document.body.innerText || '').toLowerCase();
+return /nenhum (fundo|resultado)|não encontramos|sem resultados/.test(text);
+"""
+
+
+def seed_local_storage_js(origin: str, items: Dict[str, str]) -> str:
+    """New-document script that seeds `items` into `origin`'s localStorage.
+
+    Keys the page already holds are left alone, so a live session's own
+    state wins over the saved one.
+    """
+    return (
+        "(() => {\n"
+        f"    const origin = {json.dumps(origin)};\n"
+        f"    const items = {json.dumps(items)};\n"
+        "    if (location.origin !== origin) return;\n"
+        "    try {\n"
+        "        for (const [key, value] of Object.entries(items)) {\n"
+        "            if (localStorage.getItem(key) === null) localStorage.setItem(key, value);\n"
+        "        }\n"
+        "    } catch (e) {}\n"
+        "})();"
+    )
+
+
+# Periodic rows not read by an earlier call, for an incremental harvest while
+# the table scrolls (row_harvest.RowHarvest). arguments[0] is
+# {indexes, required, prune, keep}: the cell texts at `indexes` (-1 = column
+# not on the page, read as '') come back for each row whose first `required`
+# cells are filled, and the row is marked read. Short rows and rows still
+# rendering are left for the next call. With `prune`, read rows are removed
+# from the DOM but for the last `keep`. null when the page has no table.
+HARVEST_ROWS_JS = r"""
+const opts = arguments[0];
+const table = document.querySelector('table');
+const tbody = table ? (table.querySelector('tbody') || table) : null;
+if (!tbody) return null;
+const MARK = 'data-cota-harvested';
+const rows = Array.from(tbody.querySelectorAll('tr'));
+const fresh = [];
+for (const tr of rows) {
+    if (tr.hasAttribute(MARK)) continue;
+    const cells = tr.querySelectorAll('td');
+    if (opts.indexes.some(i => i >= cells.length)) continue;
+    const texts = opts.indexes.map(i => i < 0 ? '' : (cells[i].innerText || '').trim());
+    if (texts.slice(0, opts.required).some(t => !t)) continue;
+    tr.setAttribute(MARK, '');
+    fresh.push(texts);
+}
+let pruned = 0;
+if (opts.prune) {
+    const read = rows.filter(tr => tr.hasAttribute(MARK));
+    for (const tr of read.slice(0, Math.max(read.length - opts.keep, 0))) {
+        tr.remove();
+        pruned++;
+    }
+}
+return {rows: fresh, in_dom: rows.length - pruned, pruned: pruned};
+"""
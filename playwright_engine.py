@@ -0,0 +1,600 @@
+"""
+Async Playwright engine: many lightweight browser contexts in one Chromium.
+
+The Selenium scrapers need one thread and one full Chrome per worker. Here a
+PlaywrightEngine runs a single Chromium and an asyncio loop in a background
+thread; every PlaywrightANBIMAScraper is an isolated browser context (own
+cookies, cache and page) inside it, so a worker costs a context instead of a
+browser. Waits are Playwright's async waits, images/media/fonts are blocked
+with a native request route (PLAYWRIGHT_BLOCKED_RESOURCES), and the per-CNPJ
+deadline is asyncio.wait_for — an expired scrape is cancelled in place.
+
+PlaywrightANBIMAScraper follows the scrapers' contract (setup_driver,
+scrape_fund_data, scrape_fidc_data, retry_policy, cancel, close), so the
+thread-based loops in main_parallel.py and streamlit_app.py drive it
+unchanged; the async API (ascrape_fund_data / ascrape_fidc_data) is there for
+asyncio callers.
+
+Playwright is optional: `pip install playwright && playwright install
+chromium`. It is only imported when an engine starts.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import config
+from date_window import DateWindow
+from fund_catalog import FundCatalog
+from page_scripts import (
+    FUND_METADATA_JS,
+    HARVEST_ROWS_JS,
+    PERIODIC_TABLE_JS,
+    RATE_LIMIT_PROBE_JS,
+    RATE_LIMIT_STATUSES,
+    rate_limit_reason,
+)
+from retry_policy import OTHER, RetryPolicy, classify
+from row_harvest import RowHarvest
+from stealth_scraper import StealthANBIMAScraper, combined_views, filter_subclass_links
+
+# Same header matchers as the Selenium scrapers: label -> (must_contain_all,
+# must_not_contain), matched against the upper-cased header text.
+FUND_COLUMNS = [
+    ("Data da cotização", (("DATA", "COMPET"), ())),
+    ("Valor cota", (("VALOR", "COTA"), ("PATRIMÔNIO",))),
+]
+FIDC_COLUMNS = StealthANBIMAScraper.FIDC_COLUMNS
+
+# Result anchors (fund code + card text) from a search results page
+RESULT_LINKS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(a => ({
+    href: a.href,
+    text: (a.innerText || '').trim(),
+    card: ((a.closest('article') || {}).innerText || '').trim(),
+}))
+"""
+
+SCROLL_TO_BOTTOM_JS = "() => { window.scrollTo(0, document.body.scrollHeight); return document.body.scrollHeight; }"
+
+
+def _as_function(script: str) -> str:
+    """Wrap a page_scripts probe (body with `return`) for page.evaluate()."""
+    return "function() {\n" + script + "\n}"
+
+
+def _import_playwright():
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError as e:
+        raise ImportError(
+            "The Playwright engine needs the playwright package: "
+            "pip install playwright && playwright install chromium"
+        ) from e
+    return async_playwright
+
+
+def map_columns(headers: List[str], columns) -> Dict[str, int]:
+    """Header index per column label (labels that match nothing are left out)."""
+    found = {}
+    for idx, header in enumerate(headers):
+        h = header.upper()
+        for label, (must_all, must_not) in columns:
+            if label in found:
+                continue
+            if all(tok in h for tok in must_all) and not any(tok in h for tok in must_not):
+                found[label] = idx
+    return found
+
+
+class PlaywrightEngine:
+    """One Chromium process and one asyncio loop thread shared by many scrapers."""
+
+    def __init__(self, headless: bool = True, proxy: Optional[str] = None):
+        """
+        Args:
+            headless: Whether to run Chromium headless
+            proxy: Optional upstream proxy as scheme://host:port
+        """
+        self.headless = headless
+        self.proxy = proxy
+        self.logger = logging.getLogger(__name__)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.browser = None
+        self.last_init_error: Optional[str] = None
+        self._playwright = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.browser is not None
+
+    def start(self) -> bool:
+        """Start the loop thread and launch Chromium (no-op if already running)."""
+        with self._lock:
+            if self.browser is not None:
+                return True
+            try:
+                async_playwright = _import_playwright()
+                self.loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self.loop.run_forever, name="playwright-loop", daemon=True
+                )
+                self._thread.start()
+                self.run(self._launch(async_playwright))
+                self.logger.info("Playwright Chromium launched")
+                return True
+            except Exception as e:
+                self.last_init_error = str(e)
+                self.logger.error(f"Could not start the Playwright engine: {e}")
+                self._stop_loop()
+                return False
+
+    async def _launch(self, async_playwright):
+        self._playwright = await async_playwright().start()
+        launch_args = {
+            "headless": self.headless,
+            "args": list(getattr(config, "PLAYWRIGHT_CHROME_ARGS", [])),
+        }
+        if self.proxy:
+            launch_args["proxy"] = {"server": self.proxy}
+        self.browser = await self._playwright.chromium.launch(**launch_args)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the engine's loop from any other thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def new_context(self):
+        """An isolated context (cookies, cache, storage) with heavy resources blocked."""
+        context = await self.browser.new_context(
+            locale="pt-BR",
+            viewport={"width": 1366, "height": 900},
+            user_agent=getattr(config, "PLAYWRIGHT_USER_AGENT", None),
+        )
+        blocked = set(getattr(config, "PLAYWRIGHT_BLOCKED_RESOURCES", ("image", "media", "font")))
+        if blocked:
+            async def route(request_route):
+                if request_route.request.resource_type in blocked:
+                    await request_route.abort()
+                else:
+                    await request_route.continue_()
+
+            await context.route("**/*", route)
+        context.set_default_timeout(getattr(config, "READY_TIMEOUT", 30) * 1000)
+        context.set_default_navigation_timeout(config.PAGE_LOAD_TIMEOUT * 1000)
+        return context
+
+    async def _shutdown(self):
+        try:
+            if self.browser is not None:
+                await self.browser.close()
+        finally:
+            self.browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def _stop_loop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            self.loop.close()
+        self.loop, self._thread = None, None
+
+    def close(self):
+        """Close Chromium and stop the loop thread."""
+        with self._lock:
+            if self.loop is None:
+                return
+            try:
+                self.run(self._shutdown(), timeout=30)
+            except Exception as e:
+                self.logger.warning(f"Playwright shutdown failed: {e}")
+            self._stop_loop()
+
+
+class PlaywrightANBIMAScraper:
+    """scrape_fund_data / scrape_fidc_data over one Playwright browser context"""
+
+    def __init__(
+        self,
+        headless: bool = True,
+        engine: Optional[PlaywrightEngine] = None,
+        proxy: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter=None,
+    ):
+        """
+        Args:
+            headless: Whether to run Chromium headless (private engine only)
+            engine: Shared PlaywrightEngine; pass the same one to every worker
+                so they share one browser. A private engine is started (and
+                closed with this scraper) when omitted.
+            proxy: Optional upstream proxy (private engine only)
+            retry_policy: Shared RetryPolicy (per-CNPJ budgets, failure
+                categories); a private one is created if omitted
+            rate_limiter: Optional shared limiter (wait_if_needed()) paced
+                before every FIDC subclass page is opened
+        """
+        self.engine = engine or PlaywrightEngine(headless=headless, proxy=proxy)
+        self.rate_limiter = rate_limiter
+        self._owns_engine = engine is None
+        self.logger = logging.getLogger(__name__)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.catalog = FundCatalog.from_config()  # known CNPJs skip the search
+        self.context = None
+        self.page = None
+        self.driver_mode = "Playwright (async browser contexts)"
+        self.last_init_error: Optional[str] = None
+        self.last_init_traceback: Optional[str] = None
+        self._driver_permanently_dead = False  # parity with the stealth scraper
+        self.cancel_reason: Optional[str] = None
+        self._future = None  # the scrape running on the engine's loop
+        self._cancel_cnpj: Optional[str] = None  # CNPJ a pending cancel() is aimed at
+
+    # -- lifecycle -----------------------------------------------------------
+    def setup_driver(self) -> bool:
+        """Start the engine if needed and open this scraper's context."""
+        try:
+            if not self.engine.start():
+                self.last_init_error = self.engine.last_init_error
+                return False
+            self.context, self.page = self.engine.run(self._open_context())
+            return True
+        except Exception as e:
+            self.last_init_error = str(e)
+            self.last_init_traceback = traceback.format_exc()
+            self.logger.error(f"Could not open a Playwright context: {e}")
+            return False
+
+    async def _open_context(self):
+        context = await self.engine.new_context()
+        return context, await context.new_page()
+
+    def is_driver_alive(self) -> bool:
+        return self.page is not None and not self.page.is_closed()
+
+    def close(self, kill_orphans: bool = False):
+        """Close this scraper's context (and the engine, if it is private)
+
+        Args:
+            kill_orphans: Accepted for parity with StealthANBIMAScraper.close()
+        """
+        if self.context is not None and self.engine.running:
+            try:
+                self.engine.run(self.context.close(), timeout=30)
+            except Exception as e:
+                self.logger.warning(f"Could not close Playwright context: {e}")
+        self.context = self.page = None
+        if self._owns_engine:
+            self.engine.close()
+
+    def cancel(self, reason: str = "Cancelled", cnpj: Optional[str] = None):
+        """Cancel the running scrape (thread-safe); it returns Status=`reason`.
+
+        With `cnpj`, a cancel that arrives before that CNPJ's call has
+        started still stops it.
+        """
+        self.cancel_reason = reason
+        self._cancel_cnpj = cnpj
+        future = self._future
+        if future is not None:
+            future.cancel()
+
+    # -- sync contract -------------------------------------------------------
+    def _run_scrape(self, coro, cnpj: str, timeout: float, empty: Dict) -> Dict:
+        """Run one scrape coroutine under a wall-clock deadline and budget."""
+        budget = self.retry_policy.budget(cnpj)
+        if not budget.begin_attempt("scraper"):
+            coro.close()
+            result, category = dict(empty, Status="Retry budget exhausted"), OTHER
+        else:
+            if not self.is_driver_alive() and not self.setup_driver():
+                coro.close()
+                result = dict(empty, Status=f"Driver error: {self.last_init_error}")
+                self._driver_permanently_dead = True  # missing Playwright / Chromium won't come back
+            elif self._cancel_cnpj == cnpj and self.cancel_reason:
+                coro.close()  # cancelled before it started
+                result = dict(empty, Status=self.cancel_reason)
+            else:
+                self.cancel_reason = None
+                self._future = self.engine.submit(asyncio.wait_for(coro, timeout))
+                try:
+                    result = self._future.result()
+                except asyncio.TimeoutError:
+                    result = dict(empty, Status=f"Timeout: scrape of {cnpj} exceeded {timeout:.0f}s")
+                except Exception as e:  # CancelledError included
+                    status = self.cancel_reason or f"Error: {str(e) or type(e).__name__}"
+                    result = dict(empty, Status=status)
+                finally:
+                    self._future = None
+            self._cancel_cnpj = None
+            category = classify(result["Status"])
+            budget.end_attempt("scraper", category, result["Status"])
+        self.retry_policy.annotate(result, budget, category)
+        if self._driver_permanently_dead:
+            result["attempts_left"] = 0
+        if category not in self.retry_policy.RETRYABLE or budget.exhausted:
+            self.retry_policy.release(cnpj)
+        return result
+
+    def scrape_fund_data(self, cnpj: str, since=None, until=None) -> Dict:
+        """Complete scraping workflow for one CNPJ (same result as the Selenium scrapers)."""
+        empty = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": []}
+        return self._run_scrape(
+            self.ascrape_fund_data(cnpj, DateWindow.of(since, until)), cnpj,
+            getattr(config, "CNPJ_WALL_TIMEOUT", 150), empty,
+        )
+
+    def scrape_combined_data(self, cnpj: str, since=None, until=None) -> Dict:
+        """scrape_fund_data() reading every column, with the FIDC-shaped "subclasses" too."""
+        empty = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": [], "subclasses": []}
+        return self._run_scrape(
+            self.ascrape_fund_data(cnpj, DateWindow.of(since, until), all_columns=True), cnpj,
+            getattr(config, "CNPJ_WALL_TIMEOUT", 150), empty,
+        )
+
+    def scrape_fidc_data(self, cnpj: str, since=None, until=None,
+                         desired: Optional[str] = None) -> Dict:
+        """Complete FIDC workflow for one CNPJ (every subclass, or those matching `desired`)."""
+        empty = {"CNPJ": cnpj, "subclasses": []}
+        return self._run_scrape(
+            self.ascrape_fidc_data(cnpj, DateWindow.of(since, until), desired), cnpj,
+            getattr(config, "FIDC_WALL_TIMEOUT", 420), empty,
+        )
+
+    # -- async workflow ------------------------------------------------------
+    async def _pause(self, low: float, high: float):
+        if high > 0:
+            await asyncio.sleep(random.uniform(low, high))
+
+    async def _goto(self, url: str, selector: str, page=None) -> Tuple[bool, str]:
+        """
+        Navigate and wait until `selector` is present and the network is quiet
+
+        Args:
+            page: Page to navigate (default: this scraper's page)
+
+        Returns:
+            (True, "ok"), (False, "Rate limited") or (False, "missing")
+        """
+        page = page or self.page
+        self.logger.info(f"Opening {url}")
+        response = await page.goto(url, wait_until="domcontentloaded")
+        if response is not None and response.status in RATE_LIMIT_STATUSES:
+            self.logger.warning(f"Rate limiting detected: HTTP {response.status}")
+            return False, "Rate limited"
+        try:
+            await page.wait_for_selector(selector, state="attached")
+        except Exception:
+            probe = await page.evaluate(_as_function(RATE_LIMIT_PROBE_JS))
+            reason = rate_limit_reason(probe or {})
+            if reason:
+                self.logger.warning(f"Rate limiting detected: {reason}")
+                return False, "Rate limited"
+            return False, "missing"
+        try:
+            await page.wait_for_load_state(
+                "networkidle", timeout=getattr(config, "NETWORK_QUIET_MAX_WAIT", 3.0) * 1000
+            )
+        except Exception:
+            pass  # background polling: the selector is there, carry on
+        await self._pause(*getattr(config, "STEALTH_JITTER", (0.5, 1.5)))
+        return True, "ok"
+
+    async def _read_table(self, columns, required: int, window: Optional[DateWindow] = None,
+                          page=None) -> Tuple[bool, List[Dict], str]:
+        """
+        Scroll until no more rows load (or the rows are older than
+        window.since), harvesting the rows on every step
+
+        Args:
+            columns: FUND_COLUMNS or FIDC_COLUMNS
+            required: How many of the leading labels must be found (and filled)
+            window: Optional since / until bounds on the rows
+            page: Page holding the table (default: this scraper's page)
+        """
+        page = page or self.page
+        table = await page.evaluate(_as_function(PERIODIC_TABLE_JS))
+        if not table:
+            return False, [], "No table found on page"
+        col_idx = map_columns(table.get("headers") or [], columns)
+        if any(label not in col_idx for label, _ in columns[:required]):
+            return False, [], "Could not find required columns in table"
+
+        harvest = RowHarvest([label for label, _ in columns], required=required, window=window)
+        harvest.bind([col_idx.get(label) for label, _ in columns])
+        last_height, same_height_count = 0, 0
+        for _ in range(50):
+            added = await self._harvest_step(harvest, page)
+            if harvest.passed:
+                break
+            await page.evaluate(SCROLL_TO_BOTTOM_JS)
+            await self._pause(0.8, 1.5)
+            new_height = await page.evaluate("() => document.body.scrollHeight")
+            if new_height == last_height and not added:
+                same_height_count += 1
+                if same_height_count >= 3:
+                    break
+            else:
+                same_height_count = 0
+            last_height = new_height
+        if not harvest.passed:
+            await self._harvest_step(harvest, page)
+
+        if not len(harvest) and harvest.skipped:
+            return True, [], f"No records in the date window {harvest.window}"
+        if not len(harvest):
+            return False, [], "No data extracted from table"
+        return True, harvest.records(), f"Extracted {len(harvest)} periodic data records"
+
+    async def _harvest_step(self, harvest: RowHarvest, page=None) -> int:
+        """RowHarvest.step() over page.evaluate(); returns how many rows the page added."""
+        batch = await (page or self.page).evaluate(
+            _as_function(HARVEST_ROWS_JS), harvest.script_args()
+        )
+        rows = (batch or {}).get("rows") or []
+        harvest.add(rows)
+        return len(rows)
+
+    async def _collect_subclass(self, sub: Dict, window: Optional[DateWindow],
+                                tabs: asyncio.Semaphore):
+        """
+        One subclass's table in a page of its own
+
+        Returns:
+            The subclass dict, None when its page has no table, or
+            "Rate limited"
+        """
+        async with tabs:
+            if self.rate_limiter is not None:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.rate_limiter.wait_if_needed
+                )
+            base = sub["href"].split("?")[0].split("#")[0].rstrip("/")
+            url = base if base.endswith("/dados-periodicos") else f"{base}/dados-periodicos"
+            page = await self.context.new_page()
+            try:
+                ok, status = await self._goto(url, "table", page)
+                if status == "Rate limited":
+                    return status
+                if not ok:
+                    self.logger.warning(f"[FIDC] Skipping subclass {sub['code']}: no table")
+                    return None
+                ok, rows, msg = await self._read_table(FIDC_COLUMNS, required=1,
+                                                       window=window, page=page)
+                if not ok:
+                    self.logger.warning(f"[FIDC] No data for subclass {sub['code']}: {msg}")
+                return {
+                    "subclasse_name": sub["name"],
+                    "subclasse_code": sub["code"],
+                    "periodic_data": rows if ok else [],
+                }
+            finally:
+                await page.close()
+
+    async def _result_links(self, cnpj: str, selector: str) -> Tuple[bool, List[Dict], str]:
+        url = f"{config.ANBIMA_BASE_URL}?q={quote(cnpj)}"
+        ok, status = await self._goto(url, "article")
+        if not ok:
+            return False, [], "Rate limited" if status == "Rate limited" else f"No results found for CNPJ: {cnpj}"
+        return True, await self.page.evaluate(RESULT_LINKS_JS, selector), "ok"
+
+    async def ascrape_fund_data(self, cnpj: str, window: Optional[DateWindow] = None,
+                                all_columns: bool = False) -> Dict:
+        """scrape_fund_data() (scrape_combined_data() with `all_columns`) as a coroutine on the engine's loop."""
+        result = {"CNPJ": cnpj, "Nome do Fundo": "N/A", "periodic_data": [], "Status": "Unknown error"}
+        if all_columns:
+            result["subclasses"] = []
+        fund = self.catalog.fund(cnpj) if self.catalog is not None else None
+        if fund:
+            self.logger.info(f"{cnpj}: {fund['code']} from the fund catalog, skipping the search")
+            code, result["Nome do Fundo"] = fund["code"], fund["name"]
+        else:
+            ok, links, status = await self._result_links(cnpj, "article a[href*='/fundos/C']")
+            if not ok:
+                result["Status"] = status
+                return result
+            if not links:
+                result["Status"] = "No fund found for this CNPJ"
+                return result
+
+            link = links[0]
+            code = link["href"].split("/fundos/")[1].split("/")[0].split("?")[0].split("#")[0]
+            name = link["text"].split("\n")[0]
+            if len(name) <= 5:
+                name = link["card"].split("\n")[0]
+            result["Nome do Fundo"] = name[:200] if len(name) > 5 else "N/A"
+
+        site_root = config.ANBIMA_BASE_URL.split("/busca/")[0]
+        ok, status = await self._goto(f"{site_root}/fundos/{code}/dados-periodicos", "table")
+        if not ok:
+            if fund and status != "Rate limited":
+                self.catalog.forget(cnpj)  # possibly stale: the retry searches for real
+            result["Status"] = "Rate limited" if status == "Rate limited" else "No table found on page"
+            return result
+        if result["Nome do Fundo"] == "N/A":
+            metadata = await self.page.evaluate(_as_function(FUND_METADATA_JS)) or {}
+            result["Nome do Fundo"] = metadata.get("name") or "N/A"
+
+        if all_columns:
+            ok, data, message = await self._read_table(FIDC_COLUMNS, required=1, window=window)
+        else:
+            ok, data, message = await self._read_table(FUND_COLUMNS, required=2, window=window)
+        if not ok:
+            result["Status"] = message
+            return result
+        if all_columns:
+            result["periodic_data"], result["subclasses"] = combined_views(
+                result["Nome do Fundo"], code, data
+            )
+        else:
+            result["periodic_data"] = data
+        result["Status"] = "Success"
+        return result
+
+    async def ascrape_fidc_data(self, cnpj: str, window: Optional[DateWindow] = None,
+                                desired: Optional[str] = None) -> Dict:
+        """scrape_fidc_data() as a coroutine on the engine's loop."""
+        result = {"CNPJ": cnpj, "Status": "Unknown error", "subclasses": []}
+        subclasses = self.catalog.subclasses(cnpj) if self.catalog is not None else []
+        cataloged = bool(subclasses)
+        if cataloged:
+            self.logger.info(f"[FIDC] {len(subclasses)} subclass(es) of {cnpj} from the fund catalog")
+        else:
+            ok, links, status = await self._result_links(cnpj, "article a[href*='/fundos/']")
+            if not ok:
+                result["Status"] = status
+                return result
+            if not links:
+                links = await self.page.evaluate(RESULT_LINKS_JS, "a[href*='/fundos/']")
+
+            seen_hrefs = set()
+            for link in links:
+                href = link["href"]
+                if not href or "/fundos/" not in href or "/busca/" in href or href in seen_hrefs:
+                    continue
+                seen_hrefs.add(href)
+                name = link["text"] or link["card"].split("\n")[0] or "N/A"
+                code = href.rstrip("/").split("/fundos/")[-1].split("/")[0].split("?")[0]
+                subclasses.append({"name": name[:200], "href": href, "code": code})
+            if not subclasses:
+                result["Status"] = "No subclasses found for this CNPJ"
+                return result
+            self.logger.info(f"[FIDC] Found {len(subclasses)} subclass(es) for {cnpj}")
+        if desired:
+            subclasses, matched = filter_subclass_links(desired, subclasses)
+            result["subclass_filter"] = "matched" if matched else "no match"
+
+        # Subclass pages load and scroll concurrently, FIDC_PARALLEL_TABS at
+        # a time, each in its own page of this context; gather() keeps the
+        # search order.
+        tabs = asyncio.Semaphore(max(1, int(getattr(config, "FIDC_PARALLEL_TABS", 1))))
+        collected = await asyncio.gather(
+            *(self._collect_subclass(sub, window, tabs) for sub in subclasses),
+            return_exceptions=True,
+        )
+        for sub, outcome in zip(subclasses, collected):
+            if isinstance(outcome, BaseException):
+                self.logger.warning(f"[FIDC] Subclass {sub['code']} failed: {outcome}")
+        # The subclasses that did come back are kept whatever happened to the others
+        result["subclasses"] = [c for c in collected if isinstance(c, dict)]
+        if "Rate limited" in collected:
+            result["Status"] = "Rate limited"
+        elif not result["subclasses"] and cataloged:
+            # Not one cataloged subclass page opened: search for real instead
+            self.catalog.forget(cnpj)
+            return await self.ascrape_fidc_data(cnpj, window, desired)
+        else:
+            result["Status"] = "Success" if result["subclasses"] else "No data extracted"
+        return result
@@ -0,0 +1,300 @@
+"""
+Central retry policy: failure categories, per-CNPJ budgets, decision trail.
+
+A bad CNPJ used to go through three nested retry loops (the CLI / worker
+loop, scrape_fund_data's own loop and safe_driver_operation), each with its
+own counter and sleeps, and the kind of failure was guessed from substrings
+of the status text in several places. RetryPolicy is the one place that:
+
+  - classifies a failure into a category (classify());
+  - keeps one RetryBudget per CNPJ — attempts and active scraping seconds —
+    that every layer draws on, because they all ask the same policy;
+  - decides whether (and after how long) a failed CNPJ is worth another
+    try (decide()), logging each decision and keeping the trail on the
+    result (result["retry_trail"]).
+
+Worst case per fund: CNPJ_ATTEMPT_BUDGET attempts, at most CNPJ_TIME_BUDGET
+seconds of active scraping, plus the policy's bounded backoffs.
+
+Callers don't sit out those backoffs: a CNPJ worth retrying goes into a
+DeferredRetryQueue with a not-before timestamp, and the loop carries on with
+fresh CNPJs until the backoff has expired (or the fresh ones run out).
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import config
+
+NOT_FOUND = "not_found"
+RATE_LIMITED = "rate_limited"
+DRIVER_DEAD = "driver_dead"
+TIMEOUT = "timeout"
+PARSE_ERROR = "parse_error"
+OTHER = "other"  # anything that doesn't fit the above
+
+CATEGORIES = (NOT_FOUND, RATE_LIMITED, DRIVER_DEAD, TIMEOUT, PARSE_ERROR, OTHER)
+
+# Status-text markers per category, checked in this order (lower-case).
+_STATUS_MARKERS = [
+    (NOT_FOUND, ("no fund found", "no results found", "no subclasses found", "not found")),
+    (RATE_LIMITED, ("rate limit",)),
+    (DRIVER_DEAD, ("driver", "connection lost", "chrome not reachable", "invalid session")),
+    (TIMEOUT, ("timeout", "timed out")),
+    (PARSE_ERROR, (
+        "no table", "required columns", "date column", "no data", "could not read",
+        "error processing table", "could not determine fund url",
+    )),
+]
+
+
+def classify(status: Optional[str] = None, exc: Optional[BaseException] = None) -> Optional[str]:
+    """Failure category for a result status and/or exception (None = success)."""
+    if exc is not None:
+        if isinstance(exc, TimeoutException):
+            return TIMEOUT
+        if isinstance(exc, WebDriverException):
+            return DRIVER_DEAD
+    if status == "Success" and exc is None:
+        return None
+    lowered = (status or str(exc or "")).lower()
+    for category, markers in _STATUS_MARKERS:
+        if any(marker in lowered for marker in markers):
+            return category
+    return OTHER
+
+
+class RetryBudget:
+    """Attempts and active seconds one CNPJ may still spend, plus its trail."""
+
+    def __init__(self, cnpj: str, max_attempts: int, time_budget: float):
+        self.cnpj = cnpj
+        self.max_attempts = max_attempts
+        self.time_budget = time_budget
+        self.attempts = 0
+        self.active_seconds = 0.0
+        self.trail = []  # "[layer] message" entries, oldest first
+        # thread id -> start of its running attempt (a hedge runs a CNPJ's
+        # attempts on two workers at once, both drawing from this budget)
+        self._attempt_started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def attempts_left(self) -> int:
+        return max(self.max_attempts - self.attempts, 0)
+
+    @property
+    def time_left(self) -> float:
+        now = time.time()
+        running = sum(now - started for started in list(self._attempt_started.values()))
+        return max(self.time_budget - self.active_seconds - running, 0.0)
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.attempts_left or self.time_left <= 0
+
+    def begin_attempt(self, layer: str) -> bool:
+        """Consume one attempt (False if the budget is spent)."""
+        with self._lock:
+            if self.exhausted:
+                return False
+            self.attempts += 1
+            attempt = self.attempts
+            self._attempt_started[threading.get_ident()] = time.time()
+        self.note(layer, f"attempt {attempt}/{self.max_attempts} "
+                         f"({self.time_left:.0f}s left)")
+        return True
+
+    def end_attempt(self, layer: str, category: Optional[str], status: str):
+        """Book the attempt's time and outcome."""
+        with self._lock:
+            started = self._attempt_started.pop(threading.get_ident(), None)
+            if started is not None:
+                self.active_seconds += time.time() - started
+        self.note(layer, "success" if category is None else f"{category}: {status}")
+
+    def charge(self, seconds: float):
+        """Book time spent on this CNPJ outside an attempt (in-place sleeps)."""
+        self.active_seconds += seconds
+
+    def note(self, layer: str, message: str):
+        self.trail.append(f"[{layer}] {message}")
+
+
+class RetryPolicy:
+    """Classifies failures and owns the per-CNPJ retry budgets."""
+
+    # Categories where another attempt can help.
+    RETRYABLE = {RATE_LIMITED, DRIVER_DEAD, TIMEOUT, PARSE_ERROR, OTHER}
+
+    def __init__(self, max_attempts: Optional[int] = None, time_budget: Optional[float] = None):
+        """
+        Args:
+            max_attempts: Attempts per CNPJ across all layers
+                (default: config.CNPJ_ATTEMPT_BUDGET)
+            time_budget: Active scraping seconds per CNPJ
+                (default: config.CNPJ_TIME_BUDGET)
+        """
+        self.max_attempts = max_attempts or getattr(
+            config, "CNPJ_ATTEMPT_BUDGET", getattr(config, "MAX_RETRIES", 3)
+        )
+        self.time_budget = time_budget or getattr(config, "CNPJ_TIME_BUDGET", 300)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, RetryBudget] = {}
+
+    def budget(self, cnpj: str) -> RetryBudget:
+        """The CNPJ's budget, created on first use (shared by every layer)."""
+        with self._lock:
+            if cnpj not in self._budgets:
+                self._budgets[cnpj] = RetryBudget(cnpj, self.max_attempts, self.time_budget)
+            return self._budgets[cnpj]
+
+    def release(self, cnpj: str):
+        """Forget a CNPJ's budget (done with it, for good or bad)."""
+        with self._lock:
+            self._budgets.pop(cnpj, None)
+
+    def backoff(self, category: Optional[str], attempt: int) -> float:
+        """Seconds to wait before attempt number `attempt + 1`."""
+        if category == RATE_LIMITED:
+            base = getattr(config, "RATE_LIMIT_BACKOFF", 60)
+            cap = getattr(config, "RATE_LIMIT_BACKOFF_MAX", 240)
+            return min(base * (2 ** max(attempt - 1, 0)), cap)
+        return getattr(config, "RETRY_DELAY", 4) * (1.5 ** max(attempt - 1, 0))
+
+    def annotate(self, result: Dict, budget: RetryBudget, category: Optional[str]):
+        """Stamp a scrape result with its category and remaining budget."""
+        result["error_category"] = category
+        result["attempts_left"] = budget.attempts_left
+        result["time_left"] = round(budget.time_left, 1)
+        result["retry_trail"] = list(budget.trail)
+
+    def decide(self, result: Dict, layer: str = "caller") -> Tuple[bool, float, str]:
+        """
+        Whether a caller should scrape this result's CNPJ again, and when
+
+        Args:
+            result: A scrape result (annotated by the scraper)
+            layer: Who is asking, for the decision trail
+
+        Returns:
+            Tuple of (retry: bool, delay_seconds: float, reason: str)
+        """
+        status = result.get("Status", "")
+        category = result.get("error_category", classify(status))
+        retry, delay = False, 0.0
+        if category is None:
+            reason = "success"
+        elif category not in self.RETRYABLE:
+            reason = f"{category} is final"
+        elif not result.get("attempts_left", 1):
+            reason = f"{category}, attempt budget spent"
+        elif result.get("time_left", 1) <= 0:
+            reason = f"{category}, time budget spent"
+        else:
+            attempt = self.max_attempts - result.get("attempts_left", self.max_attempts)
+            retry, delay = True, self.backoff(category, attempt)
+            reason = f"{category}, retry in {delay:.0f}s"
+
+        entry = f"[{layer}] {'retry' if retry else 'stop'}: {reason}"
+        result.setdefault("retry_trail", []).append(entry)
+        self.logger.info(f"{result.get('CNPJ', '?')}: {entry}")
+        with self._lock:
+            budget = self._budgets.get(result.get("CNPJ", ""))
+        if budget is not None:
+            budget.trail.append(entry)  # later results carry the caller's decisions too
+        if not retry:
+            self.release(result.get("CNPJ", ""))
+        return retry, delay, reason
+
+
+class DeferredRetryQueue:
+    """CNPJs waiting out a retry backoff, earliest not-before first.
+
+    run() interleaves them with the fresh items of a scrape loop:
+
+        deferred = DeferredRetryQueue()
+        for cnpj in deferred.run(cnpjs):
+            result = scraper.scrape_fund_data(cnpj)
+            retry, delay, _ = scraper.retry_policy.decide(result)
+            if retry:
+                deferred.push(cnpj, delay, result)
+                continue
+            ...  # final result
+
+    A deferred CNPJ comes back as soon as its backoff has expired (checked
+    before each fresh item); once the fresh items are exhausted, run() sleeps
+    until the next one is due.
+    """
+
+    def __init__(self, name: str = "deferred"):
+        """
+        Args:
+            name: Log label (e.g. the worker's name)
+        """
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, Any, Optional[Dict]]] = []
+        self._seq = itertools.count()  # FIFO among equal not-before times
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def push(self, item: Any, delay: float, result: Optional[Dict] = None):
+        """Defer `item` for `delay` seconds, keeping its last (failed) result."""
+        with self._lock:
+            heapq.heappush(self._heap, (time.time() + delay, next(self._seq), item, result))
+        self.logger.info(f"[{self.name}] Deferred {item} for {delay:.0f}s ({len(self)} waiting)")
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the earliest item is due (0 if due now, None if empty)."""
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(self._heap[0][0] - time.time(), 0.0)
+
+    def pop_due(self) -> Optional[Any]:
+        """The earliest item whose backoff has expired (None if there is none)."""
+        with self._lock:
+            if self._heap and self._heap[0][0] <= time.time():
+                return heapq.heappop(self._heap)[2]
+        return None
+
+    def drain(self) -> List[Dict]:
+        """Empty the queue, returning the last results of the items still in it.
+
+        For runs that stop early: those CNPJs failed, and their last failed
+        result is what gets reported.
+        """
+        with self._lock:
+            entries, self._heap = self._heap, []
+        return [result for _, _, _, result in sorted(entries) if result is not None]
+
+    def run(self, fresh: Iterable[Any]) -> Iterator[Any]:
+        """Yield the fresh items, slotting in deferred ones as they fall due."""
+        for item in fresh:
+            due = self.pop_due()
+            while due is not None:
+                yield due
+                due = self.pop_due()
+            yield item
+        # Tail: only deferred items left — wait for each one's backoff
+        while True:
+            wait = self.next_due_in()
+            if wait is None:
+                return
+            if wait > 0:
+                self.logger.info(f"[{self.name}] {len(self)} deferred retry(ies), next in {wait:.0f}s")
+                time.sleep(wait)
+            due = self.pop_due()
+            if due is not None:
+                yield due
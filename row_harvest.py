@@ -0,0 +1,102 @@
+"""
+Incremental harvest of a periodic table while it scrolls.
+
+The extractors used to scroll until the page stopped growing and then read
+the whole tbody at once. A long table turned into one huge final read, and
+a table that virtualizes its rows drops the early ones from the DOM before
+that read. A RowHarvest is fed on every scroll step instead: HARVEST_ROWS_JS
+returns only the rows not read before (and marks them), the harvest keeps
+one record per date, and the scroll stops when a few steps in a row bring
+nothing new.
+
+    harvest = RowHarvest(["Data da cotização", "Valor cota"], required=2)
+    harvest.bind([date_idx, cota_idx])
+    harvest.step(driver.execute_script)   # after each scroll
+    records = harvest.records()           # oldest first
+
+The harvest outlives the page: the stealth scraper keeps it in the CNPJ's
+checkpoint, so the rows of an interrupted scroll are not lost when the step
+is retried on a recovered driver.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import config
+from date_window import DateWindow, row_date
+from page_scripts import HARVEST_ROWS_JS
+
+
+class RowHarvest:
+    """Rows read off a periodic table so far, one record per date."""
+
+    def __init__(self, labels: List[str], required: int = 1,
+                 window: Optional[DateWindow] = None):
+        """
+        Args:
+            labels: Record keys, in column order; the first is the date
+            required: How many leading cells must be filled to take a row
+            window: Optional since / until bounds on the rows
+        """
+        self.labels = labels
+        self.required = required
+        self.window = window if window is not None else DateWindow()
+        self.indexes: Optional[List[int]] = None
+        self.rows: Dict[str, Dict] = {}  # date -> record, in page order (newest first)
+        self.skipped = 0  # rows outside the window
+        self.passed = False  # a newest-first table went past window.since
+        self._seen = set()
+        self._newer = None
+
+    def bind(self, indexes: List[Optional[int]]):
+        """Table column of each label (None: not on the page, read as "")."""
+        self.indexes = [-1 if i is None else i for i in indexes]
+
+    def script_args(self) -> Dict:
+        """The HARVEST_ROWS_JS options object."""
+        return {
+            "indexes": self.indexes,
+            "required": self.required,
+            "prune": bool(getattr(config, "HARVEST_PRUNE_ROWS", False)),
+            "keep": getattr(config, "HARVEST_KEEP_ROWS", 20),
+        }
+
+    def step(self, run_script: Callable) -> int:
+        """Read the rows the page added since the last step; returns how many it added.
+
+        Counts rows new to the page, not to the harvest: a harvest resumed
+        on a reloaded page sees its known rows again while the scroll
+        still makes progress.
+
+        Args:
+            run_script: driver.execute_script (HARVEST_ROWS_JS, options)
+        """
+        batch = (run_script(HARVEST_ROWS_JS, self.script_args()) or {}).get("rows") or []
+        self.add(batch)
+        return len(batch)
+
+    def add(self, batch: List[List[str]]) -> int:
+        """Take a batch of cell texts (in `labels` order); returns how many were unseen."""
+        new = 0
+        for cells in batch:
+            date_text = cells[0]
+            if date_text in self._seen:
+                continue  # re-rendered row
+            self._seen.add(date_text)
+            new += 1
+            if self.window.bounded and not self.window.contains(date_text):
+                self.passed = self.window.passed(date_text, self._newer)
+                self.skipped += 1
+                self._newer = row_date(date_text) or self._newer
+                if self.passed:
+                    break  # newest first: every row below is older still
+                continue
+            self._newer = row_date(date_text) or self._newer
+            self.rows[date_text] = dict(zip(self.labels, cells))
+        return new
+
+    def records(self) -> List[Dict]:
+        """The rows read, oldest first."""
+        return list(reversed(self.rows.values()))
+
+    def __len__(self) -> int:
+        return len(self.rows)
@@ -0,0 +1,92 @@
+"""
+Append-only journal of a batch run's final results, for resuming it.
+
+The fund CLI resumes from its pivot output (--skip-processed reads the CNPJ
+columns back), but the FIDC output is a long table written once at the end:
+a run killed half way leaves nothing to resume from. A RunJournal appends
+one JSON line per settled CNPJ as soon as the worker records it, so a rerun
+with the same output file can skip what already succeeded and still write
+those results into the final Excel.
+
+    journal = RunJournal.for_output("fidc.xlsx")   # fidc.journal.jsonl
+    done = journal.load()                          # cnpj -> last result
+    journal.append(result)                         # from any worker thread
+
+A truncated last line (the process died mid-write) is ignored on load.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+# One lock for every journal in this process — workers share the file.
+_FILE_LOCK = threading.Lock()
+
+
+class RunJournal:
+    """JSONL file of final per-CNPJ results, the last line for a CNPJ wins."""
+
+    # Statuses that need no rerun when a journaled run is resumed
+    DONE_STATUSES = ("Success", "No data extracted")
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSONL file to append to
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def for_output(cls, output_file: str) -> "RunJournal":
+        """The journal kept next to an output file (<stem>.journal.jsonl)."""
+        return cls(os.path.splitext(output_file)[0] + ".journal.jsonl")
+
+    def load(self) -> Dict[str, Dict]:
+        """Journaled results by CNPJ (empty when there is no journal yet)."""
+        results = {}
+        with _FILE_LOCK:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                return results
+        for n, line in enumerate(lines, 1):
+            try:
+                result = json.loads(line)
+            except ValueError:
+                self.logger.warning(f"Skipping unreadable line {n} of {self.path}")
+                continue
+            if isinstance(result, dict) and result.get("CNPJ"):
+                results[result["CNPJ"]] = result
+        return results
+
+    def done(self, results: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """The journaled results that a resumed run can keep as they are."""
+        results = self.load() if results is None else results
+        return {cnpj: r for cnpj, r in results.items() if r.get("Status") in self.DONE_STATUSES}
+
+    def append(self, result: Dict):
+        """Record one CNPJ's final result (flushed before returning)."""
+        line = json.dumps(result, ensure_ascii=False, default=str)
+        with _FILE_LOCK:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                self.logger.warning(f"Could not append to journal {self.path}: {e}")
+
+    def reset(self):
+        """Start a fresh journal (a run that is not resuming)."""
+        with _FILE_LOCK:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
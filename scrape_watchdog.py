@@ -0,0 +1,194 @@
+"""
+Hard wall-clock deadline per CNPJ, enforced from a watchdog thread.
+
+MAX_CNPJ_TIMEOUT is only checked between workflow steps, so a driver.get()
+stuck on a page or a scroll loop that keeps growing could hold a worker for
+PAGE_LOAD_TIMEOUT several times over. A ScrapeWatchdog runs next to each
+scraper; the scraper arms it at the start of every scrape call. When the
+deadline passes it:
+
+  1. asks the scraper to stop (`on_expire`): a cooperative cancel flag the
+     workflow checks in its waits and loops;
+  2. if the call is still running WATCHDOG_GRACE seconds later, tears the
+     browser session down (`on_grace_expired`), which makes the hung
+     WebDriver call fail at once.
+
+A CDP Page.stopLoading can't do step 2: chromedriver runs one command per
+session at a time, so it would queue behind the very call that is hung.
+Killing the session's own chromedriver + Chrome processes always works; the
+next scrape recovers the driver as after any crash.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class ScrapeCancelled(Exception):
+    """Raised at a cooperative checkpoint once a scrape has been cancelled."""
+
+
+def _children(pid: int) -> List[int]:
+    """Direct children of `pid` (Linux /proc)."""
+    kids = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        for tid in os.listdir(task_dir):
+            with open(os.path.join(task_dir, tid, "children")) as f:
+                kids.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def process_tree(pid: int) -> List[int]:
+    """`pid` and all its descendants (just `pid` where /proc is missing)."""
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(_children(current))
+    return tree
+
+
+def driver_processes(driver) -> List[int]:
+    """PIDs of one driver's chromedriver and Chrome process trees, parents first.
+
+    undetected-chromedriver starts Chrome as a child of this process, not of
+    chromedriver, so its browser_pid is a second root.
+    """
+    roots = []
+    try:
+        roots.append(driver.service.process.pid)
+    except AttributeError:
+        pass
+    browser_pid = getattr(driver, "browser_pid", None)  # undetected-chromedriver
+    if browser_pid:
+        roots.append(browser_pid)
+
+    pids = []
+    for root in roots:
+        pids.extend(pid for pid in process_tree(root) if pid not in pids)
+    return pids
+
+
+def kill_driver_processes(driver, logger: Optional[logging.Logger] = None) -> int:
+    """SIGKILL one driver's chromedriver and Chrome process tree.
+
+    Unlike kill_orphan_processes() this leaves sibling workers' browsers
+    alone. Returns the number of processes signalled.
+    """
+    logger = logger or logging.getLogger(__name__)
+    pids = driver_processes(driver)
+    killed = 0
+    for pid in reversed(pids):  # children before their parents
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except (OSError, AttributeError):
+            pass  # already gone / no SIGKILL on this platform
+    logger.warning(f"Killed {killed} browser process(es) of a hung session")
+    return killed
+
+
+class ScrapeWatchdog:
+    """Cancels, then tears down, a scrape call that outlives its deadline."""
+
+    def __init__(
+        self,
+        on_expire: Callable[[str], None],
+        on_grace_expired: Callable[[str], None],
+        grace: float = 10.0,
+        name: str = "watchdog",
+    ):
+        """
+        Args:
+            on_expire: Called with a reason when the deadline passes
+                (typically the scraper's cancel())
+            on_grace_expired: Called with a reason when the call is still
+                running `grace` seconds later (typically abort_session())
+            grace: Seconds between the cancel request and the teardown
+            name: Thread/log label
+        """
+        self.on_expire = on_expire
+        self.on_grace_expired = on_grace_expired
+        self.grace = grace
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        self._label: Optional[str] = None
+        self._deadline: Optional[float] = None
+        self._timeout = 0.0
+        self._stage = 0  # 0 armed, 1 cancel requested, 2 torn down
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def arm(self, label: str, timeout: float):
+        """Start the clock for one scrape call (re-arming replaces the last one)."""
+        with self._cond:
+            self._closed = False
+            self._label, self._timeout, self._stage = label, timeout, 0
+            self._deadline = time.time() + timeout
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"scrape-{self.name}", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def disarm(self):
+        """The call has finished; nothing to enforce until the next arm()."""
+        with self._cond:
+            self._label = self._deadline = None
+            self._cond.notify()
+
+    @property
+    def fired(self) -> bool:
+        """True if the current/last armed call hit its deadline."""
+        with self._cond:
+            return self._stage > 0
+
+    @property
+    def torn_down(self) -> bool:
+        """True if the current/last armed call's session was torn down (grace expired)."""
+        with self._cond:
+            return self._stage == 2
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._label = self._deadline = None
+            self._cond.notify()
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.time()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                # Deadline passed while still armed. Callbacks run under the
+                # lock so a disarm() can't slip in between check and action.
+                reason = f"Timeout: watchdog stopped {self._label} after {self._timeout:.0f}s"
+                try:
+                    if self._stage == 0:
+                        self._stage = 1
+                        self._deadline = time.time() + self.grace
+                        self.logger.warning(f"[{self.name}] {reason} — cancelling")
+                        self.on_expire(reason)
+                    else:
+                        self._stage = 2
+                        self._deadline = None
+                        self.logger.warning(
+                            f"[{self.name}] {self._label} still running {self.grace:.0f}s "
+                            f"after cancel — tearing the session down"
+                        )
+                        self.on_grace_expired(reason)
+                except Exception as e:
+                    self.logger.error(f"[{self.name}] Watchdog action failed: {e}")
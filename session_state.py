@@ -0,0 +1,151 @@
+"""
+Cookies and localStorage of a warmed-up ANBIMA session, reused by new drivers.
+
+Every fresh driver used to meet the cookie banner ("Prosseguir") and a cold
+session, and recover_driver() started from nothing. Once a scrape has
+succeeded, the scraper exports its driver's cookies and the site's
+localStorage into a small JSON file (SessionStateStore.export_from_driver).
+New drivers — first launch, hot-standby swaps, recoveries, other workers and
+later runs — import it before their first navigation
+(SessionStateStore.import_into_driver): cookies through CDP
+Network.setCookies, localStorage through a Page.addScriptToEvaluateOnNewDocument
+script that seeds the keys on the site's origin.
+
+A saved state expires after SESSION_STATE_TTL seconds, and is dropped at
+once when the site rejects it (invalidate()): the banner shows again or the
+first page after an import is rate limited.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+from page_scripts import LOCAL_STORAGE_DUMP_JS, seed_local_storage_js
+
+# One lock for every store in this process — parallel workers share the file.
+_FILE_LOCK = threading.Lock()
+
+# Selenium cookie keys -> CDP Network.CookieParam keys
+_CDP_COOKIE_KEYS = {
+    "name": "name", "value": "value", "domain": "domain", "path": "path",
+    "secure": "secure", "httpOnly": "httpOnly", "sameSite": "sameSite", "expiry": "expires",
+}
+
+
+class SessionStateStore:
+    """JSON-backed cookies + localStorage of one warmed-up session, with a TTL."""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            path: JSON file to persist to (default: config.SESSION_STATE_FILE)
+            ttl: Seconds a saved state stays usable (default: config.SESSION_STATE_TTL)
+        """
+        self.path = path or getattr(
+            config, "SESSION_STATE_FILE", os.path.join(".cota_state", "session_state.json")
+        )
+        self.ttl = ttl if ttl is not None else getattr(config, "SESSION_STATE_TTL", 6 * 3600)
+        self.logger = logging.getLogger(__name__)
+
+    # -- persistence -------------------------------------------------------
+    def load(self) -> Optional[Dict]:
+        """The saved state, or None when there is none or it has expired."""
+        with _FILE_LOCK:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                self.logger.warning(f"Could not read session state {self.path}: {e}")
+                return None
+        if not isinstance(state, dict) or not state.get("cookies"):
+            return None
+        if time.time() - state.get("saved_at", 0) > self.ttl:
+            self.logger.info("Saved session state has expired")
+            self.invalidate("expired")
+            return None
+        return state
+
+    def save(self, cookies: List[Dict], local_storage: Dict[str, str], origin: str,
+             user_agent: Optional[str] = None):
+        """Persist one session's state (replaces the previous one)."""
+        state = {
+            "saved_at": time.time(),
+            "origin": origin,
+            "user_agent": user_agent,
+            "cookies": cookies,
+            "local_storage": local_storage,
+        }
+        with _FILE_LOCK:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)  # atomic: readers never see half a file
+            except Exception as e:
+                self.logger.warning(f"Could not persist session state {self.path}: {e}")
+
+    def invalidate(self, reason: str):
+        """Drop the saved state (expired, or rejected by the site)."""
+        with _FILE_LOCK:
+            try:
+                os.remove(self.path)
+                self.logger.info(f"Dropped saved session state: {reason}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.warning(f"Could not drop session state {self.path}: {e}")
+
+    # -- drivers -----------------------------------------------------------
+    def export_from_driver(self, driver) -> bool:
+        """Save a live driver's cookies and its current origin's localStorage."""
+        try:
+            cookies = driver.get_cookies()
+            storage = driver.execute_script(LOCAL_STORAGE_DUMP_JS) or {}
+        except Exception as e:
+            self.logger.debug(f"Session state export skipped: {e}")
+            return False
+        if not cookies:
+            return False
+        self.save(cookies, storage.get("items") or {}, storage.get("origin") or "",
+                  storage.get("user_agent"))
+        self.logger.info(
+            f"Saved session state: {len(cookies)} cookie(s), "
+            f"{len(storage.get('items') or {})} localStorage key(s)"
+        )
+        return True
+
+    def import_into_driver(self, driver) -> bool:
+        """Load the saved state into a fresh driver, before its first navigation.
+
+        Returns True if a state was imported.
+        """
+        state = self.load()
+        if state is None:
+            return False
+        cookies = [
+            {cdp: cookie[key] for key, cdp in _CDP_COOKIE_KEYS.items() if key in cookie}
+            for cookie in state["cookies"]
+        ]
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            if state.get("local_storage") and state.get("origin"):
+                driver.execute_cdp_cmd(
+                    "Page.addScriptToEvaluateOnNewDocument",
+                    {"source": seed_local_storage_js(state["origin"], state["local_storage"])},
+                )
+        except Exception as e:
+            self.logger.warning(f"Could not import session state: {e}")
+            return False
+        age = (time.time() - state.get("saved_at", 0)) / 60
+        self.logger.info(f"Imported session state ({len(cookies)} cookie(s), {age:.0f} min old)")
+        return True
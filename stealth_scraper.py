@@ -9,8 +9,11 @@ import random
 import logging
 import subprocess
 import re
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from urllib.parse import quote
 
 
 def _windows_chrome_major() -> Optional[int]:
@@ -120,12 +123,30 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
-    NoSuchElementException,
     WebDriverException,
     StaleElementReferenceException,
+    JavascriptException,
 )
 
 import config
+from launch_stats import LaunchStatsStore
+from chrome_profile import ChromeProfileManager, LEAN_DROPPED_ARGS, launch_profile_args
+from driver_standby import DriverStandby
+from retry_policy import DRIVER_DEAD, RetryPolicy, classify
+from scrape_watchdog import ScrapeCancelled, ScrapeWatchdog, kill_driver_processes
+from session_state import SessionStateStore
+from fund_catalog import FundCatalog
+from date_window import DateWindow
+from row_harvest import RowHarvest
+from page_scripts import (
+    COOKIE_BANNER_PROBE_JS,
+    FUND_METADATA_JS,
+    NO_RESULTS_JS,
+    PAGE_READY_JS,
+    RATE_LIMIT_PROBE_JS,
+    fund_class_from,
+    rate_limit_reason,
+)
 
 
 def subclass_matches(desired: str, sub: dict) -> bool:
@@ -174,10 +195,95 @@ def subclass_matches(desired: str, sub: dict) -> bool:
     return False
 
 
+def filter_subclass_links(desired: Optional[str], links: List[Dict]) -> Tuple[List[Dict], bool]:
+    """The search-result links ({"name", "code", ...}) to visit for `desired`.
+
+    Applies subclass_matches() before any navigation. When `desired` matches
+    no link, every link is kept (so data isn't lost) and the flag is False.
+
+    Returns:
+        Tuple of (links to visit, matched: bool)
+    """
+    if not desired or not str(desired).strip():
+        return links, True
+    kept = [
+        link for link in links
+        if subclass_matches(
+            desired, {"subclasse_name": link.get("name", ""), "subclasse_code": link.get("code", "")}
+        )
+    ]
+    return (kept, True) if kept else (links, False)
+
+
+def fund_from_result_link(link) -> Optional[Dict]:
+    """{"code", "href", "name"} for a search-result anchor (None if unreadable)."""
+    href = link.get_attribute("href") or ""
+    if "/fundos/" not in href:
+        return None
+    code = href.split("/fundos/")[1].split("/")[0].split("?")[0].split("#")[0]
+    if not code:
+        return None
+
+    name = (link.text or "").strip().split("\n")[0]
+    if len(name) <= 5:  # same sanity bar as get_fund_name
+        try:
+            card = link.find_element(By.XPATH, "./ancestor::article[1]")
+            name = (card.text or "").strip().split("\n")[0]
+        except Exception:
+            name = ""
+    return {"code": code, "href": href, "name": name[:200] if len(name) > 5 else "N/A"}
+
+
+def fund_from_results(driver) -> Tuple[Optional[Dict], str]:
+    """The first fund on a loaded search results page, read from its link
+    (the detail page is never opened). Shared by the Selenium scrapers'
+    resolve_fund().
+
+    Returns:
+        Tuple of (fund: {"code", "href", "name"} | None, message: str)
+    """
+    fund_links = driver.find_elements(By.CSS_SELECTOR, "article a[href*='/fundos/C']")
+    if not fund_links:
+        return None, "No fund found for this CNPJ"
+    fund = fund_from_result_link(fund_links[0])
+    if not fund:
+        return None, "Could not read fund link from search results"
+    return fund, f"Found {len(fund_links)} result(s). Using {fund['code']}: {fund['name']}"
+
+
+def combined_views(name: str, code: str, rows: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Both result shapes of one all-columns read of a fund's periodic table.
+
+    Args:
+        name: Fund name
+        code: Fund code
+        rows: Records keyed by the FIDC_COLUMNS labels
+
+    Returns:
+        Tuple of (periodic_data, subclasses): the regular workflow's date +
+        cota records (rows with a cota only) for process_scraped_data, and a
+        one-entry subclass list for process_fidc_data
+    """
+    periodic = [
+        {"Data da cotização": row.get("Data competência", ""), "Valor cota": row["Valor cota"]}
+        for row in rows
+        if row.get("Valor cota")
+    ]
+    return periodic, [{"subclasse_name": name, "subclasse_code": code, "periodic_data": rows}]
+
+
 class StealthANBIMAScraper:
     """Undetected ChromeDriver-based scraper for ANBIMA fund data"""
 
-    def __init__(self, headless: bool = False, proxy: Optional[str] = None):
+    def __init__(
+        self,
+        headless: bool = False,
+        proxy: Optional[str] = None,
+        standby=None,
+        launch_profile: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter=None,
+    ):
         """
         Initialize the stealth scraper
 
@@ -189,19 +295,38 @@ class StealthANBIMAScraper:
                 should use an IP-whitelisted gateway — Chrome's --proxy-server
                 can't pass user:pass inline (those credentials are stripped and
                 a warning logged).
+            standby: Hot-standby driver for near-instant recovery. True keeps
+                one spare for this scraper; a DriverStandby instance shares
+                one spare across a pool of scrapers (its owner closes it).
+                None follows config.HOT_STANDBY; False turns the standby off.
+            launch_profile: "default" or "lean" Chrome flags (None follows
+                config.CHROME_LAUNCH_PROFILE)
+            retry_policy: Shared RetryPolicy (per-CNPJ budgets, failure
+                categories); a private one is created if omitted
+            rate_limiter: Optional shared limiter (wait_if_needed()) paced
+                before every FIDC subclass tab is opened
         """
         self.driver = None
         self.wait = None
+        self.rate_limiter = rate_limiter
         self.headless = headless
         self.proxy = self._normalize_proxy(proxy)
+        self.launch_profile = launch_profile or getattr(
+            config, "CHROME_LAUNCH_PROFILE", "default"
+        )
         self.logger = logging.getLogger(__name__)
         self.rate_limit_count = 0
+        # When the last rate limit was seen; steers _search_mode() back to the
+        # human-typing search path for DIRECT_SEARCH_COOLDOWN seconds.
+        self._last_rate_limit_at = 0.0
+        self.last_search_mode: Optional[str] = None
         # Captures the last setup_driver() error so the UI can show real diagnostics
         # instead of a generic "Failed to initialize web driver" message.
         self.last_init_error: Optional[str] = None
         self.last_init_traceback: Optional[str] = None
         # Which driver strategy actually succeeded (for UI badge and logs).
         self.driver_mode: Optional[str] = None
+        self._launch_key: Optional[str] = None
         # ── Recovery circuit breaker ──────────────────────────────────────
         # When Chrome won't stay alive (the classic headless-on-macOS death:
         # window closes on first navigation), recover_driver() would otherwise
@@ -212,6 +337,69 @@ class StealthANBIMAScraper:
         self._recovery_failures = 0
         self._max_recovery_failures = getattr(config, "MAX_RECOVERY_FAILURES", 2)
         self._driver_permanently_dead = False
+        # Per-host memory of which launch strategy works (UC vs plain Selenium)
+        # so hosts where UC never starts stop paying for two doomed UC launches.
+        self.launch_stats = LaunchStatsStore(
+            host_key=LaunchStatsStore.host_key_for(headless)
+        )
+        # Each launch gets a tmpfs clone of a pre-seeded template profile
+        # instead of a cold on-disk one; the clone is deleted on close().
+        self.profile_manager = (
+            ChromeProfileManager()
+            if getattr(config, "EPHEMERAL_PROFILES", True)
+            else None
+        )
+        self._profile_dir: Optional[str] = None
+        self._cookie_banner_dismissed = False
+        # Cookies + localStorage of a warmed-up session, shared by new drivers,
+        # recoveries, standbys and later runs (see session_state.py). The
+        # epochs say which driver got an imported state and which has already
+        # exported its own.
+        self.session_store = (
+            SessionStateStore() if getattr(config, "SESSION_STATE_ENABLED", True) else None
+        )
+        self._session_imported_epoch: Optional[int] = None
+        self._session_exported_epoch: Optional[int] = None
+        self._session_check_pending = False
+        # CNPJ -> fund codes from discover_funds.py: a known fund skips the search
+        self.catalog = FundCatalog.from_config()
+        # Cumulative seconds spent on real page loading (navigation +
+        # readiness waits) vs deliberate stealth pauses; per-CNPJ deltas are
+        # reported in result["timing"].
+        self.timing = {"loading": 0.0, "waiting": 0.0}
+        # Per-CNPJ resume state of the step workflow (see FUND_STEPS) and a
+        # counter bumped on every new driver, so page-bound steps know when
+        # their page is gone.
+        self.checkpoints: Dict[str, Dict] = {}
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._driver_epoch = 0
+        # ── Watchdog ──────────────────────────────────────────────────────
+        # Hard wall-clock deadline per scrape call (CNPJ_WALL_TIMEOUT /
+        # FIDC_WALL_TIMEOUT): first a cooperative cancel, then — if a
+        # WebDriver call is hung — this session's processes are killed.
+        self._cancel_event = threading.Event()
+        self.cancel_reason: Optional[str] = None
+        self._cancel_cnpj: Optional[str] = None  # CNPJ a pending cancel() is aimed at
+        self.watchdog = (
+            ScrapeWatchdog(
+                self.cancel,
+                self.abort_session,
+                grace=getattr(config, "WATCHDOG_GRACE", 10),
+            )
+            if getattr(config, "WATCHDOG_ENABLED", True)
+            else None
+        )
+        # ── Hot standby ───────────────────────────────────────────────────
+        # A spare driver warming in a background thread; recover_driver()
+        # swaps to it instead of sleeping and relaunching from scratch.
+        if standby is None:
+            standby = getattr(config, "HOT_STANDBY", False)
+        if isinstance(standby, DriverStandby):
+            self.standby, self._owns_standby = standby, False
+        elif standby:
+            self.standby, self._owns_standby = DriverStandby.for_scraper(self), True
+        else:
+            self.standby, self._owns_standby = None, False
 
     # --------------------------------------------------------------
     # Driver setup with UC + retry + plain-Selenium fallback
@@ -278,17 +466,20 @@ class StealthANBIMAScraper:
         scheme = scheme or "http"
         return f"{scheme}://{rest}"
 
-    def _common_chrome_args(self):
+    def _common_chrome_args(self, profile_dir: Optional[str] = None):
         """Chrome flags that are safe on both undetected-chromedriver and plain Selenium.
 
         NOTE: previously included '--disable-features=VizDisplayCompositor,TranslateUI'.
         Disabling VizDisplayCompositor is a known cause of Chrome-crashes-on-startup
         in containerised Chromium 120+. Removed to fix "Chrome instance exited" on
         Streamlit Cloud.
+
+        Args:
+            profile_dir: Ephemeral profile clone to launch with (see
+                ChromeProfileManager); Chrome makes its own when None.
         """
         args = [
             "--no-sandbox",
-            "--disable-dev-shm-usage",
             "--disable-gpu",
             "--disable-software-rasterizer",
             "--window-size=1280,900",
@@ -304,6 +495,17 @@ class StealthANBIMAScraper:
             "--disable-ipc-flooding-protection",
             "--disable-blink-features=AutomationControlled",
         ]
+        # "lean" launch profile: fewer renderers, capped V8 heap, no background
+        # networking/component updates (see config.LEAN_CHROME_OPTIONS).
+        extra = launch_profile_args(self.launch_profile)
+        if extra:
+            args = [a for a in args if a not in LEAN_DROPPED_ARGS] + extra
+        # Chrome's shared memory lives in /dev/shm; only push it to /tmp files
+        # when /dev/shm is too small (the 64 MB container default).
+        if not (self.profile_manager and self.profile_manager.shm_allows_chrome()):
+            args.append("--disable-dev-shm-usage")
+        if profile_dir:
+            args.extend(self.profile_manager.chrome_args(profile_dir))
         # Route all traffic through the upstream proxy (IP rotation / rate-limit
         # avoidance). Use an IP-whitelisted gateway for authenticated proxies.
         if self.proxy:
@@ -338,12 +540,12 @@ class StealthANBIMAScraper:
                     self.logger.warning(f"Could not copy {candidate}: {e}")
         return None
 
-    def _try_undetected_chromedriver(self):
+    def _try_undetected_chromedriver(self, profile_dir: Optional[str] = None):
         """First-choice driver: undetected-chromedriver (best anti-bot properties)."""
         import undetected_chromedriver as uc
 
         options = uc.ChromeOptions()
-        for arg in self._common_chrome_args():
+        for arg in self._common_chrome_args(profile_dir):
             options.add_argument(arg)
 
         chrome_version = get_chrome_version()
@@ -386,7 +588,7 @@ class StealthANBIMAScraper:
         driver = uc.Chrome(**uc_kwargs)
         return driver
 
-    def _try_plain_selenium(self):
+    def _try_plain_selenium(self, profile_dir: Optional[str] = None):
         """Fallback driver: plain Selenium + selenium-stealth.
 
         Less anti-bot-strength than UC, but dramatically more reliable on
@@ -398,7 +600,7 @@ class StealthANBIMAScraper:
         from selenium.webdriver.chrome.service import Service
 
         options = ChromeOptions()
-        for arg in self._common_chrome_args():
+        for arg in self._common_chrome_args(profile_dir):
             options.add_argument(arg)
         if self.headless:
             options.add_argument("--headless=new")
@@ -500,51 +702,162 @@ class StealthANBIMAScraper:
         except Exception as e:
             self.logger.debug(f"navigator.webdriver override skipped: {e}")
 
-    def setup_driver(self):
-        """Initialize a WebDriver with retry + fallback.
+    # Launch strategies known to setup_driver(), in default preference order.
+    # Keys are what LaunchStatsStore records outcomes under.
+    LAUNCH_STRATEGIES = [
+        ("uc", "undetected-chromedriver", "_try_undetected_chromedriver"),
+        ("plain", "plain Selenium + selenium-stealth", "_try_plain_selenium"),
+    ]
 
-        Strategy:
-          1. Log environment (versions, paths) for diagnostics.
-          2. Try undetected-chromedriver, with ONE retry after a short delay
-             (handles transient UC patching failures).
-          3. If UC still fails, fall back to plain Selenium + selenium-stealth,
-             which is much more robust on Streamlit Cloud.
+    def _launch_attempts(self):
+        """Ordered (key, label, launcher) attempts for setup_driver().
+
+        Strategies that keep failing on this host are tried last (see
+        LaunchStatsStore.order). UC only gets its one retry — for transient
+        patching failures — while it is still the preferred strategy.
         """
-        self._log_environment()
+        known = {key: (label, method) for key, label, method in self.LAUNCH_STRATEGIES}
+        attempts = []
+        for key in self.launch_stats.order([k for k, _, _ in self.LAUNCH_STRATEGIES]):
+            label, method = known[key]
+            attempts.append((key, label, getattr(self, method)))
+            first = len(attempts) == 1
+            if key == "uc" and first and not self.launch_stats.is_demoted(key):
+                attempts.append((key, f"{label} (retry)", getattr(self, method)))
+        return attempts
+
+    def _new_profile(self) -> Optional[str]:
+        """Clone the template profile for one launch (None = Chrome's default)."""
+        if not self.profile_manager:
+            return None
+        try:
+            return self.profile_manager.clone()
+        except Exception as e:
+            self.logger.warning(f"Could not clone Chrome profile template: {e}")
+            return None
 
-        attempts = [
-            ("undetected-chromedriver", self._try_undetected_chromedriver),
-            ("undetected-chromedriver (retry)", self._try_undetected_chromedriver),
-            ("plain Selenium + selenium-stealth", self._try_plain_selenium),
-        ]
+    def _release_profile(self, seed: bool = False):
+        """Delete the current driver's profile clone.
+
+        Args:
+            seed: If this session dismissed the cookie banner and the template
+                has no consent state yet, copy it into the template first.
+                Only valid once the driver has quit.
+        """
+        if not self.profile_manager or not self._profile_dir:
+            return
+        if (
+            seed
+            and self._cookie_banner_dismissed
+            and not self.profile_manager.template_seeded
+        ):
+            self.profile_manager.seed_template_from(self._profile_dir)
+        self.profile_manager.remove(self._profile_dir)
+        self._profile_dir = None
+
+    def _reprobe_demoted_strategies(self):
+        """Re-try demoted strategies in a background thread, now and then.
+
+        A host that couldn't run UC yesterday may run it today (Chrome update,
+        fixed chromedriver). Instead of blocking a real launch on it, launch
+        it off-thread, record the outcome and quit it; the next setup_driver()
+        picks it up if it worked.
+        """
+        import threading
+
+        for key, label, method in self.LAUNCH_STRATEGIES:
+            if key == self._launch_key or not self.launch_stats.claim_reprobe(key):
+                continue
+
+            def probe(key=key, label=label, launcher=getattr(self, method)):
+                t0 = time.time()
+                profile_dir = self._new_profile()  # never share the live one
+                try:
+                    driver = launcher(profile_dir)
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    self.launch_stats.record(key, True, time.time() - t0)
+                    self.logger.info(
+                        f"Background re-probe of {label} succeeded in "
+                        f"{time.time() - t0:.1f}s — it will be tried first next launch"
+                    )
+                except Exception as e:
+                    self.launch_stats.record(
+                        key, False, time.time() - t0, f"{type(e).__name__}: {e}"
+                    )
+                    self.logger.info(f"Background re-probe of {label} failed: {e}")
+                finally:
+                    if self.profile_manager:
+                        self.profile_manager.remove(profile_dir)
+
+            self.logger.info(f"Re-probing demoted launch strategy in background: {label}")
+            threading.Thread(
+                target=probe, name=f"launch-reprobe-{key}", daemon=True
+            ).start()
+
+    def _launch_driver(self) -> Tuple[Optional[Dict], str, Optional[str]]:
+        """Run the launch chain without touching self.driver.
+
+        Safe to call from a background thread (the hot standby does), so it
+        only reads scraper state and records outcomes in launch_stats.
+
+        Returns:
+            Tuple of (launch record or None, joined per-attempt errors,
+            traceback of the last failure). A launch record is
+            {"driver", "mode", "key", "profile_dir"}.
+        """
+        attempts = self._launch_attempts()
 
         collected_errors = []
-        for label, strategy in attempts:
+        tb_text = None
+        for i, (key, label, strategy) in enumerate(attempts):
             self.logger.info(f"Attempting WebDriver init via: {label}")
+            t0 = time.time()
+            profile_dir = self._new_profile()
             try:
-                self.driver = strategy()
-                self.driver_mode = label
-                break
+                driver = strategy(profile_dir)
+                self.launch_stats.record(key, True, time.time() - t0)
+                launched = {
+                    "driver": driver,
+                    "mode": label,
+                    "key": key,
+                    "profile_dir": profile_dir,
+                }
+                return launched, "", None
             except Exception as e:
                 import traceback as _tb
 
+                if self.profile_manager:
+                    self.profile_manager.remove(profile_dir)
                 tb_text = _tb.format_exc()
+                self.launch_stats.record(
+                    key, False, time.time() - t0, f"{type(e).__name__}: {str(e)}"
+                )
                 collected_errors.append(f"[{label}] {type(e).__name__}: {str(e)}")
                 self.logger.error(f"{label} failed: {type(e).__name__}: {str(e)}")
                 self.logger.debug(tb_text)
-                time.sleep(2)  # short pause before next attempt
-        else:
-            # All attempts failed
-            self.last_init_error = " | ".join(collected_errors)
-            # Use the last traceback (most recent failure) for the detail panel
-            import traceback as _tb
-
-            self.last_init_traceback = _tb.format_exc()
-            return False
-
-        # One of the strategies succeeded. Finalise setup.
+                if i + 1 < len(attempts) and attempts[i + 1][0] == key:
+                    time.sleep(2)  # short pause before retrying the same strategy
+
+        # All attempts failed; keep the last traceback for the detail panel
+        return None, " | ".join(collected_errors), tb_text
+
+    def _adopt_driver(self, launched: Dict) -> bool:
+        """Make a launch record the scraper's current driver and finalise it."""
+        self._release_profile()  # clone of a previous (recovered) driver
+        self.driver = launched["driver"]
+        self._driver_epoch += 1
+        self.driver_mode = launched["mode"]
+        self._launch_key = launched["key"]
+        self._profile_dir = launched["profile_dir"]
         try:
             self._apply_stealth_scripts()
+            # A new browser: the banner shows again unless the imported
+            # session brings the consent cookie (which sets this back)
+            self._cookie_banner_dismissed = False
+            self._import_session_state()
             self.driver.set_page_load_timeout(config.PAGE_LOAD_TIMEOUT)
             self.driver.implicitly_wait(config.IMPLICIT_WAIT)
             self.wait = WebDriverWait(self.driver, config.ELEMENT_WAIT_TIMEOUT)
@@ -560,6 +873,52 @@ class StealthANBIMAScraper:
             self.logger.error(self.last_init_error)
             return False
 
+    def launch_for_standby(self) -> Optional[Dict]:
+        """Launcher used by DriverStandby: a fresh launch record, or None."""
+        launched, errors, _ = self._launch_driver()
+        if launched is None:
+            self.logger.warning(f"Standby launch failed: {errors}")
+        return launched
+
+    def discard_launch(self, launched: Dict):
+        """Tear down a launch record that was never adopted."""
+        try:
+            launched["driver"].quit()
+        except Exception:
+            pass
+        if self.profile_manager:
+            self.profile_manager.remove(launched.get("profile_dir"))
+
+    def setup_driver(self):
+        """Initialize a WebDriver with retry + fallback.
+
+        Strategy:
+          1. Log environment (versions, paths) for diagnostics.
+          2. Try the strategies in the order this host's launch history says
+             works (LaunchStatsStore): undetected-chromedriver first, with ONE
+             retry after a short delay, unless UC keeps failing here.
+          3. Fall back to the other strategy (plain Selenium + selenium-stealth
+             is much more robust on Streamlit Cloud).
+          4. Every outcome is recorded; demoted strategies are re-probed in the
+             background now and then instead of blocking a launch.
+          5. With a hot standby configured, start warming the spare driver.
+        """
+        self._log_environment()
+
+        launched, errors, tb_text = self._launch_driver()
+        if launched is None:
+            self.last_init_error = errors
+            self.last_init_traceback = tb_text
+            return False
+
+        # One of the strategies succeeded. Finalise setup.
+        if not self._adopt_driver(launched):
+            return False
+        self._reprobe_demoted_strategies()
+        if self.standby:
+            self.standby.warm()
+        return True
+
     def is_driver_alive(self) -> bool:
         """Check if the WebDriver is still responsive"""
         if not self.driver:
@@ -618,6 +977,23 @@ class StealthANBIMAScraper:
             # Clear driver reference
             self.driver = None
             self.wait = None
+            self._release_profile()
+
+            # Hot standby: swap to the spare immediately (take() starts
+            # warming the next one).
+            launched = self.standby.take() if self.standby else None
+            if launched is not None:
+                if self._adopt_driver(launched) and self.is_driver_alive():
+                    self.logger.info("Driver recovered by swapping to the hot standby")
+                    self._recovery_failures = 0
+                    return True
+                self.logger.warning("Standby driver was not responsive — relaunching")
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+                self._release_profile()
 
             # Brief wait before reinitializing
             self.logger.info("Waiting before reinitializing driver...")
@@ -639,7 +1015,7 @@ class StealthANBIMAScraper:
             return _note_failure()
 
     def safe_driver_operation(
-        self, operation_func, operation_name: str, max_attempts: int = 2
+        self, operation_func, operation_name: str, max_attempts: int = 1
     ):
         """
         Safely execute a driver operation with connection recovery
@@ -647,7 +1023,8 @@ class StealthANBIMAScraper:
         Args:
             operation_func: Function to execute
             operation_name: Name of the operation for logging
-            max_attempts: Maximum number of attempts (including recovery)
+            max_attempts: Maximum number of attempts (including recovery).
+                The workflows pass 1: retries are the RetryPolicy's call.
 
         Returns:
             Result of operation_func or raises exception on final failure
@@ -685,6 +1062,22 @@ class StealthANBIMAScraper:
                 # Re-raise on final attempt or non-connection errors
                 raise
 
+    @contextmanager
+    def _no_implicit_wait(self):
+        """Run optional-element probes with a zero implicit wait.
+
+        Under IMPLICIT_WAIT a find_element() for an element that isn't there
+        blocks for the full wait; inside this block it fails immediately.
+        """
+        self.driver.implicitly_wait(0)
+        try:
+            yield
+        finally:
+            try:
+                self.driver.implicitly_wait(config.IMPLICIT_WAIT)
+            except Exception:
+                pass  # driver died mid-probe; recovery sets it on the new one
+
     def human_delay(self, min_sec: float = None, max_sec: float = None):
         """
         Random delay to simulate human behavior
@@ -699,8 +1092,137 @@ class StealthANBIMAScraper:
             max_sec = getattr(config, "STEALTH_MAX_DELAY", 7.0)
 
         delay = random.uniform(min_sec, max_sec)
-        time.sleep(delay)
+        self._cancel_event.wait(delay)  # returns early once cancelled
+        self.timing["waiting"] += delay
         self.logger.debug(f"Human delay: {delay:.2f}s")
+        self._check_cancelled()
+
+    def stealth_jitter(self):
+        """Deliberate pause after a page is ready (config.STEALTH_JITTER).
+
+        Kept separate from wait_until_ready() so the stealth cost is an
+        explicit setting; (0, 0) turns it off.
+        """
+        low, high = getattr(config, "STEALTH_JITTER", (0.5, 1.5))
+        if high > 0:
+            self.human_delay(low, high)
+
+    def _navigate(self, url: str):
+        """driver.get(url), booking the time as loading."""
+        start = time.time()
+        try:
+            self.driver.get(url)
+        finally:
+            self.timing["loading"] += time.time() - start
+
+    def wait_until_ready(self, selector: Optional[str] = None, timeout: float = None) -> bool:
+        """
+        Wait until the page is usable instead of sleeping a fixed time
+
+        Ready means document.readyState is "complete", `selector` (if given)
+        is in the DOM, and no resource has finished loading for
+        NETWORK_QUIET_MS (the SPA's XHRs have settled). Network quiet is
+        waited for at most NETWORK_QUIET_MAX_WAIT seconds once the rest
+        holds, so a page with background polling doesn't stall. Time spent
+        here is booked as loading.
+
+        Args:
+            selector: CSS selector that must be present
+            timeout: Max seconds to wait (default: config.READY_TIMEOUT)
+
+        Returns:
+            True if the page (and selector) became ready within the timeout
+        """
+        timeout = timeout or getattr(config, "READY_TIMEOUT", 30)
+        quiet_ms = getattr(config, "NETWORK_QUIET_MS", 500)
+        quiet_max_wait = getattr(config, "NETWORK_QUIET_MAX_WAIT", 3.0)
+        start = time.time()
+        usable_at = None
+        probe = {}
+        try:
+            while time.time() - start < timeout:
+                self._check_cancelled()
+                try:
+                    probe = self.driver.execute_script(PAGE_READY_JS, selector) or {}
+                except JavascriptException:
+                    probe = {}  # document swapped mid-probe; try again
+                if probe.get("ready_state") == "complete" and probe.get("selector_found"):
+                    usable_at = usable_at or time.time()
+                    if (
+                        probe.get("idle_ms", 0) >= quiet_ms
+                        or time.time() - usable_at >= quiet_max_wait
+                    ):
+                        return True
+                else:
+                    usable_at = None
+                time.sleep(0.1)
+            self.logger.debug(f"Page not ready after {timeout}s (selector={selector!r}): {probe}")
+            return False
+        finally:
+            self.timing["loading"] += time.time() - start
+
+    def _timing_since(self, before: Dict, started: float) -> Dict:
+        """Per-call timing report from a snapshot of self.timing."""
+        total = time.time() - started
+        loading = self.timing["loading"] - before["loading"]
+        waiting = self.timing["waiting"] - before["waiting"]
+        return {
+            "total": round(total, 2),
+            "loading": round(loading, 2),
+            "waiting": round(waiting, 2),
+            "other": round(max(total - loading - waiting, 0.0), 2),
+        }
+
+    # ----------------------------------------------------------------------
+    # Cancellation (watchdog, hedged duplicates)
+    # ----------------------------------------------------------------------
+    def cancel(self, reason: str = "Cancelled", cnpj: Optional[str] = None):
+        """Ask the running scrape call to stop at its next checkpoint.
+
+        Thread-safe. The call returns a result whose Status is `reason`.
+        With `cnpj`, a cancel that arrives before that CNPJ's call has
+        started still stops it.
+        """
+        self.cancel_reason = reason
+        self._cancel_cnpj = cnpj
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _check_cancelled(self):
+        """Cooperative checkpoint: raise ScrapeCancelled once cancel() was called."""
+        if self._cancel_event.is_set():
+            raise ScrapeCancelled(self.cancel_reason)
+
+    def abort_session(self, reason: str = ""):
+        """Kill this scraper's browser processes to unblock a hung WebDriver call.
+
+        Runs on the watchdog thread. self.driver is left in place; the
+        scraping thread's call fails, and the next scrape recovers the
+        driver like after any crash.
+        """
+        driver = self.driver
+        if driver is not None:
+            self.logger.warning(f"Aborting browser session: {reason}")
+            kill_driver_processes(driver, self.logger)
+
+    @contextmanager
+    def _watched(self, cnpj: str, timeout: float, label: Optional[str] = None):
+        """Run one scrape call for `cnpj` under the watchdog's deadline."""
+        if self._cancel_cnpj != cnpj:  # a cancel aimed at this CNPJ still applies
+            self._cancel_event.clear()
+            self.cancel_reason = None
+        self._cancel_cnpj = None
+        label = label or cnpj
+        if self.watchdog:
+            self.watchdog.arm(label, timeout)
+        try:
+            yield
+        finally:
+            if self.watchdog:
+                self.watchdog.disarm()
 
     def simulate_human_behavior(self):
         """Simulate random human-like interactions"""
@@ -724,108 +1246,214 @@ class StealthANBIMAScraper:
                 f"Human behavior simulation error (non-critical): {str(e)}"
             )
 
-    def search_fund(self, cnpj: str) -> Tuple[bool, str]:
+    def _search_mode(self) -> str:
+        """How to reach the search results page: "direct" or "typed".
+
+        "direct" loads ANBIMA_BASE_URL?q=<cnpj> and skips the per-keystroke
+        typing and the dropdown click (3–6 s per fund). "typed" is the
+        original human-like path. With config.SEARCH_MODE = "auto" the
+        scraper goes direct unless it hit a rate limit in the last
+        DIRECT_SEARCH_COOLDOWN seconds, then types until things calm down.
         """
-        Search for a fund by CNPJ with human-like behavior
+        mode = getattr(config, "SEARCH_MODE", "auto")
+        if mode in ("direct", "typed"):
+            return mode
+        cooldown = getattr(config, "DIRECT_SEARCH_COOLDOWN", 600)
+        if self._last_rate_limit_at and time.time() - self._last_rate_limit_at < cooldown:
+            return "typed"
+        return "direct"
+
+    def _dismiss_cookie_banner(self):
+        """Click the cookie banner's "Prosseguir" if it is showing."""
+        try:
+            with self._no_implicit_wait():
+                cookie_button = self.driver.find_element(By.LINK_TEXT, "Prosseguir")
+            cookie_button.click()
+            self._cookie_banner_dismissed = True
+            self.human_delay(1, 2)
+        except Exception:
+            pass
+
+    def _import_session_state(self):
+        """Give a freshly adopted driver the saved cookies + localStorage."""
+        self._session_check_pending = False
+        if self.session_store and self.session_store.import_into_driver(self.driver):
+            self._session_imported_epoch = self._driver_epoch
+            self._session_check_pending = True  # verified on the first page
+            self._cookie_banner_dismissed = True  # the consent came with the cookies
+
+    def _remember_session(self, result: Dict):
+        """After this driver's first success, save its state for the next ones."""
+        if (
+            self.session_store
+            and result.get("Status") == "Success"
+            and self.driver is not None
+            and self._session_exported_epoch != self._driver_epoch
+        ):
+            if self.session_store.export_from_driver(self.driver):
+                self._session_exported_epoch = self._driver_epoch
+
+    def _handle_cookie_banner(self, always: bool = False):
+        """Dismiss the cookie banner, or check an imported session kept it away.
+
+        Args:
+            always: Probe even when the banner was dismissed before (typed search)
+        """
+        if self._session_check_pending:
+            self._session_check_pending = False
+            try:
+                shown = bool(self.driver.execute_script(COOKIE_BANNER_PROBE_JS))
+            except Exception:
+                shown = False
+            if shown:
+                self.session_store.invalidate("cookie banner shown despite the imported session")
+                self._dismiss_cookie_banner()
+        elif always or not self._cookie_banner_dismissed:
+            # A fresh profile may still show the banner; once dismissed, skip
+            # the probe (it costs a full implicit wait when the banner is absent).
+            self._dismiss_cookie_banner()
+
+    def _open_search_results(self, cnpj: str, tag: str = "") -> Tuple[bool, str]:
+        """
+        Land on the search results page for a CNPJ (see _search_mode)
 
         Args:
             cnpj: The CNPJ to search for
+            tag: Log prefix (e.g. "[FIDC] ")
 
         Returns:
             Tuple of (success: bool, message: str)
         """
-        try:
-            # Navigate to ANBIMA page
-            self.logger.info(f"Navigating to {config.ANBIMA_BASE_URL}")
-            self.driver.get(config.ANBIMA_BASE_URL)
+        mode = self._search_mode()
+        self.last_search_mode = mode
+        if mode == "direct":
+            return self._open_results_direct(cnpj, tag)
+        return self._open_results_typed(cnpj, tag)
+
+    def _open_results_direct(self, cnpj: str, tag: str = "") -> Tuple[bool, str]:
+        """Load ANBIMA_BASE_URL?q=<cnpj> and wait for the results list."""
+        url = f"{config.ANBIMA_BASE_URL}?q={quote(cnpj)}"
+        self.logger.info(f"{tag}Opening search results {url}")
+        self._navigate(url)
+        self._handle_cookie_banner()
+
+        if not self.wait_until_ready("article"):
+            # No result list: a block page, an empty search or a slow SPA.
+            # Only the empty search is final.
+            if self.is_rate_limited():
+                return False, "Rate limited"
+            try:
+                empty = self.driver.execute_script(NO_RESULTS_JS)
+            except JavascriptException:
+                empty = False
+            if empty:
+                return False, f"No results found for CNPJ: {cnpj}"
+            return False, f"Timeout: search results did not load for CNPJ {cnpj}"
 
-            # Human delay after page load
-            self.human_delay(3, 5)
+        self.stealth_jitter()
+        return True, "Search results loaded"
 
-            # Simulate human behavior
-            if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
-                self.simulate_human_behavior()
+    def _open_results_typed(self, cnpj: str, tag: str = "") -> Tuple[bool, str]:
+        """Type the CNPJ into the search box and click the dropdown result."""
+        self.logger.info(f"{tag}Navigating to {config.ANBIMA_BASE_URL}")
+        self._navigate(config.ANBIMA_BASE_URL)
+        self.wait_until_ready("input[placeholder*='Busque fundos']")
+        self.stealth_jitter()
 
-            # Close cookies banner if present
-            try:
-                cookie_button = self.driver.find_element(By.LINK_TEXT, "Prosseguir")
-                cookie_button.click()
-                self.human_delay(1, 2)
-            except:
-                pass
+        # Simulate human behavior
+        if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
+            self.simulate_human_behavior()
+
+        self._handle_cookie_banner(always=True)
+
+        # Find and fill search input
+        self.logger.info(f"{tag}Searching for CNPJ: {cnpj}")
+        search_input = self.wait.until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "input[placeholder*='Busque fundos']")
+            )
+        )
+
+        # Simulate human typing (delay between keystrokes)
+        search_input.clear()
+        for char in cnpj:
+            search_input.send_keys(char)
+            time.sleep(random.uniform(0.05, 0.15))  # Typing delay
 
-            # Find and fill search input
-            self.logger.info(f"Searching for CNPJ: {cnpj}")
-            search_input = self.wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "input[placeholder*='Busque fundos']")
+        self.human_delay(2, 4)  # Wait before looking for dropdown
+
+        # Click the dropdown result to land on the search-results page
+        self.logger.info(f"{tag}Looking for fund in dropdown results...")
+        try:
+            dropdown_link = self.wait.until(
+                EC.element_to_be_clickable(
+                    (By.XPATH, "//a[contains(@href, '/busca/fundos?q=')]")
                 )
             )
+        except TimeoutException:
+            return False, f"No results found for CNPJ: {cnpj}"
 
-            # Simulate human typing (delay between keystrokes)
-            search_input.clear()
-            for char in cnpj:
-                search_input.send_keys(char)
-                time.sleep(random.uniform(0.05, 0.15))  # Typing delay
+        # Simulate mouse move before click
+        if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
+            ActionChains(self.driver).move_to_element(dropdown_link).perform()
+            time.sleep(random.uniform(0.3, 0.8))
 
-            self.human_delay(2, 4)  # Wait before looking for dropdown
+        dropdown_link.click()
+        self.human_delay(2, 3)
 
-            # Try to click on the dropdown result link
-            self.logger.info("Looking for fund in dropdown results...")
+        # Now we should be on the search results page
+        self.logger.info(f"{tag}Waiting for search results...")
+        self.human_delay(2, 3)
 
-            try:
-                dropdown_link = self.wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//a[contains(@href, '/busca/fundos?q=')]")
-                    )
+        # Try to close dropdown if it's still open
+        try:
+            with self._no_implicit_wait():
+                close_button = self.driver.find_element(
+                    By.CSS_SELECTOR, "button[aria-label='close-dropdown']"
                 )
+            close_button.click()
+            self.human_delay(0.5, 1)
+        except Exception:
+            pass
 
-                # Simulate mouse move before click
-                if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
-                    ActionChains(self.driver).move_to_element(dropdown_link).perform()
-                    time.sleep(random.uniform(0.3, 0.8))
-
-                dropdown_link.click()
-                self.human_delay(2, 3)
+        return True, "Search results loaded"
 
-                # Now we should be on the search results page
-                self.logger.info("Waiting for search results...")
-                self.human_delay(2, 3)
+    def search_fund(self, cnpj: str) -> Tuple[bool, str]:
+        """
+        Search for a fund by CNPJ with human-like behavior
 
-                # Try to close dropdown if it's still open
-                try:
-                    close_button = self.driver.find_element(
-                        By.CSS_SELECTOR, "button[aria-label='close-dropdown']"
-                    )
-                    close_button.click()
-                    self.human_delay(0.5, 1)
-                except:
-                    pass
+        Args:
+            cnpj: The CNPJ to search for
 
-                # Now find and click the fund link in the results
-                fund_links = self.driver.find_elements(
-                    By.CSS_SELECTOR, "article a[href*='/fundos/C']"
-                )
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        try:
+            success, message = self._open_search_results(cnpj)
+            if not success:
+                return False, message
 
-                if not fund_links:
-                    return False, "No fund found for this CNPJ"
+            # Now find and click the fund link in the results
+            fund_links = self.driver.find_elements(
+                By.CSS_SELECTOR, "article a[href*='/fundos/C']"
+            )
 
-                self.logger.info(
-                    f"Found {len(fund_links)} result(s). Clicking on the first one..."
-                )
+            if not fund_links:
+                return False, "No fund found for this CNPJ"
 
-                # Move mouse and click
-                if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
-                    ActionChains(self.driver).move_to_element(fund_links[0]).perform()
-                    time.sleep(random.uniform(0.3, 0.8))
+            self.logger.info(
+                f"Found {len(fund_links)} result(s). Clicking on the first one..."
+            )
 
-                fund_links[0].click()
-                self.human_delay(2, 4)
+            # Move mouse and click
+            if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
+                ActionChains(self.driver).move_to_element(fund_links[0]).perform()
+                time.sleep(random.uniform(0.3, 0.8))
 
-                return True, "Fund found and clicked"
+            fund_links[0].click()
+            self.human_delay(2, 4)
 
-            except TimeoutException:
-                return False, f"No results found for CNPJ: {cnpj}"
+            return True, "Fund found and clicked"
 
         except TimeoutException as e:
             self.logger.error(f"Timeout while searching for CNPJ {cnpj}: {str(e)}")
@@ -834,65 +1462,91 @@ class StealthANBIMAScraper:
             self.logger.error(f"Error searching for CNPJ {cnpj}: {str(e)}")
             return False, f"Error: {str(e)}"
 
-    def get_fund_name(self) -> Optional[str]:
+    def resolve_fund(self, cnpj: str) -> Tuple[bool, Optional[Dict], str]:
         """
-        Extract the fund name from the detail page
+        Find the fund for a CNPJ on the search results page, without opening
+        its detail page: the fund code is in the result link's href and the
+        name in the result card.
+
+        Args:
+            cnpj: The CNPJ to search for
 
         Returns:
-            Fund name or None if not found
+            Tuple of (success: bool, fund: Dict | None, message: str)
+            where fund is {"code": str, "href": str, "name": str}.
         """
         try:
-            # Try multiple selectors for fund name
-            selectors = [
-                "h1",
-                "h2",
-                ".fund-name",
-                ".fund-title",
-                "[class*='title']",
-                "[class*='name']",
-            ]
-
-            for selector in selectors:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    name = element.text.strip()
-                    if name and len(name) > 5:  # Basic validation
-                        self.logger.info(f"Found fund name: {name}")
-                        return name
-                except NoSuchElementException:
-                    continue
+            success, message = self._open_search_results(cnpj)
+            if not success:
+                return False, None, message
 
-            # If no name found, try to get from page source
-            page_source = self.driver.page_source
-            if "CLASSE" in page_source:
-                # Extract from visible text
-                lines = page_source.split("\n")
-                for line in lines:
-                    if "CLASSE" in line.upper() and len(line) > 10:
-                        # Clean HTML tags
-                        import re
+            fund, message = fund_from_results(self.driver)
+            if not fund:
+                return False, None, message
+            self.logger.info(message)
+            return True, fund, "Fund resolved from search results"
 
-                        clean_line = re.sub("<[^<]+?>", "", line).strip()
-                        if clean_line and len(clean_line) > 10:
-                            return clean_line[:200]  # Limit length
+        except TimeoutException as e:
+            self.logger.error(f"Timeout while searching for CNPJ {cnpj}: {str(e)}")
+            return False, None, "Timeout: Page took too long to load"
+        except Exception as e:
+            self.logger.error(f"Error searching for CNPJ {cnpj}: {str(e)}")
+            return False, None, f"Error: {str(e)}"
 
-            self.logger.warning("Could not find fund name")
-            return "N/A"
+    def extract_fund_metadata(self) -> Dict:
+        """
+        Read the fund header facts of the current page in one round trip
 
+        Returns:
+            Dict with "name", "anbima_code", "cnpj", "fund_class" and
+            "header_lines" (values None / "N/A" when not found)
+        """
+        try:
+            metadata = self.driver.execute_script(FUND_METADATA_JS) or {}
         except Exception as e:
-            self.logger.error(f"Error getting fund name: {str(e)}")
-            return "N/A"
+            self.logger.error(f"Error extracting fund metadata: {str(e)}")
+            metadata = {}
+        metadata["fund_class"] = fund_class_from(metadata)
+        return metadata
+
+    def get_fund_name(self) -> Optional[str]:
+        """
+        Extract the fund name from the current page
 
-    def navigate_to_periodic_data(self) -> Tuple[bool, str]:
+        Returns:
+            Fund name or "N/A" if not found
+        """
+        name = self.extract_fund_metadata().get("name")
+        if name:
+            self.logger.info(f"Found fund name: {name}")
+            return name
+        self.logger.warning("Could not find fund name")
+        return "N/A"
+
+    def navigate_to_periodic_data(self, fund_code: Optional[str] = None) -> Tuple[bool, str]:
         """
         Navigate to the 'DADOS PERIÓDICOS' page
 
+        Args:
+            fund_code: Fund code from resolve_fund(). When omitted, the code
+                is taken from the current (detail page) URL.
+
         Returns:
             Tuple of (success: bool, message: str)
         """
         try:
             self.logger.info("Navigating to Dados Periódicos page...")
 
+            if fund_code:
+                site_root = config.ANBIMA_BASE_URL.split("/busca/")[0]
+                periodic_url = f"{site_root}/fundos/{fund_code}/dados-periodicos"
+                self.logger.info(f"Navigating to {periodic_url}")
+                self._navigate(periodic_url)
+                if not self.wait_until_ready("table"):
+                    return False, "No table found on page"
+                self.stealth_jitter()
+                return True, "Successfully navigated to Dados Periódicos page"
+
             # Get the current URL and modify it to go to dados-periodicos
             current_url = self.driver.current_url
 
@@ -906,8 +1560,10 @@ class StealthANBIMAScraper:
                 periodic_url = f"{base_url}/fundos/{fund_code}/dados-periodicos"
 
                 self.logger.info(f"Navigating to {periodic_url}")
-                self.driver.get(periodic_url)
-                self.human_delay(3, 5)
+                self._navigate(periodic_url)
+                if not self.wait_until_ready("table"):
+                    return False, "No table found on page"
+                self.stealth_jitter()
 
                 return True, "Successfully navigated to Dados Periódicos page"
             else:
@@ -918,344 +1574,568 @@ class StealthANBIMAScraper:
             self.logger.error(f"Error navigating to periodic data page: {str(e)}")
             return False, f"Error: {str(e)}"
 
-    def extract_periodic_data(self) -> Tuple[bool, List[Dict], str]:
+    def extract_periodic_data(self, window: Optional[DateWindow] = None) -> Tuple[bool, List[Dict], str]:
         """
         Extract ALL periodic data from the table
         Extracts only: Data competência and Valor cota
-        Scrolls to load all historical data
+        Scrolls to load all historical data (or back to window.since)
+
+        Args:
+            window: Optional since / until bounds on the rows
 
         Returns:
             Tuple of (success: bool, data: List[Dict], message: str)
         """
-        try:
-            self.logger.info("Extracting periodic data table...")
+        harvest = self._new_fund_harvest(window)
+        success, columns, message = self._load_periodic_rows(window, harvest)
+        if not success:
+            return False, [], message
+        return self._read_periodic_rows(columns, window, harvest)
+
+    def _scroll_to_load(self, harvest: RowHarvest, tag: str = "") -> int:
+        """
+        Scroll until the table stops growing (lazy loading), reading the new
+        rows into `harvest` on every step — or, with a `since` bound, until
+        the rows are past it
 
-            # Wait for table to be present
-            self.human_delay(3, 5)
+        Args:
+            harvest: RowHarvest bound to the table's columns
+            tag: Log prefix (e.g. "[FIDC] ")
 
-            # Find the table on the page
-            try:
-                table = self.wait.until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
+        Returns:
+            Number of scrolls made
+        """
+        last_height = 0
+        same_height_count = 0
+        max_scrolls = 50  # Limit to prevent infinite loops
+        scroll_count = 0
+
+        while scroll_count < max_scrolls:
+            added = harvest.step(self.driver.execute_script)
+            if harvest.passed:
+                self.logger.info(
+                    f"{tag}Passed {harvest.window.since:%d/%m/%Y} after {scroll_count} "
+                    f"scrolls ({len(harvest)} rows harvested)"
                 )
-            except TimeoutException:
-                return False, [], "No table found on page"
+                break
 
-            self.logger.info("Found periodic data table")
+            # Scroll to bottom of page
+            self.driver.execute_script(
+                "window.scrollTo(0, document.body.scrollHeight);"
+            )
+            self.human_delay(0.8, 1.5)
 
-            try:
-                # Get table headers to find the indices of the columns we need
-                thead = table.find_element(By.TAG_NAME, "thead")
-                header_cells = thead.find_elements(By.CSS_SELECTOR, "th, td")
-                headers = [cell.text.strip() for cell in header_cells]
-                self.logger.info(f"Table headers: {headers}")
-
-                # Find indices of the columns we want
-                date_idx = None
-                cota_idx = None
-
-                for idx, header in enumerate(headers):
-                    header_upper = header.upper()
-                    if "DATA" in header_upper and "COMPET" in header_upper:
-                        date_idx = idx
-                    elif (
-                        "VALOR" in header_upper
-                        and "COTA" in header_upper
-                        and "PATRIMÔNIO" not in header_upper
-                    ):
-                        cota_idx = idx
+            # Get new height
+            new_height = self.driver.execute_script(
+                "return document.body.scrollHeight"
+            )
 
-                if date_idx is None or cota_idx is None:
-                    self.logger.error(
-                        f"Could not find required columns. Date idx: {date_idx}, Cota idx: {cota_idx}"
+            if new_height == last_height and not added:
+                same_height_count += 1
+                # Nothing new for 3 consecutive scrolls: we're done
+                if same_height_count >= 3:
+                    self.logger.info(
+                        f"{tag}Reached end of data after {scroll_count} scrolls"
                     )
-                    return False, [], "Could not find required columns in table"
+                    break
+            else:
+                same_height_count = 0
 
-                self.logger.info(
-                    f"Found columns - Date index: {date_idx}, Cota index: {cota_idx}"
-                )
+            last_height = new_height
+            scroll_count += 1
+        return scroll_count
 
-                # Scroll down to load all data (in case of lazy loading)
-                self.logger.info("Scrolling to load all historical data...")
-                last_height = 0
-                same_height_count = 0
-                max_scrolls = 50  # Limit to prevent infinite loops
-                scroll_count = 0
+    def _load_periodic_rows(self, window: Optional[DateWindow] = None,
+                            harvest: Optional[RowHarvest] = None,
+                            all_columns: bool = False) -> Tuple[bool, Optional[Dict], str]:
+        """
+        Find the periodic table's date / cota columns and scroll until every
+        historical row (or every row back to window.since) is loaded
+        ("load_rows" step)
 
-                while scroll_count < max_scrolls:
-                    # Scroll to bottom of page
-                    self.driver.execute_script(
-                        "window.scrollTo(0, document.body.scrollHeight);"
-                    )
-                    self.human_delay(0.8, 1.5)
+        Args:
+            window: Optional since / until bounds on the rows
+            harvest: RowHarvest the rows are read into while scrolling (a
+                new one when omitted)
+            all_columns: Also map (and harvest) every FIDC_COLUMNS column
 
-                    # Get new height
-                    new_height = self.driver.execute_script(
-                        "return document.body.scrollHeight"
-                    )
+        Returns:
+            Tuple of (success: bool, columns: {"date": int, "cota": int[, "all": [int | None]]} | None,
+            message: str)
+        """
+        try:
+            self.logger.info("Extracting periodic data table...")
 
-                    if new_height == last_height:
-                        same_height_count += 1
-                        # If height hasn't changed for 3 consecutive scrolls, we're done
-                        if same_height_count >= 3:
-                            self.logger.info(
-                                f"Reached end of data after {scroll_count} scrolls"
-                            )
-                            break
-                    else:
-                        same_height_count = 0
+            # Wait for table to be present (and its rows' XHRs to settle)
+            if not self.wait_until_ready("table"):
+                return False, None, "No table found on page"
+            table = self.driver.find_element(By.TAG_NAME, "table")
 
-                    last_height = new_height
-                    scroll_count += 1
+            self.logger.info("Found periodic data table")
 
-                # Wait a bit for final data to load
-                self.human_delay(2, 3)
+            # Get table headers to find the indices of the columns we need
+            thead = table.find_element(By.TAG_NAME, "thead")
+            header_cells = thead.find_elements(By.CSS_SELECTOR, "th, td")
+            headers = [cell.text.strip() for cell in header_cells]
+            self.logger.info(f"Table headers: {headers}")
 
-                # Get table body again (it may have been updated)
-                tbody = table.find_element(By.TAG_NAME, "tbody")
-                rows = tbody.find_elements(By.TAG_NAME, "tr")
+            # Find indices of the columns we want
+            date_idx = None
+            cota_idx = None
 
-                if not rows:
-                    return False, [], "No data rows found in table"
+            for idx, header in enumerate(headers):
+                header_upper = header.upper()
+                if "DATA" in header_upper and "COMPET" in header_upper:
+                    date_idx = idx
+                elif (
+                    "VALOR" in header_upper
+                    and "COTA" in header_upper
+                    and "PATRIMÔNIO" not in header_upper
+                ):
+                    cota_idx = idx
+
+            if date_idx is None or cota_idx is None:
+                self.logger.error(
+                    f"Could not find required columns. Date idx: {date_idx}, Cota idx: {cota_idx}"
+                )
+                return False, None, "Could not find required columns in table"
 
-                self.logger.info(f"Found {len(rows)} total data rows after scrolling")
+            self.logger.info(
+                f"Found columns - Date index: {date_idx}, Cota index: {cota_idx}"
+            )
+            columns = {"date": date_idx, "cota": cota_idx}
+            if all_columns:
+                col_idx = self.map_fidc_columns(headers)
+                self.logger.info(f"All-columns map: {col_idx}")
+                columns["all"] = [col_idx.get(label) for label, _ in self.FIDC_COLUMNS]
 
-                # Extract data (only date and cota)
-                data = []
-                seen_dates = set()  # To avoid duplicates
+            # Scroll down to load all data (in case of lazy loading)
+            self.logger.info("Scrolling to load all historical data...")
+            if harvest is None:
+                harvest = self._new_fund_harvest(window, all_columns)
+            harvest.bind(columns.get("all") or [date_idx, cota_idx])
+            self._scroll_to_load(harvest)
 
-                for row in rows:
-                    try:
-                        cells = row.find_elements(By.CSS_SELECTOR, "td")
-                        if not cells or len(cells) <= max(date_idx, cota_idx):
-                            continue
-
-                        date_value = cells[date_idx].text.strip()
-                        cota_value = cells[cota_idx].text.strip()
-
-                        if date_value and cota_value and date_value not in seen_dates:
-                            data.append(
-                                {
-                                    "Data da cotização": date_value,
-                                    "Valor cota": cota_value,
-                                }
-                            )
-                            seen_dates.add(date_value)
-
-                    except Exception as e:
-                        self.logger.warning(f"Error processing row: {str(e)}")
-                        continue
+            # Wait for the last lazily loaded rows
+            self.wait_until_ready("table")
 
-                if data:
-                    self.logger.info(f"Successfully extracted {len(data)} unique rows")
-                    # Data is usually newest first, so reverse to get oldest first
-                    data.reverse()
-                    return True, data, f"Extracted {len(data)} periodic data records"
-                else:
-                    return False, [], "No data extracted from table"
+            return True, columns, "Rows loaded"
 
-            except Exception as e:
-                self.logger.error(f"Error processing table: {str(e)}")
-                return False, [], f"Error processing table: {str(e)}"
+        except Exception as e:
+            self.logger.error(f"Error processing table: {str(e)}")
+            return False, None, f"Error processing table: {str(e)}"
+
+    def _read_periodic_rows(self, columns: Dict, window: Optional[DateWindow] = None,
+                            harvest: Optional[RowHarvest] = None) -> Tuple[bool, List[Dict], str]:
+        """
+        Finish the harvest of the periodic table ("extract" step): read the
+        rows not harvested while scrolling and return them all
+
+        Args:
+            columns: {"date": int, "cota": int[, "all": ...]} from _load_periodic_rows()
+            window: Optional since / until bounds; rows outside it are
+                skipped before they are kept
+            harvest: The RowHarvest filled by _load_periodic_rows() (a new
+                one reads the whole table)
+
+        Returns:
+            Tuple of (success: bool, data: List[Dict], message: str)
+        """
+        if harvest is None:
+            harvest = self._new_fund_harvest(window, "all" in columns)
+        harvest.bind(columns.get("all") or [columns["date"], columns["cota"]])
+        try:
+            if not harvest.passed:
+                harvest.step(self.driver.execute_script)
+
+            if harvest.skipped:
+                self.logger.info(
+                    f"Skipped {harvest.skipped} row(s) outside the date window {harvest.window}"
+                )
+            if len(harvest):
+                self.logger.info(f"Successfully extracted {len(harvest)} unique rows")
+                return True, harvest.records(), f"Extracted {len(harvest)} periodic data records"
+            elif harvest.skipped:
+                # The fund has rows, just none in the window
+                self.logger.info(f"No rows in the date window {harvest.window}")
+                return True, [], f"No records in the date window {harvest.window}"
+            else:
+                return False, [], "No data extracted from table"
 
         except Exception as e:
             self.logger.error(f"Error extracting periodic data: {str(e)}")
             return False, [], f"Error: {str(e)}"
 
+    @classmethod
+    def _new_fund_harvest(cls, window: Optional[DateWindow] = None,
+                          all_columns: bool = False) -> RowHarvest:
+        """An empty harvest of the regular periodic table (date + cota, both
+        required) — or of all its FIDC_COLUMNS, date required"""
+        if all_columns:
+            return RowHarvest([label for label, _ in cls.FIDC_COLUMNS], required=1, window=window)
+        return RowHarvest(["Data da cotização", "Valor cota"], required=2, window=window)
+
     def is_rate_limited(self) -> bool:
         """
         Detect if page shows rate limiting or blocking
 
+        One small execute_script (main-document HTTP status, title, HTML size)
+        instead of pulling current_url, title and the full page_source, so it
+        is cheap enough to run after every navigation.
+
         Returns:
             True if rate limited, False otherwise
         """
         try:
-            # Don't check if we're on data:, or about:blank (initial page load)
-            current_url = self.driver.current_url.lower()
-            if (
-                "data:" in current_url
-                or "about:blank" in current_url
-                or not current_url
-            ):
-                return False
-
-            page_source = self.driver.page_source.lower()
-            page_title = self.driver.title.lower()
-
-            rate_limit_indicators = [
-                "too many requests",
-                "429",
-                "423",
-                "rate limit",
-                "bloqueado",
-                "blocked",
-                "access denied",
-                "temporarily unavailable",
-                "try again later",
-                "tente novamente",
-                "acesso negado",
-            ]
-
-            # Only trigger if the indicator appears prominently (not just in page metadata)
-            is_limited = any(
-                indicator in page_title
-                or (indicator in page_source and len(page_source) < 5000)
-                for indicator in rate_limit_indicators
-            )
+            probe = self.driver.execute_script(RATE_LIMIT_PROBE_JS) or {}
+            reason = rate_limit_reason(probe)
 
-            if is_limited:
+            if reason:
                 self.rate_limit_count += 1
+                self._last_rate_limit_at = time.time()
+                if (
+                    self._session_imported_epoch == self._driver_epoch
+                    and self._session_exported_epoch != self._driver_epoch
+                ):
+                    # Blocked before the imported session ever worked
+                    self.session_store.invalidate("rate limited right after import")
+                    self._session_imported_epoch = None
                 self.logger.warning(
-                    f"Rate limit detected! (count: {self.rate_limit_count})"
+                    f"Rate limit detected ({reason})! (count: {self.rate_limit_count})"
                 )
-                self.logger.debug(f"Page title: {page_title[:100]}")
-                self.logger.debug(f"URL: {current_url}")
+                self.logger.debug(f"Page title: {probe.get('title', '')[:100]}")
+                self.logger.debug(f"URL: {probe.get('url')}")
 
-            return is_limited
+            return bool(reason)
 
         except Exception as e:
             self.logger.debug(f"Error checking rate limit: {str(e)}")
             return False
 
-    def scrape_fund_data(self, cnpj: str) -> Dict:
+    def scrape_fund_data(self, cnpj: str, since=None, until=None) -> Dict:
         """
         Complete scraping workflow for a single CNPJ with stealth mode and automatic recovery
 
         Args:
             cnpj: The CNPJ to scrape
+            since: Oldest date to fetch (date, "dd/mm/yyyy", "yyyy-mm-dd" or
+                e.g. "6m"; None = full history). Scrolling stops once the
+                loaded rows are older.
+            until: Newest date to keep (None = up to the latest row)
 
         Returns:
-            Dict with fund data and status
+            Dict with fund data and status, plus "timing": seconds spent on
+            page loading vs deliberate stealth waiting for this CNPJ
         """
-        result = {
-            "CNPJ": cnpj,
-            "Nome do Fundo": "N/A",
-            "periodic_data": [],
-            "Status": "Unknown error",
-        }
+        window = DateWindow.of(since, until)
+        before, started = dict(self.timing), time.time()
+        with self._watched(cnpj, getattr(config, "CNPJ_WALL_TIMEOUT", 150)):
+            result = self._scrape_fund_data(cnpj, window)
+        self._remember_session(result)
+        result["timing"] = self._timing_since(before, started)
+        self._log_timing(cnpj, result["timing"])
+        return result
 
-        # Circuit breaker: if Chrome already proved it won't stay alive, fail
-        # fast instead of spawning yet another doomed browser. Lets the caller's
-        # loop finish quickly (and incremental-save what it has).
-        if self._driver_permanently_dead:
-            result["Status"] = (
-                "Driver dead — Chrome won't stay alive (turn Headless OFF)"
-            )
-            return result
+    def scrape_combined_data(self, cnpj: str, since=None, until=None) -> Dict:
+        """
+        The regular workflow, reading every column of the periodic table
 
-        max_retries = getattr(config, "MAX_RETRIES", 3)
-        max_timeout = getattr(config, "MAX_CNPJ_TIMEOUT", 180)
+        One search and one pass over the DADOS PERIÓDICOS table feed both
+        outputs: the result has the scrape_fund_data() keys ("periodic_data"
+        for process_scraped_data) and a one-entry "subclasses" list (the
+        fund itself, all FIDC_COLUMNS) for process_fidc_data.
 
-        for attempt in range(max_retries):
-            attempt_start_time = time.time()
+        Args:
+            cnpj: The CNPJ to scrape
+            since: Oldest date to fetch (see scrape_fund_data)
+            until: Newest date to keep
+        """
+        window = DateWindow.of(since, until)
+        before, started = dict(self.timing), time.time()
+        with self._watched(cnpj, getattr(config, "CNPJ_WALL_TIMEOUT", 150)):
+            result = self._scrape_fund_data(cnpj, window, all_columns=True)
+        self._remember_session(result)
+        result["timing"] = self._timing_since(before, started)
+        self._log_timing(cnpj, result["timing"])
+        return result
 
-            try:
-                # Check if driver is still alive, attempt recovery if not
-                if not self.is_driver_alive():
-                    self.logger.warning(
-                        f"Driver not alive for {cnpj}, attempting recovery (attempt {attempt + 1}/{max_retries})"
-                    )
-                    if not self.recover_driver():
-                        if attempt < max_retries - 1:
-                            time.sleep(config.RETRY_DELAY)
-                            continue
-                        else:
-                            result["Status"] = "Driver connection lost"
-                            return result
+    def _log_timing(self, cnpj: str, timing: Dict):
+        self.logger.info(
+            f"{cnpj}: {timing['total']:.1f}s total — loading {timing['loading']:.1f}s, "
+            f"stealth waiting {timing['waiting']:.1f}s, other {timing['other']:.1f}s"
+        )
 
-                # Check for rate limiting before starting
-                if self.is_rate_limited():
-                    result["Status"] = "Rate limited"
-                    return result
+    # ----------------------------------------------------------------------
+    # Resumable workflow
+    # ----------------------------------------------------------------------
+    # scrape_fund_data runs FUND_STEPS in order and checkpoints what each one
+    # produced (fund code/name, column map, rows) per CNPJ. A retry resumes at
+    # the failed step: a table that didn't load re-opens the periodic page
+    # instead of searching again. Page-bound steps fall back to the step that
+    # loads their page (RESUME_FROM) and, after a driver recovery, to
+    # "open_periodic". Every retry layer (this loop, the callers' loops)
+    # draws on the same per-CNPJ RetryBudget (retry_policy.py); the
+    # remaining budget is reported in result["attempts_left"] / ["time_left"].
+    FUND_STEPS = ("resolve", "open_periodic", "load_rows", "extract")
+    RESUME_FROM = {"load_rows": "open_periodic", "extract": "load_rows"}
+    PAGE_BOUND_STEPS = ("load_rows", "extract")
+
+    def _checkpoint_for(self, cnpj: str) -> Dict:
+        """The resume state for `cnpj`, created on first use."""
+        if cnpj not in self.checkpoints:
+            self.checkpoints[cnpj] = {
+                "step": self.FUND_STEPS[0],
+                "fund": None,  # {"code", "href", "name"} from resolve_fund()
+                "page_epoch": None,  # driver the periodic page was opened in
+                "columns": None,  # {"date", "cota"[, "all"]} from _load_periodic_rows()
+                "window": None,  # DateWindow of the scrape call
+                "all_columns": False,  # scrape_combined_data(): harvest every column
+                "harvest": None,  # RowHarvest of the periodic table, kept across retries
+                "data": None,  # rows returned by the extract step
+                "last_status": None,
+            }
+        return self.checkpoints[cnpj]
 
-                # Step 1: Search for fund (with timeout check and connection recovery)
-                if time.time() - attempt_start_time > max_timeout:
-                    raise Exception(f"Timeout exceeded ({max_timeout}s)")
+    def clear_checkpoint(self, cnpj: str):
+        """Forget resume state for `cnpj` (the next scrape starts from search)."""
+        self.checkpoints.pop(cnpj, None)
 
-                success, message = self.safe_driver_operation(
-                    lambda: self.search_fund(cnpj), f"Search fund {cnpj}"
-                )
-                if not success:
-                    result["Status"] = message
-                    return result
+    def _settle(self, cnpj: str, checkpoint_key: str, result: Dict, status: str,
+                category: Optional[str], terminal_statuses=("Success",)) -> Dict:
+        """Finish a scrape result: status, retry annotations and cleanup.
 
-                # Check for rate limiting after search
-                if self.is_rate_limited():
-                    result["Status"] = "Rate limited"
-                    return result
+        Checkpoint and budget are dropped once nothing is left to resume —
+        success, a final category (not found) or a spent budget.
+        """
+        budget = self.retry_policy.budget(cnpj)
+        result["Status"] = status
+        self.retry_policy.annotate(result, budget, category)
+        if status in terminal_statuses and category is not None:
+            result["attempts_left"] = 0  # final failure: nothing left to retry
+        if (
+            status in terminal_statuses
+            or category not in self.retry_policy.RETRYABLE
+            or budget.exhausted
+        ):
+            self.clear_checkpoint(checkpoint_key)
+            self.retry_policy.release(cnpj)
+        return result
 
-                # Step 2: Get fund name (with timeout check and connection recovery)
-                if time.time() - attempt_start_time > max_timeout:
-                    raise Exception(f"Timeout exceeded ({max_timeout}s)")
+    def _step_failed(self, cp: Dict, status: str) -> str:
+        """Record a failed step and move the checkpoint to where a retry resumes."""
+        cp["last_status"] = status
+        cp["step"] = self.RESUME_FROM.get(cp["step"], cp["step"])
+        return status
 
-                fund_name = self.safe_driver_operation(
-                    lambda: self.get_fund_name(), f"Get fund name {cnpj}"
-                )
-                result["Nome do Fundo"] = fund_name if fund_name else "N/A"
+    def _run_fund_steps(self, cnpj: str, cp: Dict, deadline: float,
+                        timeout_status: str = "Timeout exceeded") -> str:
+        """
+        Run the remaining FUND_STEPS from cp["step"]
 
-                # Step 3: Navigate to periodic data page (with timeout check and connection recovery)
-                if time.time() - attempt_start_time > max_timeout:
-                    raise Exception(f"Timeout exceeded ({max_timeout}s)")
+        Args:
+            deadline: Wall-clock time the steps must finish by
+            timeout_status: Error raised past the deadline (says which limit it was)
 
+        Returns:
+            "Success", or the status message of the step that failed
+        """
+        # A recovered driver lost the periodic page
+        if cp["step"] in self.PAGE_BOUND_STEPS and cp["page_epoch"] != self._driver_epoch:
+            cp["step"] = "open_periodic"
+        if cp["step"] != self.FUND_STEPS[0]:
+            self.logger.info(f"Resuming {cnpj} at step '{cp['step']}'")
+
+        while True:
+            self._check_cancelled()
+            if time.time() > deadline:
+                raise Exception(timeout_status)
+            step = cp["step"]
+
+            if step == "resolve":
+                fund = self.catalog.fund(cnpj) if self.catalog is not None else None
+                if fund:
+                    self.logger.info(f"{cnpj}: {fund['code']} from the fund catalog, skipping the search")
+                    cp["fund"] = dict(fund, cataloged=True)
+                    cp["step"] = "open_periodic"
+                    continue
+                # Check for rate limiting before starting
+                if self.is_rate_limited():
+                    return self._step_failed(cp, "Rate limited")
+                # The results page already has the fund code (link href) and
+                # name (result card), so the detail page is never loaded.
+                success, fund, message = self.safe_driver_operation(
+                    lambda: self.resolve_fund(cnpj), f"Resolve fund {cnpj}", max_attempts=1
+                )
+                if not success:
+                    return self._step_failed(cp, message)
+                # Check for rate limiting after search
+                if self.is_rate_limited():
+                    return self._step_failed(cp, "Rate limited")
+                cp["fund"] = fund
+                cp["step"] = "open_periodic"
+
+            elif step == "open_periodic":
                 success, message = self.safe_driver_operation(
-                    lambda: self.navigate_to_periodic_data(),
+                    lambda: self.navigate_to_periodic_data(cp["fund"]["code"]),
                     f"Navigate to periodic data {cnpj}",
+                    max_attempts=1,
                 )
+                if not success and cp["fund"].get("cataloged"):
+                    return self._forget_cataloged(cnpj, cp, message)
                 if not success:
-                    result["Status"] = message
-                    return result
-
+                    return self._step_failed(cp, message)
                 # Check for rate limiting after navigation
                 if self.is_rate_limited():
-                    result["Status"] = "Rate limited"
-                    return result
-
-                # Step 4: Extract periodic data (with timeout check and connection recovery)
-                if time.time() - attempt_start_time > max_timeout:
-                    raise Exception(f"Timeout exceeded ({max_timeout}s)")
+                    return self._step_failed(cp, "Rate limited")
+                # Result card had no usable name — the periodic page header has it
+                if cp["fund"]["name"] == "N/A":
+                    fund_name = self.get_fund_name()
+                    cp["fund"]["name"] = fund_name if fund_name else "N/A"
+                cp["page_epoch"] = self._driver_epoch
+                cp["step"] = "load_rows"
+
+            elif step == "load_rows":
+                success, columns, message = self.safe_driver_operation(
+                    lambda: self._load_periodic_rows(cp["window"], cp["harvest"], cp["all_columns"]),
+                    f"Load rows {cnpj}",
+                    max_attempts=1,
+                )
+                if not success and message == "No table found on page" and cp["fund"].get("cataloged"):
+                    return self._forget_cataloged(cnpj, cp, message)
+                if not success:
+                    return self._step_failed(cp, message)
+                cp["columns"] = columns
+                cp["step"] = "extract"
 
+            elif step == "extract":
                 success, data, message = self.safe_driver_operation(
-                    lambda: self.extract_periodic_data(),
+                    lambda: self._read_periodic_rows(cp["columns"], cp["window"], cp["harvest"]),
                     f"Extract periodic data {cnpj}",
+                    max_attempts=1,
                 )
                 if not success:
-                    result["Status"] = message
-                    return result
+                    return self._step_failed(cp, message)
+                cp["data"] = data
+                return "Success"
+
+    def _forget_cataloged(self, cnpj: str, cp: Dict, message: str) -> str:
+        """A cataloged fund's page has no data: drop the (possibly stale)
+        entry so the retry searches for real."""
+        self.catalog.forget(cnpj)
+        cp["fund"], cp["step"] = None, "resolve"
+        cp["harvest"] = self._new_fund_harvest(cp["window"], cp["all_columns"])
+        cp["last_status"] = message
+        return message
+
+    def _scrape_fund_data(self, cnpj: str, window: Optional[DateWindow] = None,
+                          all_columns: bool = False) -> Dict:
+        """scrape_fund_data() (scrape_combined_data() with `all_columns`) without the timing report."""
+        result = {
+            "CNPJ": cnpj,
+            "Nome do Fundo": "N/A",
+            "periodic_data": [],
+            "Status": "Unknown error",
+        }
+        if all_columns:
+            result["subclasses"] = []
 
-                result["periodic_data"] = data
-                result["Status"] = "Success"
+        # Circuit breaker: if Chrome already proved it won't stay alive, fail
+        # fast instead of spawning yet another doomed browser. Lets the caller's
+        # loop finish quickly (and incremental-save what it has).
+        if self._driver_permanently_dead:
+            result["Status"] = (
+                "Driver dead — Chrome won't stay alive (turn Headless OFF)"
+            )
+            result["error_category"] = DRIVER_DEAD
+            result["attempts_left"] = 0
+            return result
 
-                return result
+        budget = self.retry_policy.budget(cnpj)
+        max_timeout = getattr(config, "MAX_CNPJ_TIMEOUT", 180)
+        cp = self._checkpoint_for(cnpj)
+        cp["window"] = window
+        if cp["harvest"] is None or cp["all_columns"] != all_columns:
+            # A checkpoint of the other mode: its rows have the wrong columns
+            cp["harvest"] = self._new_fund_harvest(window, all_columns)
+            if cp["step"] in self.PAGE_BOUND_STEPS:
+                cp["step"] = "load_rows"
+        cp["all_columns"] = all_columns
+        status, category = None, None
+
+        while budget.begin_attempt("scraper"):
+            attempt = budget.attempts
+            raised = False
+            try:
+                # Check if driver is still alive, attempt recovery if not
+                if not self.is_driver_alive():
+                    self.logger.warning(
+                        f"Driver not alive for {cnpj}, attempting recovery "
+                        f"(attempt {attempt}/{budget.max_attempts})"
+                    )
+                    if not self.recover_driver():
+                        raise WebDriverException("Driver connection lost")
+
+                if budget.time_left < max_timeout:
+                    timeout_status = "Timeout: CNPJ time budget spent"
+                else:
+                    timeout_status = f"Timeout exceeded ({max_timeout}s)"
+                deadline = time.time() + min(max_timeout, budget.time_left)
+                status = self._run_fund_steps(cnpj, cp, deadline, timeout_status)
+                category = classify(status)
 
             except WebDriverException as e:
-                # Driver connection issues - try to recover
+                # Driver connection issues - recover and retry here
+                raised = True
                 self.logger.warning(
-                    f"WebDriver exception for {cnpj} (attempt {attempt + 1}/{max_retries}): {str(e)}"
+                    f"WebDriver exception for {cnpj} at step '{cp['step']}' "
+                    f"(attempt {attempt}/{budget.max_attempts}): {str(e)}"
                 )
-
-                if attempt < max_retries - 1:
-                    self.logger.info(f"Retrying {cnpj} after driver error...")
-                    if not self.recover_driver():
-                        time.sleep(config.RETRY_DELAY)
-                    continue
-                else:
-                    result["Status"] = f"WebDriver error after {max_retries} attempts"
-                    return result
+                status = self._step_failed(cp, f"WebDriver error after {attempt} attempts")
+                category = DRIVER_DEAD
 
             except Exception as e:
+                raised = True
                 self.logger.error(
-                    f"Error in scrape_fund_data for {cnpj} (attempt {attempt + 1}/{max_retries}): {str(e)}"
+                    f"Error in scrape_fund_data for {cnpj} at step '{cp['step']}' "
+                    f"(attempt {attempt}/{budget.max_attempts}): {str(e)}"
+                )
+                status = self._step_failed(cp, f"Error: {str(e)}")
+                category = classify(status, e)
+
+            if self.cancelled and category is not None:
+                # Stopped by the watchdog (or a caller): report that, not the
+                # error the interrupted step ran into, and don't retry here
+                status = cp["last_status"] = self.cancel_reason
+                category = classify(status)
+                raised = False
+
+            budget.end_attempt("scraper", category, status)
+            if cp["fund"]:
+                result["Nome do Fundo"] = cp["fund"]["name"]
+            if category is None and all_columns:
+                result["periodic_data"], result["subclasses"] = combined_views(
+                    result["Nome do Fundo"], cp["fund"]["code"], cp["data"]
                 )
+            elif category is None:
+                result["periodic_data"] = cp["data"]
 
-                if attempt < max_retries - 1:
-                    self.logger.info(f"Retrying {cnpj} after error...")
-                    time.sleep(config.RETRY_DELAY)
-                    continue
-                else:
-                    result["Status"] = f"Error: {str(e)}"
-                    return result
+            # Step-level failures go back to the caller, whose retry (if the
+            # policy allows one) resumes from the checkpoint
+            if not raised or budget.exhausted:
+                break
 
-        return result
+            delay = self.retry_policy.backoff(category, attempt)
+            budget.note("scraper", f"retry in {delay:.0f}s")
+            self.logger.info(f"Retrying {cnpj} after {category}...")
+            started = time.time()
+            if category != DRIVER_DEAD or not self.recover_driver():
+                time.sleep(delay)
+            budget.charge(time.time() - started)
+
+        if status is None:  # budget was already spent when called
+            status = cp["last_status"] or "Retry budget exhausted"
+            category = classify(status)
+        return self._settle(cnpj, cnpj, result, status, category)
 
     # ======================================================================
     # FIDC workflow
@@ -1267,7 +2147,8 @@ class StealthANBIMAScraper:
     #   2. The DADOS PERIÓDICOS table has 6 columns instead of 2.
     # These methods reuse the same navigation / anti-bot / recovery primitives
     # as the regular workflow; only the result-collection and table-parsing
-    # differ. The regular workflow above is left untouched.
+    # differ. The regular workflow above only borrows FIDC_COLUMNS for its
+    # all-columns mode (scrape_combined_data).
     # ======================================================================
 
     # Column-name → keyword matchers for the FIDC periodic table. Each value is
@@ -1282,6 +2163,21 @@ class StealthANBIMAScraper:
         ("Número total de cotistas", (("COTISTA",), ())),
     ]
 
+    @classmethod
+    def map_fidc_columns(cls, headers: List[str]) -> Dict[str, int]:
+        """Header index per FIDC_COLUMNS label (labels that match nothing are left out)."""
+        col_idx = {}
+        for idx, header in enumerate(headers):
+            h = header.upper()
+            for label, (must_all, must_not) in cls.FIDC_COLUMNS:
+                if label in col_idx:
+                    continue
+                if all(tok in h for tok in must_all) and not any(
+                    tok in h for tok in must_not
+                ):
+                    col_idx[label] = idx
+        return col_idx
+
     def search_fidc_subclasses(self, cnpj: str):
         """
         Search a CNPJ and collect ALL result links (subclasses), instead of
@@ -1292,62 +2188,10 @@ class StealthANBIMAScraper:
             where each subclass dict is {"name": str, "href": str, "code": str}.
         """
         try:
-            # --- mirror search_fund up to the results page --------------------
-            self.logger.info(f"[FIDC] Navigating to {config.ANBIMA_BASE_URL}")
-            self.driver.get(config.ANBIMA_BASE_URL)
-            self.human_delay(3, 5)
-
-            if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
-                self.simulate_human_behavior()
-
-            # Close cookies banner if present
-            try:
-                cookie_button = self.driver.find_element(By.LINK_TEXT, "Prosseguir")
-                cookie_button.click()
-                self.human_delay(1, 2)
-            except Exception:
-                pass
-
-            # Find + fill the search input (human-like typing)
-            self.logger.info(f"[FIDC] Searching for CNPJ: {cnpj}")
-            search_input = self.wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "input[placeholder*='Busque fundos']")
-                )
-            )
-            search_input.clear()
-            for char in cnpj:
-                search_input.send_keys(char)
-                time.sleep(random.uniform(0.05, 0.15))
-
-            self.human_delay(2, 4)
-
-            # Click the dropdown result to land on the search-results page
-            try:
-                dropdown_link = self.wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//a[contains(@href, '/busca/fundos?q=')]")
-                    )
-                )
-                if getattr(config, "STEALTH_MOUSE_MOVEMENTS", True):
-                    ActionChains(self.driver).move_to_element(dropdown_link).perform()
-                    time.sleep(random.uniform(0.3, 0.8))
-                dropdown_link.click()
-                self.human_delay(2, 3)
-            except TimeoutException:
-                return False, [], f"No results found for CNPJ: {cnpj}"
-
-            # Close the dropdown if it lingers
-            try:
-                close_button = self.driver.find_element(
-                    By.CSS_SELECTOR, "button[aria-label='close-dropdown']"
-                )
-                close_button.click()
-                self.human_delay(0.5, 1)
-            except Exception:
-                pass
-
-            self.human_delay(2, 3)
+            # --- same results page as search_fund ----------------------------
+            success, message = self._open_search_results(cnpj, tag="[FIDC] ")
+            if not success:
+                return False, [], message
 
             # --- collect ALL result anchors (not just the first) --------------
             # Use a broad selector; FIDC subclass codes are numeric and the link
@@ -1420,44 +2264,45 @@ class StealthANBIMAScraper:
             self.logger.error(f"[FIDC] Error searching for CNPJ {cnpj}: {str(e)}")
             return False, [], f"Error: {str(e)}"
 
+    @staticmethod
+    def _fidc_periodic_url(href: str) -> str:
+        """A subclass's DADOS PERIÓDICOS URL from its detail href."""
+        base = href.split("?")[0].split("#")[0].rstrip("/")
+        return base if base.endswith("/dados-periodicos") else f"{base}/dados-periodicos"
+
     def _navigate_to_fidc_periodic(self, href: str) -> Tuple[bool, str]:
         """Navigate to a subclass's DADOS PERIÓDICOS page from its detail href."""
         try:
-            base = href.split("?")[0].split("#")[0].rstrip("/")
-            periodic_url = (
-                base
-                if base.endswith("/dados-periodicos")
-                else f"{base}/dados-periodicos"
-            )
+            periodic_url = self._fidc_periodic_url(href)
             self.logger.info(f"[FIDC] Navigating to {periodic_url}")
-            self.driver.get(periodic_url)
-            self.human_delay(3, 5)
+            self._navigate(periodic_url)
+            if not self.wait_until_ready("table"):
+                return False, "No table found on page"
+            self.stealth_jitter()
             return True, "ok"
         except Exception as e:
             self.logger.error(f"[FIDC] Error navigating to periodic page: {str(e)}")
             return False, f"Error: {str(e)}"
 
-    def extract_fidc_periodic_data(self):
+    def extract_fidc_periodic_data(self, window: Optional[DateWindow] = None):
         """
         Extract the full FIDC DADOS PERIÓDICOS table (all 6 columns).
 
-        Reuses the scroll-to-load and header-scan approach of
+        Reuses the scroll-and-harvest and header-scan approach of
         extract_periodic_data, but maps every column in FIDC_COLUMNS.
 
+        Args:
+            window: Optional since / until bounds on the rows
+
         Returns:
             Tuple of (success: bool, data: List[Dict], message: str)
             where each row dict is keyed by the full Portuguese column names.
         """
         try:
             self.logger.info("[FIDC] Extracting periodic data table...")
-            self.human_delay(3, 5)
-
-            try:
-                table = self.wait.until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
-                )
-            except TimeoutException:
+            if not self.wait_until_ready("table"):
                 return False, [], "No table found on page"
+            table = self.driver.find_element(By.TAG_NAME, "table")
 
             # --- map headers → indices for all FIDC columns -------------------
             thead = table.find_element(By.TAG_NAME, "thead")
@@ -1465,16 +2310,7 @@ class StealthANBIMAScraper:
             headers = [cell.text.strip() for cell in header_cells]
             self.logger.info(f"[FIDC] Table headers: {headers}")
 
-            col_idx = {}  # column label -> header index
-            for idx, header in enumerate(headers):
-                h = header.upper()
-                for label, (must_all, must_not) in self.FIDC_COLUMNS:
-                    if label in col_idx:
-                        continue
-                    if all(tok in h for tok in must_all) and not any(
-                        tok in h for tok in must_not
-                    ):
-                        col_idx[label] = idx
+            col_idx = self.map_fidc_columns(headers)
 
             date_label = self.FIDC_COLUMNS[0][0]  # "Data competência"
             if date_label not in col_idx:
@@ -1483,74 +2319,41 @@ class StealthANBIMAScraper:
 
             self.logger.info(f"[FIDC] Column map: {col_idx}")
 
-            # --- scroll to load all historical rows (reuse the same loop) -----
-            last_height = 0
-            same_height_count = 0
-            max_scrolls = 50
-            scroll_count = 0
-            while scroll_count < max_scrolls:
-                self.driver.execute_script(
-                    "window.scrollTo(0, document.body.scrollHeight);"
-                )
-                self.human_delay(0.8, 1.5)
-                new_height = self.driver.execute_script(
-                    "return document.body.scrollHeight"
-                )
-                if new_height == last_height:
-                    same_height_count += 1
-                    if same_height_count >= 3:
-                        break
-                else:
-                    same_height_count = 0
-                last_height = new_height
-                scroll_count += 1
-            self.human_delay(2, 3)
-
-            # --- read rows ----------------------------------------------------
-            tbody = table.find_element(By.TAG_NAME, "tbody")
-            rows = tbody.find_elements(By.TAG_NAME, "tr")
-            if not rows:
-                return False, [], "No data rows found in table"
-
-            max_needed = max(col_idx.values())
-            data = []
-            seen_dates = set()
-            for row in rows:
-                try:
-                    cells = row.find_elements(By.CSS_SELECTOR, "td")
-                    if not cells or len(cells) <= max_needed:
-                        continue
-                    record = {}
-                    for label, _ in self.FIDC_COLUMNS:
-                        i = col_idx.get(label)
-                        record[label] = (
-                            cells[i].text.strip()
-                            if i is not None and i < len(cells)
-                            else ""
-                        )
-                    date_value = record.get(date_label, "")
-                    if date_value and date_value not in seen_dates:
-                        data.append(record)
-                        seen_dates.add(date_value)
-                except Exception as e:
-                    self.logger.warning(f"[FIDC] Error processing row: {str(e)}")
-                    continue
+            # --- scroll, harvesting the rows as they load ---------------------
+            harvest = RowHarvest([label for label, _ in self.FIDC_COLUMNS], window=window)
+            harvest.bind([col_idx.get(label) for label, _ in self.FIDC_COLUMNS])
+            self._scroll_to_load(harvest, tag="[FIDC] ")
+            self.wait_until_ready("table")
+            if not harvest.passed:
+                harvest.step(self.driver.execute_script)
 
-            if not data:
+            if harvest.skipped:
+                self.logger.info(
+                    f"[FIDC] Skipped {harvest.skipped} row(s) outside the date window {window}"
+                )
+            if not len(harvest) and harvest.skipped:
+                self.logger.info(f"[FIDC] No rows in the date window {window}")
+                return True, [], f"No records in the date window {window}"
+            if not len(harvest):
                 return False, [], "No data extracted from FIDC table"
 
-            data.reverse()  # newest-first → oldest-first
-            self.logger.info(f"[FIDC] Extracted {len(data)} rows")
-            return True, data, f"Extracted {len(data)} FIDC periodic records"
+            self.logger.info(f"[FIDC] Extracted {len(harvest)} rows")
+            return True, harvest.records(), f"Extracted {len(harvest)} FIDC periodic records"
 
         except Exception as e:
             self.logger.error(f"[FIDC] Error extracting periodic data: {str(e)}")
             return False, [], f"Error: {str(e)}"
 
-    def scrape_fidc_data(self, cnpj: str) -> Dict:
+    def scrape_fidc_data(self, cnpj: str, since=None, until=None,
+                         desired: Optional[str] = None) -> Dict:
         """
         Complete FIDC scraping workflow for one CNPJ. Collects every subclass
-        and its full periodic table.
+        and its full periodic table (or its rows between `since` and
+        `until`, see scrape_fund_data).
+
+        With `desired` (a subclass code or class name, see subclass_matches)
+        only the matching subclasses are visited; if none match, all are,
+        and result["subclass_filter"] is "no match".
 
         Returns:
             {
@@ -1560,9 +2363,28 @@ class StealthANBIMAScraper:
                  {"subclasse_name": str, "subclasse_code": str,
                   "periodic_data": [ {<6 column keys>: str}, ... ]},
                  ...
-              ]
+              ],
+              "subclass_filter": "matched" | "no match"  (only with `desired`),
+              "timing": {"total", "loading", "waiting", "other"} seconds
             }
         """
+        window = DateWindow.of(since, until)
+        before, started = dict(self.timing), time.time()
+        with self._watched(cnpj, getattr(config, "FIDC_WALL_TIMEOUT", 420), f"FIDC {cnpj}"):
+            result = self._scrape_fidc_data(cnpj, window, desired)
+        self._remember_session(result)
+        result["timing"] = self._timing_since(before, started)
+        self._log_timing(cnpj, result["timing"])
+        return result
+
+    def _scrape_fidc_data(self, cnpj: str, window: Optional[DateWindow] = None,
+                          desired: Optional[str] = None) -> Dict:
+        """scrape_fidc_data() without the timing report.
+
+        Resumable like the regular workflow: the subclass list and every
+        subclass already collected are checkpointed, so a retry continues
+        with the next subclass instead of searching again.
+        """
         result = {"CNPJ": cnpj, "Status": "Unknown error", "subclasses": []}
 
         # Circuit breaker — fail fast if Chrome already proved it won't stay alive.
@@ -1570,60 +2392,243 @@ class StealthANBIMAScraper:
             result["Status"] = (
                 "Driver dead — Chrome won't stay alive (turn Headless OFF)"
             )
+            result["error_category"] = DRIVER_DEAD
+            result["attempts_left"] = 0
             return result
 
-        max_retries = getattr(config, "MAX_RETRIES", 3)
+        budget = self.retry_policy.budget(cnpj)
+        key = f"fidc:{cnpj}"
+        cp = self.checkpoints.setdefault(
+            key, {"subclasses": None, "filter": None, "collected": [], "cataloged": False,
+                  "last_status": None}
+        )
+        status, category = None, None
+
+        def collected() -> List[Dict]:
+            return [c for c in cp["collected"] if c is not None]
 
-        for attempt in range(max_retries):
+        while budget.begin_attempt("scraper"):
+            attempt = budget.attempts
+            raised = False
             try:
                 if not self.is_driver_alive():
                     self.logger.warning(
                         f"[FIDC] Driver not alive for {cnpj}, attempting recovery "
-                        f"(attempt {attempt + 1}/{max_retries})"
+                        f"(attempt {attempt}/{budget.max_attempts})"
                     )
                     if not self.recover_driver():
-                        if attempt < max_retries - 1:
-                            time.sleep(config.RETRY_DELAY)
-                            continue
-                        result["Status"] = "Driver connection lost"
-                        return result
+                        raise WebDriverException("Driver connection lost")
+                status = self._run_fidc_steps(cnpj, cp, window, desired)
+                category = classify(status)
 
-                if self.is_rate_limited():
-                    result["Status"] = "Rate limited"
-                    return result
+            except WebDriverException as e:
+                raised = True
+                self.logger.warning(
+                    f"[FIDC] WebDriver exception for {cnpj} "
+                    f"(attempt {attempt}/{budget.max_attempts}): {str(e)}"
+                )
+                status = cp["last_status"] = f"WebDriver error after {attempt} attempts"
+                category = DRIVER_DEAD
+
+            except Exception as e:
+                raised = True
+                self.logger.error(
+                    f"[FIDC] Error in scrape_fidc_data for {cnpj} "
+                    f"(attempt {attempt}/{budget.max_attempts}): {str(e)}"
+                )
+                status = cp["last_status"] = f"Error: {str(e)}"
+                category = classify(status, e)
 
-                # Step 1: collect all subclass result links
+            if self.cancelled and category is not None:
+                status = cp["last_status"] = self.cancel_reason
+                category = classify(status)
+                raised = False
+
+            budget.end_attempt("scraper", category, status)
+            if not raised or budget.exhausted:
+                break
+
+            delay = self.retry_policy.backoff(category, attempt)
+            budget.note("scraper", f"retry in {delay:.0f}s")
+            started = time.time()
+            if category != DRIVER_DEAD or not self.recover_driver():
+                time.sleep(delay)
+            budget.charge(time.time() - started)
+
+        if status is None:  # budget was already spent when called
+            status = cp["last_status"] or "Retry budget exhausted"
+            category = classify(status)
+        result["subclasses"] = collected()
+        if cp["filter"]:
+            result["subclass_filter"] = cp["filter"]
+        # "No data extracted" is final too: every subclass was visited
+        return self._settle(
+            cnpj, key, result, status, category,
+            terminal_statuses=("Success", "No data extracted"),
+        )
+
+    def _run_fidc_steps(self, cnpj: str, cp: Dict, window: Optional[DateWindow] = None,
+                        desired: Optional[str] = None) -> str:
+        """
+        Search (unless checkpointed) and collect the subclasses not collected
+        yet — only those matching `desired`, when it matches any
+
+        Returns:
+            "Success", "No data extracted", or the status that stopped the run
+        """
+        if self.is_rate_limited():
+            return "Rate limited"
+
+        # Step 1: collect all subclass result links (from the catalog when it knows them)
+        if cp["subclasses"] is None:
+            subclasses = self.catalog.subclasses(cnpj) if self.catalog is not None else []
+            cp["cataloged"] = bool(subclasses)
+            if subclasses:
+                self.logger.info(
+                    f"[FIDC] {len(subclasses)} subclass(es) of {cnpj} from the fund catalog, "
+                    f"skipping the search"
+                )
+            else:
                 success, subclasses, message = self.safe_driver_operation(
                     lambda: self.search_fidc_subclasses(cnpj),
                     f"[FIDC] Search subclasses {cnpj}",
+                    max_attempts=1,
                 )
                 if not success:
-                    result["Status"] = message
-                    return result
-
-                # Step 2: for each subclass, visit its periodic page + extract
-                collected = []
-                for sub in subclasses:
-                    if self.is_rate_limited():
-                        result["Status"] = "Rate limited"
-                        result["subclasses"] = collected
-                        return result
+                    return message
+            if desired:
+                subclasses, matched = filter_subclass_links(desired, subclasses)
+                cp["filter"] = "matched" if matched else "no match"
+                if matched:
+                    self.logger.info(
+                        f"[FIDC] Filtered to '{desired}': {len(subclasses)} subclass(es)"
+                    )
+                else:
+                    self.logger.warning(
+                        f"[FIDC] Desired '{desired}' matched no subclass — "
+                        f"keeping all {len(subclasses)}"
+                    )
+            cp["subclasses"] = subclasses
+        elif cp["collected"]:
+            self.logger.info(
+                f"[FIDC] Resuming {cnpj} at subclass "
+                f"{len(cp['collected']) + 1}/{len(cp['subclasses'])}"
+            )
 
-                    nav_ok, nav_msg = self.safe_driver_operation(
-                        lambda: self._navigate_to_fidc_periodic(sub["href"]),
-                        f"[FIDC] Navigate {sub['code']}",
+        # Step 2: for each subclass not collected yet, visit its periodic
+        # page + extract — in tabs of this browser when there are several
+        pending = cp["subclasses"][len(cp["collected"]):]
+        tabs = max(1, int(getattr(config, "FIDC_PARALLEL_TABS", 1)))
+        if tabs > 1 and len(pending) > 1:
+            status = self._collect_fidc_in_tabs(cp, pending, window, tabs)
+            if status is not None:
+                return status
+            pending = []
+        for sub in pending:
+            self._check_cancelled()
+            if self.is_rate_limited():
+                return "Rate limited"
+
+            nav_ok, nav_msg = self.safe_driver_operation(
+                lambda: self._navigate_to_fidc_periodic(sub["href"]),
+                f"[FIDC] Navigate {sub['code']}",
+                max_attempts=1,
+            )
+            if not nav_ok:
+                self.logger.warning(
+                    f"[FIDC] Skipping subclass {sub['code']}: {nav_msg}"
+                )
+                if nav_msg == "No table found on page":
+                    # The page opened without data: list the subclass, empty
+                    cp["collected"].append(
+                        {"subclasse_name": sub["name"], "subclasse_code": sub["code"],
+                         "periodic_data": []}
                     )
-                    if not nav_ok:
-                        self.logger.warning(
-                            f"[FIDC] Skipping subclass {sub['code']}: {nav_msg}"
-                        )
-                        continue
+                else:
+                    cp["collected"].append(None)  # placeholder: keeps the resume index
+                continue
+
+            ok, rows, msg = self.safe_driver_operation(
+                lambda: self.extract_fidc_periodic_data(window),
+                f"[FIDC] Extract {sub['code']}",
+                max_attempts=1,
+            )
+            cp["collected"].append(
+                {
+                    "subclasse_name": sub["name"],
+                    "subclasse_code": sub["code"],
+                    "periodic_data": rows if ok else [],
+                }
+            )
+            if not ok:
+                self.logger.warning(
+                    f"[FIDC] No data for subclass {sub['code']}: {msg}"
+                )
+
+        if any(c is not None for c in cp["collected"]):
+            return "Success"
+        if cp.get("cataloged"):
+            # Not one cataloged subclass page opened: search for real instead
+            self.logger.warning(f"[FIDC] Cataloged subclasses of {cnpj} failed; searching")
+            self.catalog.forget(cnpj)
+            cp.update(subclasses=None, filter=None, collected=[], cataloged=False)
+            return self._run_fidc_steps(cnpj, cp, window, desired)
+        return "No data extracted"
+
+    def _collect_fidc_in_tabs(self, cp: Dict, pending: List[Dict],
+                              window: Optional[DateWindow], tabs: int) -> Optional[str]:
+        """
+        Collect `pending` subclasses `tabs` at a time: open a tab per
+        subclass (each paced by the rate limiter) so their pages load
+        together, then extract them one by one in their original order
+
+        Subclasses are appended to cp["collected"] in order (None for one
+        whose tab failed), so the result keeps the search order and a retry
+        resumes at the first subclass not collected.
 
+        Returns:
+            None when every subclass was visited, else the status that
+            stopped the run ("Rate limited")
+        """
+        main = self.driver.current_window_handle
+        for start in range(0, len(pending), tabs):
+            batch = pending[start:start + tabs]
+            opened = []  # (subclass, tab handle or None)
+            try:
+                for sub in batch:
+                    self._check_cancelled()
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.wait_if_needed()
+                    url = self._fidc_periodic_url(sub["href"])
+                    try:
+                        # The New Window command isn't subject to the popup
+                        # blocker; assigning location returns before the load.
+                        self.driver.switch_to.new_window("tab")
+                        self._apply_stealth_scripts()  # CDP overrides are per tab
+                        self.driver.execute_script("window.location.href = arguments[0];", url)
+                        opened.append((sub, self.driver.current_window_handle))
+                        self.logger.info(f"[FIDC] Opened tab for {url}")
+                    except WebDriverException as e:
+                        if not self.is_driver_alive():
+                            raise
+                        self.logger.warning(f"[FIDC] Could not open a tab for {sub['code']}: {e}")
+                        opened.append((sub, None))
+                    self.human_delay(0.3, 0.8)
+
+                for sub, handle in opened:
+                    self._check_cancelled()
+                    if handle is None:
+                        cp["collected"].append(None)  # placeholder: keeps the resume index
+                        continue
+                    self.driver.switch_to.window(handle)
+                    if self.is_rate_limited():
+                        return "Rate limited"
                     ok, rows, msg = self.safe_driver_operation(
-                        lambda: self.extract_fidc_periodic_data(),
+                        lambda: self.extract_fidc_periodic_data(window),
                         f"[FIDC] Extract {sub['code']}",
+                        max_attempts=1,
                     )
-                    collected.append(
+                    cp["collected"].append(
                         {
                             "subclasse_name": sub["name"],
                             "subclasse_code": sub["code"],
@@ -1634,44 +2639,64 @@ class StealthANBIMAScraper:
                         self.logger.warning(
                             f"[FIDC] No data for subclass {sub['code']}: {msg}"
                         )
+            finally:
+                self._close_other_tabs(main)
+        return None
 
-                result["subclasses"] = collected
-                result["Status"] = "Success" if collected else "No data extracted"
-                return result
+    def _close_other_tabs(self, keep: str):
+        """Close every tab but `keep` and switch back to it (best-effort)."""
+        try:
+            for handle in self.driver.window_handles:
+                if handle != keep:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            self.driver.switch_to.window(keep)
+        except Exception as e:
+            self.logger.debug(f"[FIDC] Could not close subclass tabs: {e}")
 
-            except WebDriverException as e:
-                self.logger.warning(
-                    f"[FIDC] WebDriver exception for {cnpj} "
-                    f"(attempt {attempt + 1}/{max_retries}): {str(e)}"
-                )
-                if attempt < max_retries - 1:
-                    if not self.recover_driver():
-                        time.sleep(config.RETRY_DELAY)
-                    continue
-                result["Status"] = f"WebDriver error after {max_retries} attempts"
-                return result
+    @staticmethod
+    def kill_orphan_processes(logger: Optional[logging.Logger] = None):
+        """Force-kill any orphan chrome/chromedriver processes on Linux.
 
-            except Exception as e:
-                self.logger.error(
-                    f"[FIDC] Error in scrape_fidc_data for {cnpj} "
-                    f"(attempt {attempt + 1}/{max_retries}): {str(e)}"
-                )
-                if attempt < max_retries - 1:
-                    time.sleep(config.RETRY_DELAY)
-                    continue
-                result["Status"] = f"Error: {str(e)}"
-                return result
+        This protects against hangs where driver.quit() does not actually
+        terminate the browser subprocess tree. It kills EVERY Chrome on the
+        host, so parallel callers must only run it once no worker is left.
+        """
+        logger = logger or logging.getLogger(__name__)
+        try:
+            import platform
 
-        return result
+            if platform.system() == "Linux":
+                for proc_name in ("chromedriver", "chrome", "chromium"):
+                    subprocess.call(
+                        ["pkill", "-9", "-f", proc_name],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+                logger.info("Force-killed any lingering Chrome processes")
+        except Exception as e:
+            logger.warning(f"Orphan process cleanup failed: {e}")
 
-    def close(self):
+    def close(self, kill_orphans: bool = True):
         """Close the browser and aggressively clean up any lingering processes.
 
         On Streamlit Cloud (and any memory-constrained host) a Chrome process
         that does not exit here will eat hundreds of MB and eventually trip
         the container's RAM limit, which Streamlit Cloud surfaces as a crash
         ("Argh. This app has gone over its resource limits").
+
+        Args:
+            kill_orphans: Also pkill every Chrome on the host. Pass False when
+                sibling scrapers (parallel workers) are still running, and
+                sweep once with kill_orphan_processes() when they are done.
         """
+        # 0. Tear down this scraper's own spare (a shared pool standby is
+        # closed by whoever created it) and stop the watchdog.
+        if self.standby and self._owns_standby:
+            self.standby.close()
+        if self.watchdog:
+            self.watchdog.close()
+
         # 1. Try graceful quit
         if self.driver:
             try:
@@ -1683,21 +2708,12 @@ class StealthANBIMAScraper:
                 self.driver = None
 
         # 2. Force-kill any orphan chrome/chromedriver processes on Linux.
-        # This protects against hangs where driver.quit() does not actually
-        # terminate the browser subprocess tree.
-        try:
-            import platform
+        if kill_orphans:
+            self.kill_orphan_processes(self.logger)
 
-            if platform.system() == "Linux":
-                for proc_name in ("chromedriver", "chrome", "chromium"):
-                    subprocess.call(
-                        ["pkill", "-9", "-f", proc_name],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                    )
-                self.logger.info("Force-killed any lingering Chrome processes")
-        except Exception as e:
-            self.logger.warning(f"Orphan process cleanup failed: {e}")
+        # 3. Drop the tmpfs profile clone (seeding the template with the
+        # cookie-consent state first, if this session was the one to give it).
+        self._release_profile(seed=True)
 
     def __enter__(self):
         """Context manager entry"""
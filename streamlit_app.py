@@ -18,8 +18,10 @@ import traceback
 import sys
 
 # Import existing scrapers
-from stealth_scraper import StealthANBIMAScraper, subclass_matches
+from stealth_scraper import StealthANBIMAScraper
+from retry_policy import DeferredRetryQueue
 from data_processor import DataProcessor
+from date_window import DateWindow
 import config
 
 # Setup logging to capture all events
@@ -239,9 +241,57 @@ if "settings" not in st.session_state:
         workers=1,
         delay=1.5,
         proxy="",  # optional upstream proxy scheme://host:port (IP rotation)
+        launch_profile=config.CHROME_LAUNCH_PROFILE,  # "default" | "lean"
+        engine="selenium",  # "selenium" | "playwright"
+        since="",  # date window on the periodic rows: dd/mm/yyyy, yyyy-mm-dd or e.g. "6m"
+        until="",
     )
-# Back-compat: ensure 'proxy' exists if settings were created before this field.
+# Back-compat: ensure newer fields exist if settings were created before them.
 st.session_state.settings.setdefault("proxy", "")
+st.session_state.settings.setdefault("launch_profile", config.CHROME_LAUNCH_PROFILE)
+st.session_state.settings.setdefault("engine", "selenium")
+st.session_state.settings.setdefault("since", "")
+st.session_state.settings.setdefault("until", "")
+
+
+def date_window_inputs(key_prefix: str) -> bool:
+    """Since / until inputs for a Review page. Returns False if a bound is unreadable."""
+    st.markdown(
+        cota_theme.setting_text(
+            "Date window",
+            "Only fetch rows in this range: dd/mm/yyyy, yyyy-mm-dd or relative "
+            "(6m, 90d, 2y). Leave blank for the full history.",
+        ),
+        unsafe_allow_html=True,
+    )
+    col_since, col_until = st.columns(2)
+    st.session_state.settings["since"] = col_since.text_input(
+        "Since",
+        value=st.session_state.settings["since"],
+        placeholder="e.g. 6m",
+        key=f"{key_prefix}_since",
+    ).strip()
+    st.session_state.settings["until"] = col_until.text_input(
+        "Until",
+        value=st.session_state.settings["until"],
+        placeholder="latest",
+        key=f"{key_prefix}_until",
+    ).strip()
+    try:
+        settings_window()
+    except ValueError as e:
+        st.error(f"Date window: {e}")
+        return False
+    return True
+
+
+def settings_window() -> DateWindow:
+    """The DateWindow from the run settings (ValueError if a bound is unreadable)."""
+    return DateWindow(
+        st.session_state.settings["since"] or None,
+        st.session_state.settings["until"] or None,
+    )
+
 
 # ── FIDC workflow state (separate route, mirrors the regular-scrape keys) ──
 if "fidc_phase" not in st.session_state:
@@ -834,6 +884,48 @@ if st.session_state.route == "settings":
                 label_visibility="collapsed",
             ).strip()
 
+            # Lean browser launch profile — fewer renderer processes, capped V8
+            # heap, no background networking. For RAM-tight containers.
+            st.markdown(
+                cota_theme.setting_text(
+                    "Lean browser",
+                    "Low-memory Chrome flags for small containers (e.g. Streamlit "
+                    "Cloud). Compare with benchmark_browsers.py.",
+                ),
+                unsafe_allow_html=True,
+            )
+            st.session_state.settings["launch_profile"] = (
+                "lean"
+                if st.toggle(
+                    "Lean browser default",
+                    value=st.session_state.settings["launch_profile"] == "lean",
+                    key="setting_lean_default",
+                    label_visibility="collapsed",
+                )
+                else "default"
+            )
+
+            # Playwright engine — one Chromium with a light browser context
+            # per scrape instead of a Selenium Chrome (optional dependency).
+            st.markdown(
+                cota_theme.setting_text(
+                    "Playwright engine",
+                    "Scrape with async Playwright instead of Selenium (needs the "
+                    "playwright package). Stealth / lean settings don't apply.",
+                ),
+                unsafe_allow_html=True,
+            )
+            st.session_state.settings["engine"] = (
+                "playwright"
+                if st.toggle(
+                    "Playwright engine default",
+                    value=st.session_state.settings["engine"] == "playwright",
+                    key="setting_engine_default",
+                    label_visibility="collapsed",
+                )
+                else "selenium"
+            )
+
             # Build / version info at the bottom of the card
             st.markdown(
                 f'<div class="cota-env-row" style="margin-top:8px">'
@@ -891,33 +983,8 @@ if st.session_state.route == "fidc":
                         # When present, the scraper keeps ONLY the matching
                         # subclass for each CNPJ (graceful fallback to all if a
                         # label doesn't match anything). Accepts a few header
-                        # spellings.
-                        import re as _re
-
-                        def _norm_cnpj(x):
-                            return _re.sub(r"\s+", "", str(x))
-
-                        desired_col = next(
-                            (
-                                c
-                                for c in df.columns
-                                if str(c).strip().lower()
-                                in (
-                                    "subclasse desejada",
-                                    "subclasse",
-                                    "subclass",
-                                    "desired subclass",
-                                    "subclasse_desejada",
-                                )
-                            ),
-                            None,
-                        )
-                        fidc_desired = {}
-                        if desired_col is not None:
-                            for _, row in df.iterrows():
-                                val = str(row[desired_col]).strip()
-                                if val and val.lower() != "nan":
-                                    fidc_desired[_norm_cnpj(row["CNPJ"])] = val
+                        # spellings (DataProcessor.DESIRED_SUBCLASS_COLUMNS).
+                        fidc_desired = DataProcessor().desired_subclasses(df)
                         st.session_state.fidc_desired = fidc_desired
 
                         st.session_state.session_logger.info(
@@ -1017,6 +1084,7 @@ if st.session_state.route == "fidc":
                     key="fidc_setting_delay",
                     label_visibility="collapsed",
                 )
+                fidc_window_ok = date_window_inputs("fidc_setting")
 
                 _n_desired = len(st.session_state.get("fidc_desired", {}))
                 st.markdown(
@@ -1045,6 +1113,7 @@ if st.session_state.route == "fidc":
                     type="primary",
                     width="stretch",
                     key="fidc_review_start",
+                    disabled=not fidc_window_ok,
                 ):
                     kill_orphan_chrome()
                     st.session_state.fidc_stop = False
@@ -1157,15 +1226,27 @@ if st.session_state.route == "fidc":
         try:
             use_stealth = st.session_state.settings["stealth"]
             headless = st.session_state.settings["headless"]
-            if use_stealth:
+            window = settings_window()
+            if st.session_state.settings["engine"] == "playwright":
+                from playwright_engine import PlaywrightANBIMAScraper
+
+                scraper = PlaywrightANBIMAScraper(
+                    headless=headless,
+                    proxy=st.session_state.settings.get("proxy") or None,
+                )
+            elif use_stealth:
                 scraper = StealthANBIMAScraper(
                     headless=headless,
                     proxy=st.session_state.settings.get("proxy") or None,
+                    launch_profile=st.session_state.settings["launch_profile"],
                 )
             else:
                 from anbima_scraper import ANBIMAScraper
 
-                scraper = ANBIMAScraper(headless=headless)
+                scraper = ANBIMAScraper(
+                    headless=headless,
+                    launch_profile=st.session_state.settings["launch_profile"],
+                )
 
             if not hasattr(scraper, "scrape_fidc_data"):
                 fidc_status.error(
@@ -1193,8 +1274,13 @@ if st.session_state.route == "fidc":
             if driver_mode:
                 fidc_status.success(f"✅ WebDriver: **{driver_mode}**")
 
-            for idx, cnpj in enumerate(st.session_state.fidc_cnpjs, 1):
+            deferred = DeferredRetryQueue(name="streamlit-fidc")
+            for cnpj in deferred.run(st.session_state.fidc_cnpjs):
+                idx = len(results) + 1
                 if st.session_state.fidc_stop:
+                    pending = deferred.drain()
+                    results.extend(pending)
+                    st.session_state.fidc_failed_count += len(pending)
                     fidc_status.warning(
                         f"⚠️ Stopped by user after {idx - 1}/{total} CNPJs"
                     )
@@ -1206,34 +1292,34 @@ if st.session_state.route == "fidc":
                 st.session_state.session_logger.info(
                     f"[FIDC {idx}/{total}] CNPJ: {cnpj}"
                 )
+                # Optional per-CNPJ subclass filter: the scraper visits only the
+                # subclass the user asked for. If the label matches nothing it
+                # visits all (so data isn't lost) and says so.
+                desired = st.session_state.fidc_desired.get(DataProcessor.cnpj_key(cnpj))
                 try:
-                    result = scraper.scrape_fidc_data(cnpj)
-
-                    # Optional per-CNPJ subclass filter: keep only the subclass
-                    # the user asked for. If the label matches nothing, keep all
-                    # (so data isn't lost) and note it.
-                    import re as _re
-
-                    desired = st.session_state.fidc_desired.get(
-                        _re.sub(r"\s+", "", str(cnpj))
-                    )
-                    if desired and result.get("subclasses"):
-                        kept = [
-                            s
-                            for s in result["subclasses"]
-                            if subclass_matches(desired, s)
-                        ]
-                        if kept:
-                            result["subclasses"] = kept
+                    result = scraper.scrape_fidc_data(cnpj, since=window, desired=desired)
+                    if result.get("Status") != "Success":
+                        retry, delay, _ = scraper.retry_policy.decide(
+                            result, layer="streamlit-fidc"
+                        )
+                        if retry:
+                            deferred.push(cnpj, delay, result)
                             st.session_state.session_logger.info(
-                                f"[FIDC {idx}/{total}] filtered to '{desired}': "
-                                f"{len(kept)} subclass(es)"
-                            )
-                        else:
-                            st.session_state.session_logger.warning(
-                                f"[FIDC {idx}/{total}] desired '{desired}' matched no "
-                                f"subclass — keeping all {len(result['subclasses'])}"
+                                f"[FIDC {idx}/{total}] DEFERRED: {cnpj} - retry in {delay:.0f}s"
                             )
+                            _render_fidc_live()
+                            continue
+
+                    if result.get("subclass_filter") == "matched":
+                        st.session_state.session_logger.info(
+                            f"[FIDC {idx}/{total}] filtered to '{desired}': "
+                            f"{len(result.get('subclasses') or [])} subclass(es)"
+                        )
+                    elif result.get("subclass_filter") == "no match":
+                        st.session_state.session_logger.warning(
+                            f"[FIDC {idx}/{total}] desired '{desired}' matched no "
+                            f"subclass — kept all {len(result.get('subclasses') or [])}"
+                        )
 
                     results.append(result)
                     ms = int((time.time() - t0) * 1000)
@@ -1300,6 +1386,9 @@ if st.session_state.route == "fidc":
                     st.session_state.session_logger.error(
                         f"[FIDC] Aborting run at {idx}/{total} — driver permanently dead"
                     )
+                    pending = deferred.drain()
+                    results.extend(pending)
+                    st.session_state.fidc_failed_count += len(pending)
                     was_interrupted = True
                     break
 
@@ -1614,6 +1703,7 @@ elif st.session_state.phase == "review":
                 key="setting_delay",
                 label_visibility="collapsed",
             )
+            window_ok = date_window_inputs("setting")
 
             # Run summary
             est_min = (len(st.session_state.cnpjs) * 2.2) / max(
@@ -1645,7 +1735,11 @@ elif st.session_state.phase == "review":
 
             # Start Scraping
             if st.button(
-                "▶  Start scraping", type="primary", width="stretch", key="review_start"
+                "▶  Start scraping",
+                type="primary",
+                width="stretch",
+                key="review_start",
+                disabled=not window_ok,
             ):
                 # Kill any orphan Chrome processes from a previous run before starting,
                 # otherwise we risk tripping the Streamlit Cloud ~1 GB RAM ceiling.
@@ -1783,16 +1877,28 @@ if st.session_state.phase == "scrape":
             st.session_state.session_logger.warning(f"Incremental save failed: {e}")
 
     try:
+        window = settings_window()
         # Initialize scraper
-        if use_stealth:
+        if st.session_state.settings["engine"] == "playwright":
+            from playwright_engine import PlaywrightANBIMAScraper
+
+            scraper = PlaywrightANBIMAScraper(
+                headless=headless,
+                proxy=st.session_state.settings.get("proxy") or None,
+            )
+        elif use_stealth:
             scraper = StealthANBIMAScraper(
                 headless=headless,
                 proxy=st.session_state.settings.get("proxy") or None,
+                launch_profile=st.session_state.settings["launch_profile"],
             )
         else:
             from anbima_scraper import ANBIMAScraper
 
-            scraper = ANBIMAScraper(headless=headless)
+            scraper = ANBIMAScraper(
+                headless=headless,
+                launch_profile=st.session_state.settings["launch_profile"],
+            )
 
         if not scraper.setup_driver():
             # Surface the underlying driver error directly in the status slot.
@@ -1829,9 +1935,17 @@ if st.session_state.phase == "scrape":
             f"WebDriver initialized successfully via: {driver_mode}"
         )
 
-        for idx, cnpj in enumerate(st.session_state.cnpjs, 1):
+        # Retryable failures wait out their backoff here while the loop moves
+        # on to the next CNPJs; they come back once it has expired.
+        deferred = DeferredRetryQueue(name="streamlit")
+        for cnpj in deferred.run(st.session_state.cnpjs):
+            idx = len(results) + 1
             # Check if user requested stop
             if st.session_state.stop_scraping:
+                # CNPJs still waiting for a retry keep their last failure
+                pending = deferred.drain()
+                results.extend(pending)
+                st.session_state.failed_count += len(pending)
                 st.session_state.session_logger.info(
                     f"Scraping stopped by user at CNPJ {idx}/{total}"
                 )
@@ -1850,12 +1964,25 @@ if st.session_state.phase == "scrape":
             )
 
             try:
-                result = scraper.scrape_fund_data(cnpj)
-                results.append(result)
+                result = scraper.scrape_fund_data(cnpj, since=window)
                 cnpj_elapsed = time.time() - cnpj_start_time
                 cnpj_ms = int(cnpj_elapsed * 1000)
                 fund_name = str(result.get("Nome do Fundo") or "—")
 
+                if result.get("Status") != "Success":
+                    retry, delay, _ = scraper.retry_policy.decide(result, layer="streamlit")
+                    if retry:
+                        deferred.push(cnpj, delay, result)
+                        st.session_state.status_messages.append(
+                            f"⏳ {cnpj} - {result.get('Status', 'Failed')} (retrying in {delay:.0f}s)"
+                        )
+                        st.session_state.session_logger.info(
+                            f"[{idx}/{total}] DEFERRED: {cnpj} - retry in {delay:.0f}s"
+                        )
+                        _render_live()
+                        continue
+
+                results.append(result)
                 if result.get("Status") == "Success":
                     data_points = len(result.get("periodic_data", []))
                     st.session_state.success_count += 1
@@ -1924,7 +2051,7 @@ if st.session_state.phase == "scrape":
                 )
 
             # Update progress + re-render the live regions for this completed item.
-            st.session_state.progress = idx / total
+            st.session_state.progress = len(results) / total
             _persist_partial()  # incremental save — survives a killed process
             _render_live()
 
@@ -1939,6 +2066,9 @@ if st.session_state.phase == "scrape":
                 st.session_state.session_logger.error(
                     f"Aborting run at {idx}/{total} — driver permanently dead"
                 )
+                pending = deferred.drain()
+                results.extend(pending)
+                st.session_state.failed_count += len(pending)
                 was_interrupted = True
                 break
 
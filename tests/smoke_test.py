@@ -1,20 +1,52 @@
 """Cross-platform smoke test for CI (and local sanity).
 
 Pure-Python checks that don't need a browser or network:
-  - DataProcessor.process_fidc_data produces the 9-column tidy frame
-  - subclass_matches resolves codes and class names, blank = keep all
+  - DataProcessor.process_fidc_data produces the 9-column tidy frame;
+    desired_subclasses reads the optional desired-subclass column
+  - RunJournal keeps the last result per CNPJ and skips a torn line
+  - FundCatalog answers fund / subclass lookups by CNPJ, honours its TTL
+    and forgets a CNPJ on request
+  - subclass_matches resolves codes and class names, blank = keep all;
+    filter_subclass_links keeps every link when nothing matches
+  - LaunchStatsStore demotes a launch strategy that keeps failing
+  - SessionStateStore round-trips cookies into CDP and honours its TTL
+  - rate_limit_reason flags block statuses / small block pages only
+  - RetryPolicy classifies failures and stops at the shared budget;
+    deferred retries come back after the fresh CNPJs
+  - DateWindow parses absolute / relative bounds and keeps in-window rows
+  - RowHarvest de-duplicates re-read rows and stops past the window
+  - HttpANBIMAScraper reads a local fixture server (also in all-columns
+    mode, feeding both outputs), pages the fund listing, and falls back to the browser scraper when
+    blocked or when the endpoint contract breaks
 
 Run:  python tests/smoke_test.py   (exits non-zero on failure)
 """
 
+import json
 import os
 import sys
+import tempfile
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
 
 # Allow running from the repo root or the tests/ dir.
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_processor import DataProcessor  # noqa: E402
-from stealth_scraper import subclass_matches  # noqa: E402
+from stealth_scraper import filter_subclass_links, subclass_matches  # noqa: E402
+from launch_stats import LaunchStatsStore  # noqa: E402
+from session_state import SessionStateStore  # noqa: E402
+from page_scripts import rate_limit_reason  # noqa: E402
+from retry_policy import DeferredRetryQueue, RetryPolicy, classify  # noqa: E402
+from date_window import DateWindow, parse_date  # noqa: E402
+from row_harvest import RowHarvest  # noqa: E402
+from run_journal import RunJournal  # noqa: E402
+from fund_catalog import FundCatalog  # noqa: E402
+from http_engine import AnbimaHttpClient, HttpANBIMAScraper  # noqa: E402
 
 
 def test_process_fidc_data():
@@ -49,6 +81,27 @@ def test_process_fidc_data():
     )
     assert empty.shape == (0, 9), empty.shape
 
+    frame = pd.DataFrame(
+        {"CNPJ": ["53.189.745/0001-07 ", "11.111.111/0001-11"], "Subclasse desejada": ["S0000762296", None]}
+    )
+    assert DataProcessor().desired_subclasses(frame) == {"53.189.745/0001-07": "S0000762296"}
+    assert DataProcessor().desired_subclasses(frame[["CNPJ"]]) == {}
+
+
+def test_run_journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal.for_output(os.path.join(tmp, "fidc.xlsx"))
+        assert journal.path.endswith("fidc.journal.jsonl") and journal.load() == {}
+        journal.append({"CNPJ": "a", "Status": "Rate limited"})
+        journal.append({"CNPJ": "b", "Status": "No data extracted"})
+        journal.append({"CNPJ": "a", "Status": "Success", "subclasses": []})
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"CNPJ": "c", "Sta')  # killed mid-write
+        assert set(journal.load()) == {"a", "b"}
+        assert sorted(journal.done()) == ["a", "b"]
+        journal.reset()
+        assert journal.load() == {}
+
 
 def test_subclass_matches():
     subs = [
@@ -70,10 +123,300 @@ def test_subclass_matches():
     ] == "S0000762300"
     assert all(subclass_matches("", s) for s in subs), "blank desired must keep all"
 
+    links = [{"name": s["subclasse_name"], "code": s["subclasse_code"], "href": ""} for s in subs]
+    kept, matched = filter_subclass_links("SUBCLASSE B", links)
+    assert matched and [l["code"] for l in kept] == ["S0000762296"]
+    assert filter_subclass_links("SUBCLASSE Z", links) == (links, False), "no match keeps all"
+
+
+def test_launch_stats_order():
+    path = os.path.join(tempfile.mkdtemp(), "launch_stats.json")
+    store = LaunchStatsStore(path=path, host_key="test-host")
+    assert store.order(["uc", "plain"]) == ["uc", "plain"], "no history → default"
+    assert not store.claim_reprobe("uc") and not os.path.exists(path), "nothing to write"
+    store.record("uc", False, 12.0, "SessionNotCreatedException")
+    assert store.order(["uc", "plain"]) == ["uc", "plain"], "one failure ≠ demoted"
+    store.record("uc", False, 11.0, "SessionNotCreatedException")
+    store.record("plain", True, 4.0)
+    assert store.order(["uc", "plain"]) == ["plain", "uc"], store.stats("uc")
+    # persisted: a fresh store on the same file sees the same history
+    again = LaunchStatsStore(path=path, host_key="test-host")
+    assert again.stats("uc")["consecutive_failures"] == 2
+    assert again.stats("plain")["successes"] == 1
+    # one success restores the default order
+    again.record("uc", True, 9.0)
+    assert again.order(["uc", "plain"]) == ["uc", "plain"]
+
+
+class _FakeDriver:
+    """Records CDP commands; serves canned cookies and localStorage."""
+
+    def __init__(self):
+        self.cdp = []
+
+    def get_cookies(self):
+        return [{"name": "consent", "value": "1", "domain": ".anbima.com.br",
+                 "path": "/", "secure": True, "expiry": 1999999999}]
+
+    def execute_script(self, script):
+        return {"origin": "https://data.anbima.com.br", "items": {"k": "v"}, "user_agent": "UA"}
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+
+
+def test_session_state_store():
+    path = os.path.join(tempfile.mkdtemp(), "session_state.json")
+    store = SessionStateStore(path=path, ttl=60)
+    assert store.load() is None and not store.import_into_driver(_FakeDriver())
+    assert store.export_from_driver(_FakeDriver())
+    driver = _FakeDriver()
+    assert store.import_into_driver(driver)
+    commands = dict(driver.cdp)
+    cookie = commands["Network.setCookies"]["cookies"][0]
+    assert cookie["name"] == "consent" and cookie["expires"] == 1999999999, cookie
+    assert "data.anbima.com.br" in commands["Page.addScriptToEvaluateOnNewDocument"]["source"]
+    assert SessionStateStore(path=path, ttl=0).load() is None, "expired"
+    assert store.load() is None, "an expired state is dropped"
+
+
+def test_rate_limit_reason():
+    page = {"url": "https://data.anbima.com.br/fundos/C1", "title": "ANBIMA Data",
+            "status": 200, "html_length": 250000, "small_html": ""}
+    assert rate_limit_reason(page) is None
+    assert rate_limit_reason({**page, "status": 429}) == "HTTP 429"
+    assert rate_limit_reason({**page, "title": "Access Denied"})
+    blocked = "<html><body>Too many requests, try again later</body></html>"
+    assert rate_limit_reason({**page, "html_length": len(blocked), "small_html": blocked})
+    assert rate_limit_reason({"url": "about:blank", "status": 429}) is None
+
+
+def test_date_window():
+    today = date(2025, 8, 31)
+    assert parse_date("6m", today) == date(2025, 2, 28)
+    assert parse_date("10d", today) == date(2025, 8, 21)
+    assert parse_date("2025-01-31") == parse_date("31/01/2025") == date(2025, 1, 31)
+    window = DateWindow(since="01/02/2025", until="2025-03-31")
+    assert window.contains("15/02/2025") and window.contains("02/2025")
+    assert not window.contains("31/01/2025") and not window.contains("01/04/2025")
+    assert window.contains("—"), "rows without a date are kept"
+    assert window.is_before("31/01/2025") and not window.is_before("01/04/2025")
+    assert window.passed("31/01/2025", date(2025, 2, 1))
+    assert not window.passed("31/01/2025", None), "an oldest-first table never passes"
+    rows = [{"Data": "31/01/2025"}, {"Data": "01/03/2025"}]
+    assert window.filter(rows, "Data") == [{"Data": "01/03/2025"}]
+    assert not DateWindow().bounded and DateWindow.of(window) is window
+    try:
+        DateWindow(since="2025-04-01", until="2025-03-01")
+        raise AssertionError("since after until is rejected")
+    except ValueError:
+        pass
+
+
+def test_row_harvest():
+    harvest = RowHarvest(["Data", "Cota"], required=2)
+    harvest.bind([0, 2])
+    pages = [[["03/01/2025", "1,03"], ["02/01/2025", "1,02"]],
+             [["02/01/2025", "1,02"], ["01/01/2025", "1,01"]]]  # one row re-rendered
+
+    def run_script(script, opts):
+        assert opts["indexes"] == [0, 2] and opts["required"] == 2
+        return {"rows": pages.pop(0)} if pages else None
+
+    assert harvest.step(run_script) == 2 and harvest.step(run_script) == 2
+    assert harvest.step(run_script) == 0, "no table: nothing added"
+    assert [r["Data"] for r in harvest.records()] == ["01/01/2025", "02/01/2025", "03/01/2025"]
+
+    windowed = RowHarvest(["Data"], window=DateWindow(since="02/01/2025"))
+    windowed.add([["03/01/2025"], ["02/01/2025"], ["01/01/2025"], ["31/12/2024"]])
+    assert windowed.passed and windowed.skipped == 1 and len(windowed) == 2
+
+
+def test_retry_policy():
+    assert classify("Success") is None
+    assert classify("No fund found for this CNPJ") == "not_found"
+    assert classify("Rate limited") == "rate_limited"
+    assert classify("Driver connection lost") == "driver_dead"
+    assert classify("Timeout: Page took too long to load") == "timeout"
+    assert classify("Could not find required columns in table") == "parse_error"
+
+    policy = RetryPolicy(max_attempts=2, time_budget=60)
+    budget = policy.budget("X")
+    assert policy.budget("X") is budget, "every layer shares one budget"
+    assert budget.begin_attempt("scraper")
+    budget.end_attempt("scraper", "rate_limited", "Rate limited")
+    result = {"CNPJ": "X", "Status": "Rate limited"}
+    policy.annotate(result, budget, "rate_limited")
+    retry, delay, _ = policy.decide(result)
+    assert retry and delay > 0
+    assert budget.begin_attempt("scraper")
+    assert not budget.begin_attempt("scraper"), "budget spent"
+    policy.annotate(result, budget, "rate_limited")
+    assert policy.decide(result)[0] is False
+    assert policy.decide({"CNPJ": "Y", "Status": "No fund found for this CNPJ"})[0] is False
+
+    # Deferred retries run after the fresh items, not in place
+    deferred, order = DeferredRetryQueue(), []
+    for cnpj in deferred.run(["A", "B"]):
+        order.append(cnpj)
+        if order.count(cnpj) == 1 and cnpj == "A":
+            deferred.push(cnpj, 0.05, {"CNPJ": cnpj})
+    assert order == ["A", "B", "A"], order
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Canned ANBIMA-style JSON endpoints for test_http_engine."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        status, body = 200, None
+        if url.path == "/fundos" and "q" not in query:  # the whole listing
+            body = {"content": [
+                {"codigo_fundo": "C1", "razao_social": "FUNDO TESTE FIM",
+                 "cnpj_fundo": "11.111.111/0001-11", "tipo_fundo": "FIM"},
+                {"codigo_fundo": "C9", "razao_social": "FIDC TESTE", "cnpj_fundo": "99.999.999/0001-99",
+                 "tipo_fundo": "FIDC", "subclasses": [{"codigo_fundo": "S1", "razao_social": "SENIOR"}]},
+            ], "last": True}
+        elif url.path == "/fundos":
+            q = query.get("q", [""])[0]
+            if q.startswith("111"):
+                body = {"content": [{"codigo_fundo": "C1", "razao_social": "FUNDO TESTE FIM"}]}
+            elif q.startswith("222"):
+                body = {"content": []}
+            elif q.startswith("333"):
+                status = 429
+            elif q.startswith("666"):  # listed, but its series is gone
+                body = {"content": [{"codigo_fundo": "C6", "razao_social": "FUNDO SUMIDO"}]}
+            else:
+                body = {"results": "contract changed"}
+        elif url.path == "/fundos/C1/dados-periodicos":
+            if query.get("page") == ["0"]:
+                body = {"content": [
+                    {"data_competencia": "2026-02-27", "valor_cota": 1.25},
+                    {"data_competencia": "2026-01-30", "valor_cota": 1.2},
+                ], "last": False}
+            else:
+                body = {"content": [
+                    {"data_competencia": "2026-01-30", "valor_cota": 1.2},
+                    {"data_competencia": "2025-12-31", "valor_cota": 1.1},
+                ], "last": True}
+        else:
+            status = 404
+        payload = json.dumps(body).encode() if body is not None else b"blocked"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeBrowserScraper:
+    def scrape_fund_data(self, cnpj):
+        return {"CNPJ": cnpj, "Status": "Success", "via": "browser"}
+
+    def close(self, kill_orphans=False):
+        pass
+
+
+def test_fund_catalog():
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = FundCatalog(os.path.join(tmp, "catalog.sqlite3"))
+        assert catalog.fund("11.111.111/0001-11") is None and catalog.subclasses("x") == []
+        written = catalog.upsert([
+            {"cnpj": "11.111.111/0001-11", "code": "C1", "name": "FUNDO TESTE FIM", "position": 0},
+            {"cnpj": "99.999.999/0001-99", "code": "C9", "name": "FIDC TESTE", "position": 1},
+            {"cnpj": "99.999.999/0001-99", "code": "S2", "name": "SUBCLASSE B", "parent": "C9", "position": 3},
+            {"cnpj": "99.999.999/0001-99", "code": "S1", "name": "SUBCLASSE SENIOR", "parent": "C9", "position": 2},
+            {"cnpj": None, "code": "C0"},  # no CNPJ: not catalogable
+        ])
+        assert written == 4, written
+        fund = catalog.fund("11111111000111")
+        assert fund["code"] == "C1" and fund["href"].endswith("/fundos/C1"), fund
+        assert [s["code"] for s in catalog.subclasses("99.999.999/0001-99")] == ["S1", "S2"]
+        assert [s["code"] for s in catalog.subclasses("11111111000111")] == ["C1"], "no subclasses: all"
+        assert catalog.stats()["fresh_cnpjs"] == 2
+        assert FundCatalog(catalog.path, ttl=-1).fund("11111111000111") is None, "expired"
+        catalog.forget("99999999000199")
+        assert catalog.subclasses("99.999.999/0001-99") == []
+        catalog.set_meta("crawl_next_page", 7)
+        assert catalog.get_meta("crawl_next_page") == "7"
+
+
+def test_http_engine():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = AnbimaHttpClient(base_url=f"http://127.0.0.1:{server.server_port}", pool_size=2)
+        scraper = HttpANBIMAScraper(client=client, fallback=_FakeBrowserScraper())
+
+        result = scraper.scrape_fund_data("11111111000111")
+        assert result["Status"] == "Success", result["Status"]
+        assert result["Nome do Fundo"] == "FUNDO TESTE FIM"
+        # Two pages, deduplicated by date, oldest first, as the site shows them
+        assert result["periodic_data"] == [
+            {"Data da cotização": "31/12/2025", "Valor cota": "1,10"},
+            {"Data da cotização": "30/01/2026", "Valor cota": "1,20"},
+            {"Data da cotização": "27/02/2026", "Valor cota": "1,25"},
+        ], result["periodic_data"]
+
+        # All-columns mode: the same rows feed both the pivot and the long output
+        combined = scraper.scrape_combined_data("11111111000111")
+        assert combined["Status"] == "Success", combined["Status"]
+        assert combined["periodic_data"] == result["periodic_data"], combined["periodic_data"]
+        assert [s["subclasse_code"] for s in combined["subclasses"]] == ["C1"]
+        processor = DataProcessor()
+        assert processor.process_fidc_data([combined]).shape == (3, 9)
+        assert processor.process_scraped_data([combined]).equals(processor.process_scraped_data([result]))
+
+        entries, last = client.listing(0)
+        assert last and [(e["code"], e["parent"]) for e in entries] == [
+            ("C1", None), ("C9", None), ("S1", "C9")
+        ], entries
+
+        assert scraper.scrape_fund_data("22222222000122")["Status"] == "No fund found for this CNPJ"
+        assert scraper.scrape_fund_data("33333333000133").get("via") == "browser", "blocked → browser"
+        assert scraper.scrape_fund_data("66666666000166").get("via") == "browser", "missing fund → browser"
+        assert client.contract_broken is None, "one missing fund leaves the client on"
+        assert scraper.scrape_fund_data("44444444000144").get("via") == "browser", "contract → browser"
+        assert client.contract_broken, "a contract error sticks for the run"
+        assert scraper.scrape_fund_data("11111111000111").get("via") == "browser"
+        assert scraper.fallback_count == 4
+        scraper.close()
+        client.close()
+
+        # A connection error spends the CNPJ's attempts like any other failure
+        dead = HttpANBIMAScraper(client=AnbimaHttpClient(base_url="http://127.0.0.1:9", pool_size=1),
+                                 fallback=_FakeBrowserScraper())
+        calls = 0
+        while True:
+            calls += 1
+            failed = dead.scrape_fund_data("55555555000155")
+            if not dead.retry_policy.decide(failed)[0]:
+                break
+            assert calls < 20, "the HTTP path never spends its retry budget"
+        assert failed["attempts_left"] == 0, failed
+        dead.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
 
 def main():
     test_process_fidc_data()
     test_subclass_matches()
+    test_launch_stats_order()
+    test_session_state_store()
+    test_rate_limit_reason()
+    test_date_window()
+    test_row_harvest()
+    test_retry_policy()
+    test_run_journal()
+    test_fund_catalog()
+    test_http_engine()
     print("smoke tests OK")
 
 